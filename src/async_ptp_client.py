@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""
+Async Nikon PTP/IP Client
+asyncio stream based client that drives many cameras from a single event loop
+"""
+
+import os
+import sys
+import time
+import struct
+import asyncio
+import logging
+from typing import Optional, List, Tuple, Callable, Union, BinaryIO
+
+from nikon_ptp_client import PTPIPProtocol, PTPEvent, PTPEventBus, PTPDeviceInfo, time_to_ready_histogram
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPTPIPClient(PTPIPProtocol):
+    """
+    asyncio 스트림 기반 PTP/IP 클라이언트
+
+    패킷 상수와 파서는 PTPIPClient와 같은 PTPIPProtocol을 사용하고, 소켓 입출력만 awaitable로 바꾼 것이다.
+    카메라마다 스레드를 두지 않으므로 하나의 이벤트 루프에서 수십 대를 동시에 다룰 수 있다.
+    """
+
+    HEADER = struct.Struct('<II')  # [길이:4] [타입:4]
+
+    def __init__(self, camera_ip: str, camera_port: int = 15740, timeout: float = 10.0):
+        self.camera_ip = camera_ip
+        self.camera_port = camera_port
+        self.timeout = timeout  # 연결 및 패킷 수신 타임아웃 (초)
+
+        self.command_reader: Optional[asyncio.StreamReader] = None
+        self.command_writer: Optional[asyncio.StreamWriter] = None
+        self.event_reader: Optional[asyncio.StreamReader] = None
+        self.event_writer: Optional[asyncio.StreamWriter] = None
+
+        # 세션 및 트랜잭션 관리 (PTPIPClient와 동일한 규칙)
+        self.session_id = 1
+        self.transaction_id = 0
+        self.connection_number = 1
+
+        # 클라이언트 식별 정보 (공식 안드로이드 앱과 동일)
+        self.client_guid = self.CLIENT_GUID
+        self.client_name = "Android Device"
+
+        self.events = PTPEventBus()  # 디코딩된 이벤트 구독 (콜백은 이벤트 루프에서 호출됨)
+        self.event_task: Optional[asyncio.Task] = None
+        self.command_lock: Optional[asyncio.Lock] = None  # 명령 채널 트랜잭션 직렬화
+        self._event_arrived: Optional[asyncio.Event] = None
+        self.device_info: Optional[PTPDeviceInfo] = None
+
+    async def connect(self) -> bool:
+        """명령 채널과 이벤트 채널을 열고 초기화 (이벤트 수신 태스크 시작)"""
+        logger.info(f"[{self.camera_ip}] 비동기 연결 시도 중...")
+        self.command_lock = asyncio.Lock()
+        self._event_arrived = asyncio.Event()
+
+        try:
+            # 명령 채널
+            self.command_reader, self.command_writer = await asyncio.wait_for(
+                asyncio.open_connection(self.camera_ip, self.camera_port), self.timeout)
+            name_utf16 = (self.client_name + '\0').encode('utf-16le')
+            self.command_writer.write(self.HEADER.pack(8 + 16 + len(name_utf16), self.PTPIP_INIT_COMMAND_REQUEST)
+                                      + self.client_guid + name_utf16)
+            packet_type, payload = await self._read_packet(self.command_reader)
+            if packet_type != self.PTPIP_INIT_COMMAND_ACK or len(payload) < 4:
+                logger.error(f"[{self.camera_ip}] 명령 채널 초기화 실패: 패킷 타입 {packet_type}")
+                await self.disconnect()
+                return False
+            self.connection_number = struct.unpack_from('<I', payload, 0)[0]
+
+            # 이벤트 채널
+            self.event_reader, self.event_writer = await asyncio.wait_for(
+                asyncio.open_connection(self.camera_ip, self.camera_port), self.timeout)
+            self.event_writer.write(struct.pack('<III', 12, self.PTPIP_INIT_EVENT_REQUEST, self.connection_number))
+            packet_type, _ = await self._read_packet(self.event_reader)
+            if packet_type != self.PTPIP_INIT_EVENT_ACK:
+                logger.error(f"[{self.camera_ip}] 이벤트 채널 초기화 실패: 패킷 타입 {packet_type}")
+                await self.disconnect()
+                return False
+
+            self.event_task = asyncio.ensure_future(self._monitor_events())
+            logger.info(f"[{self.camera_ip}] ✅ 비동기 연결 완료 (연결 번호 {self.connection_number})")
+            return True
+
+        except (asyncio.TimeoutError, OSError, asyncio.IncompleteReadError, ValueError) as e:
+            logger.error(f"[{self.camera_ip}] ❌ 연결 실패: {e or '타임아웃'}")
+            await self.disconnect()
+            return False
+
+    async def disconnect(self):
+        """이벤트 수신 태스크를 정리하고 두 채널을 닫음"""
+        if self.event_task is not None:
+            self.event_task.cancel()
+            try:
+                await self.event_task
+            except asyncio.CancelledError:
+                pass
+            self.event_task = None
+
+        for writer in (self.command_writer, self.event_writer):
+            if writer is not None:
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except OSError:
+                    pass  # 이미 끊긴 연결
+        self.command_writer = self.event_writer = None
+        logger.info(f"[{self.camera_ip}] 연결 해제 완료")
+
+    async def _read_packet(self, reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+        """패킷 하나를 읽어 (패킷 타입, 헤더를 제외한 payload) 반환"""
+        length, packet_type = self.HEADER.unpack(await asyncio.wait_for(reader.readexactly(8), self.timeout))
+        if length < self.HEADER.size:
+            raise ValueError(f"잘못된 PTP/IP 패킷 길이: {length}")
+        payload = await asyncio.wait_for(reader.readexactly(length - self.HEADER.size), self.timeout)
+        return packet_type, payload
+
+    async def _monitor_events(self):
+        """이벤트 채널 수신 태스크 (스레드 대신 이벤트 루프에서 실행)"""
+        try:
+            while True:
+                # 이벤트는 언제 올지 모르므로 타임아웃 없이 대기
+                length, packet_type = self.HEADER.unpack(await self.event_reader.readexactly(8))
+                if length < self.HEADER.size:
+                    logger.error(f"[{self.camera_ip}] 잘못된 이벤트 패킷 길이: {length} - 이벤트 수신 중단")
+                    return
+                payload = await self.event_reader.readexactly(length - self.HEADER.size)
+
+                if packet_type == self.PTPIP_EVENT and len(payload) >= 6:
+                    event = self._parse_event(payload)
+                    logger.info(f"[{self.camera_ip}] 이벤트 수신: {self._get_event_name(event.code)} "
+                                f"(0x{event.code:04x}), 매개변수={[f'0x{p:08x}' for p in event.parameters]}")
+                    self.events.publish(event)
+                    self._event_arrived.set()
+                elif packet_type == self.PTPIP_PROBE_REQUEST:
+                    self.event_writer.write(self.HEADER.pack(8, self.PTPIP_PROBE_RESPONSE))
+                else:
+                    logger.debug(f"[{self.camera_ip}] 알 수 없는 이벤트 패킷 타입: {packet_type}")
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            logger.warning(f"[{self.camera_ip}] 이벤트 채널 종료: {e}")
+
+    async def wait_for_event(self, event_code: Optional[int],
+                             predicate: Optional[Callable[[PTPEvent], bool]] = None,
+                             timeout: Optional[float] = None, since: Optional[int] = None) -> Optional[PTPEvent]:
+        """PTPEventBus.wait_for의 awaitable 버전 (이벤트 루프를 막지 않음)"""
+        since = self.events.sequence if since is None else since
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            event = self.events.wait_for(event_code, predicate, timeout=0, since=since)
+            if event is not None:
+                return event
+            since = self.events.sequence
+            self._event_arrived.clear()
+
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._event_arrived.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+
+    async def _transaction(self, op_code: int, parameters: List[int] = None, data_to_send: Optional[bytes] = None,
+                           transaction_id: Optional[int] = None, data_phase: Optional[int] = None,
+                           write: Optional[Callable[[bytes], object]] = None,
+                           chunk_size: int = 256 * 1024) -> Tuple[int, bytes, List[int]]:
+        """
+        명령 하나를 보내고 CMD_RESPONSE까지 수신
+
+        data_to_send가 있으면 데이터 전송 단계(data_phase=2)를 붙이고, write가 있으면 수신 데이터를
+        chunk_size 이하 조각으로 write에 바로 넘긴다. transaction_id를 주면 그 값으로 고정하고
+        self.transaction_id는 바꾸지 않는다 (0x935a 등 공식앱 패킷 재현용). data_phase를 주면
+        DATA_IN_OPERATIONS로 정하는 값 대신 그 값을 그대로 쓴다. write가 예외를 내면 채널이 어긋나지
+        않도록 남은 데이터와 응답까지 읽어 버린 뒤 실패로 반환한다.
+        Returns: (response_code, data_payload, response_parameters) - 전송 실패 시 응답 코드 0
+        """
+        if parameters is None:
+            parameters = []
+        if self.command_writer is None or self.command_writer.is_closing():
+            logger.error(f"[{self.camera_ip}] ❌ 명령 채널이 닫혀 있음: {self._get_operation_name(op_code)}")
+            return 0, b'', []
+
+        async with self.command_lock:
+            fixed_transaction = transaction_id is not None
+            if not fixed_transaction:
+                transaction_id = self.transaction_id
+
+            if data_to_send is not None:
+                data_phase = 2
+            elif data_phase is None:
+                data_phase = 1 if op_code in self.DATA_IN_OPERATIONS else 0
+            packet = self._build_command_packet(op_code, parameters, data_phase, transaction_id)
+            if data_to_send is not None:
+                packet += struct.pack('<IIIQ', 20, self.PTPIP_START_DATA_PACKET, transaction_id, len(data_to_send))
+                packet += struct.pack('<III', 12 + len(data_to_send), self.PTPIP_END_DATA_PACKET, transaction_id)
+                packet += data_to_send
+
+            logger.debug(f"[{self.camera_ip}] 📤 {self._get_operation_name(op_code)} (0x{op_code:04x}) "
+                         f"트랜잭션ID={transaction_id}")
+
+            data_payload = bytearray()
+            if write is None:
+                write = data_payload.extend
+            write_error: Optional[Exception] = None
+
+            try:
+                self.command_writer.write(packet)
+                await self.command_writer.drain()
+
+                while True:
+                    length, packet_type = self.HEADER.unpack(
+                        await asyncio.wait_for(self.command_reader.readexactly(8), self.timeout))
+                    payload_length = length - self.HEADER.size
+
+                    if payload_length < 0:
+                        raise ValueError(f"잘못된 PTP/IP 패킷 길이: {length}")
+
+                    if packet_type in (self.PTPIP_DATA_PACKET, self.PTPIP_END_DATA_PACKET):
+                        # [트랜잭션ID(4)] [데이터...] - 데이터는 조각 단위로 흘려보냄
+                        packet_transaction = struct.unpack(
+                            '<I', await asyncio.wait_for(self.command_reader.readexactly(4), self.timeout))[0]
+                        stale = self._is_stale_transaction(packet_transaction, transaction_id)
+                        remaining = payload_length - 4
+                        while remaining > 0:
+                            chunk = await asyncio.wait_for(
+                                self.command_reader.readexactly(min(remaining, chunk_size)), self.timeout)
+                            remaining -= len(chunk)
+                            if stale or write_error is not None:
+                                continue  # 이전 트랜잭션의 데이터이거나 기록이 이미 실패 - 읽기만 함
+                            try:
+                                write(chunk)
+                            except Exception as e:
+                                write_error = e
+                        continue
+
+                    payload = await asyncio.wait_for(self.command_reader.readexactly(payload_length), self.timeout)
+                    if packet_type in (self.PTPIP_START_DATA_PACKET, self.PTPIP_CMD_RESPONSE):
+                        # START_DATA: [트랜잭션ID(4)] [크기(8)], CMD_RESPONSE: [응답 코드(2)] [트랜잭션ID(4)] ...
+                        offset = 0 if packet_type == self.PTPIP_START_DATA_PACKET else 2
+                        if self._is_stale_transaction(struct.unpack_from('<I', payload, offset)[0], transaction_id):
+                            continue
+                    if packet_type == self.PTPIP_CMD_RESPONSE:
+                        response_code = struct.unpack_from('<H', payload, 0)[0]
+                        param_count = (len(payload) - 6) // 4
+                        response_parameters = list(struct.unpack_from(f'<{param_count}I', payload, 6))
+                        break
+                    elif packet_type != self.PTPIP_START_DATA_PACKET:
+                        logger.warning(f"[{self.camera_ip}] 예상치 못한 패킷 타입: {packet_type}")
+
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, OSError, ValueError, struct.error) as e:
+                # 패킷 중간에서 멈췄으므로 남은 응답이 다음 명령의 것으로 읽히지 않도록 연결을 끊음
+                logger.error(f"[{self.camera_ip}] ❌ {self._get_operation_name(op_code)} 응답 수신 실패: {str(e) or '타임아웃'}")
+                self._abort_command_channel()
+                return 0, b'', []
+            except asyncio.CancelledError:
+                self._abort_command_channel()
+                raise
+            finally:
+                if not fixed_transaction:
+                    self.transaction_id += 1
+
+            if write_error is not None:
+                logger.error(f"[{self.camera_ip}] ❌ {self._get_operation_name(op_code)} 수신 데이터 기록 실패: {write_error}")
+                return 0, b'', []
+            if response_code != self.PTP_RC_OK:
+                logger.warning(f"[{self.camera_ip}] ❌ {self._get_operation_name(op_code)} 실패: "
+                               f"응답 코드 0x{response_code:04x}")
+            return response_code, bytes(data_payload), response_parameters
+
+    def _is_stale_transaction(self, received: int, expected: int) -> bool:
+        """
+        PTPIPClient._is_stale_transaction과 같은 규칙: 앞선 트랜잭션의 패킷이면 True (읽어 버림),
+        더 뒤의 트랜잭션이면 채널이 어긋난 것이므로 연결을 끊고 ConnectionError
+        """
+        if received == expected:
+            return False
+        if received < expected:
+            logger.warning(f"[{self.camera_ip}] ⚠️ 이전 트랜잭션 {received}의 패킷을 버림 (현재 {expected})")
+            return True
+        self._abort_command_channel()
+        raise ConnectionError(f"명령 채널 동기화 깨짐: 트랜잭션 {expected} 대신 {received} 수신")
+
+    def _abort_command_channel(self):
+        """명령 채널이 어긋났을 때 두 채널을 끊어 이 클라이언트로 더 명령을 보내지 않게 함"""
+        if self.command_writer is None or self.command_writer.is_closing():
+            return
+        logger.error(f"[{self.camera_ip}] ❌ 명령 채널을 쓸 수 없어 연결을 끊음")
+        for writer in (self.command_writer, self.event_writer):
+            if writer is not None and not writer.is_closing():
+                writer.transport.abort()
+
+    async def send_command(self, op_code: int, parameters: List[int] = None) -> Tuple[int, bytes]:
+        """PTPIPClient._send_ptp_command와 같은 (응답 코드, 데이터) 반환"""
+        response_code, data, _ = await self._transaction(op_code, parameters)
+        return response_code, data
+
+    async def send_command_with_data(self, op_code: int, parameters: List[int], data_to_send: bytes) -> Tuple[int, bytes]:
+        """데이터 전송 단계가 있는 명령 (SetDevicePropValue 등)"""
+        response_code, data, _ = await self._transaction(op_code, parameters, data_to_send=data_to_send)
+        return response_code, data
+
+    async def get_device_info(self) -> Optional[PTPDeviceInfo]:
+        """장치 정보 요청 및 파싱"""
+        response_code, data = await self.send_command(self.PTP_OC_GetDeviceInfo)
+        if response_code != self.PTP_RC_OK or not data:
+            return None
+        self.device_info = self._parse_device_info(data)
+        return self.device_info
+
+    async def open_session(self) -> bool:
+        """PTP 세션 열기 (공식앱과 같이 트랜잭션 ID 0 사용, 이후 1부터 시작)"""
+        self.transaction_id = 0
+        response_code, _ = await self.send_command(self.PTP_OC_OpenSession, [self.session_id])
+        self.transaction_id = 1
+        return response_code == self.PTP_RC_OK
+
+    async def close_session(self) -> bool:
+        """PTP 세션 닫기"""
+        response_code, _ = await self.send_command(self.PTP_OC_CloseSession)
+        return response_code == self.PTP_RC_OK
+
+    async def request_connection_approval(self) -> bool:
+        """0x952b → 0x935a 연결 승인 요청 (PTPIPClient와 동일한 트랜잭션 ID 1, 2 고정)"""
+        response_code, _, _ = await self._transaction(0x952b, transaction_id=1)
+        self.transaction_id += 1
+        if response_code != self.PTP_RC_OK:
+            logger.error(f"[{self.camera_ip}] 0x952b 실패")
+            return False
+
+        # PTPIPClient._send_ptp_command_935a와 같은 바이트 (data_phase=1): 카메라는 Frame 45 형태만 승인함
+        packet = self._build_command_packet(self.NIKON_OC_PIN_AUTH, [0x2001], 1, 2)
+        if packet != self.FRAME_45_PIN_AUTH_PACKET:
+            logger.warning(f"[{self.camera_ip}] ⚠️ 0x935a 패킷이 Frame 45와 다름: {packet.hex()}")
+
+        response_code, _, _ = await self._transaction(self.NIKON_OC_PIN_AUTH, [0x2001], transaction_id=2,
+                                                      data_phase=1)
+        if response_code != self.PTP_RC_OK:
+            logger.error(f"[{self.camera_ip}] 0x935a 승인 실패")
+            return False
+        return True
+
+    async def get_storage_ids(self) -> list:
+        response_code, data = await self.send_command(self.PTP_OC_GetStorageIDs)
+        return self._parse_storage_ids(data) if response_code == self.PTP_RC_OK else []
+
+    async def get_object_handles(self, storage_id: int = 0xFFFFFFFF, object_format: int = 0, parent: int = 0) -> list:
+        response_code, data = await self.send_command(self.PTP_OC_GetObjectHandles, [storage_id, object_format, parent])
+        return self._parse_object_handles(data).tolist() if response_code == self.PTP_RC_OK else []
+
+    async def get_object_info(self, handle: int) -> Optional[dict]:
+        response_code, data = await self.send_command(self.PTP_OC_GetObjectInfo, [handle])
+        if response_code != self.PTP_RC_OK or not data:
+            return None
+        return self._parse_object_info(data, handle)
+
+    async def download_object(self, handle: int, sink: Union[str, BinaryIO],
+                              chunk_size: int = 256 * 1024) -> Optional[int]:
+        """GetObject 데이터를 sink(경로 또는 파일 객체)로 스트리밍하고 받은 바이트 수 반환 (실패 시 None)"""
+        return await self._receive_to_sink(self.PTP_OC_GetObject, [handle], sink, chunk_size)
+
+    async def get_partial_object(self, handle: int, offset: int, max_bytes: int, sink: Union[str, BinaryIO],
+                                 chunk_size: int = 256 * 1024) -> Optional[int]:
+        """GetPartialObject로 offset부터 최대 max_bytes를 sink로 받음"""
+        return await self._receive_to_sink(self.PTP_OC_GetPartialObject, [handle, offset, max_bytes], sink, chunk_size)
+
+    async def _receive_to_sink(self, op_code: int, parameters: List[int], sink: Union[str, BinaryIO],
+                               chunk_size: int) -> Optional[int]:
+        path = sink if isinstance(sink, str) else None
+        output = open(path, 'wb') if path else sink
+        received = 0
+
+        def write(chunk: bytes):
+            nonlocal received
+            output.write(chunk)
+            received += len(chunk)
+
+        try:
+            response_code, _, _ = await self._transaction(op_code, parameters, write=write, chunk_size=chunk_size)
+        finally:
+            if path:
+                output.close()
+
+        if response_code != self.PTP_RC_OK:
+            if path and os.path.exists(path):
+                os.remove(path)  # 불완전한 파일은 남기지 않음
+            return None
+        return received
+
+
+async def wait_for_authenticated_async_client(camera_ip: str, camera_port: int = 15740, model: str = "",
+                                              timeout: float = 15.0, initial_delay: float = 0.1,
+                                              max_delay: float = 2.0) -> Optional[AsyncPTPIPClient]:
+    """nikon_ptp_client.wait_for_authenticated_client의 비동기 버전 (재시도 간격 동안 이벤트 루프를 막지 않음)"""
+    start_time = time.monotonic()
+    deadline = start_time + timeout
+    delay = initial_delay
+    attempt = 0
+
+    while True:
+        await asyncio.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+        attempt += 1
+        client = AsyncPTPIPClient(camera_ip, camera_port)
+        if await client.connect():
+            device_info = await client.get_device_info()
+            if device_info and device_info.get('supports_944c'):
+                elapsed = time.monotonic() - start_time
+                time_to_ready_histogram.record(device_info.get('model') or model, elapsed)
+                logger.info(f"[{camera_ip}] ✅ 카메라 준비 완료: {elapsed:.2f}초 ({attempt}번째 시도)")
+                return client
+            await client.disconnect()
+
+        if time.monotonic() >= deadline:
+            logger.error(f"[{camera_ip}] ❌ 카메라 준비 대기 시간 초과 ({timeout:.0f}초, {attempt}번 시도)")
+            return None
+        delay = min(delay * 2, max_delay)
+
+
+async def open_authenticated_async_client(camera_ip: str, camera_port: int = 15740) -> Optional[AsyncPTPIPClient]:
+    """
+    nikon_authenticator.open_authenticated_client의 비동기 버전
+
+    Phase 1(연결 승인 요청) 후 카메라가 준비되는 즉시 Phase 2에서 인증된 세션을 연 클라이언트를 반환한다.
+    대기 중에 이벤트 루프를 막지 않으므로 여러 카메라를 asyncio.gather로 동시에 인증할 수 있다.
+    """
+    client = AsyncPTPIPClient(camera_ip, camera_port)
+    try:
+        if not await client.connect():
+            return None
+        device_info = await client.get_device_info()
+        if not device_info or not await client.open_session():
+            logger.error(f"[{camera_ip}] Phase 1 세션 열기 실패")
+            return None
+        if not await client.request_connection_approval():
+            return None
+        logger.info(f"[{camera_ip}] ✅ Phase 1 완료 - 연결 승인 성공")
+    finally:
+        await client.disconnect()
+
+    auth_client = await wait_for_authenticated_async_client(camera_ip, camera_port, model=device_info.get('model', ''))
+    if auth_client is None:
+        return None
+    if not await auth_client.open_session():
+        logger.error(f"[{camera_ip}] 인증된 세션 열기 실패")
+        await auth_client.disconnect()
+        return None
+
+    logger.info(f"[{camera_ip}] ✅ 인증된 세션 확인")
+    return auth_client
+
+
+async def _authenticate_all(camera_ips: List[str]) -> int:
+    """모든 카메라를 하나의 이벤트 루프에서 동시에 인증하고 성공한 대수를 반환"""
+    clients = await asyncio.gather(*(open_authenticated_async_client(ip) for ip in camera_ips))
+    for ip, client in zip(camera_ips, clients):
+        if client is None:
+            print(f"❌ {ip}: 인증 실패")
+            continue
+        info = client.device_info
+        print(f"✅ {ip}: {info.get('model')} (S/N {info.get('serial_number')})")
+        await client.close_session()
+        await client.disconnect()
+    return sum(client is not None for client in clients)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("사용법: python3 async_ptp_client.py <카메라_IP> [카메라_IP ...]")
+        print("예시: python3 async_ptp_client.py 192.168.1.11 192.168.1.12 192.168.1.13")
+        sys.exit(1)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    camera_ips = sys.argv[1:]
+    authenticated = asyncio.run(_authenticate_all(camera_ips))
+    print(f"인증 완료: {authenticated}/{len(camera_ips)}대")
+    sys.exit(0 if authenticated == len(camera_ips) else 1)
+
+
+if __name__ == "__main__":
+    main()
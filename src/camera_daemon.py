@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Camera Daemon
+Resident process that keeps authenticated PTP/IP connections and serves commands over a Unix socket
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import threading
+import socketserver
+from typing import Optional, Dict, TYPE_CHECKING
+
+# 카메라 관련 모듈은 데몬 쪽에서만 가져온다 (request()만 쓰는 CLI가 PTP 클라이언트를 불러오지 않도록)
+if TYPE_CHECKING:
+    from nikon_ptp_client import PTPIPClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = os.path.join(os.path.expanduser("~"), ".camcon", "camerad.sock")
+
+
+class _DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """연결 하나에서 JSON 한 줄 요청 → JSON 한 줄 응답을 반복"""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                response = self.server.camera_daemon.dispatch(request)
+            except ValueError as e:
+                response = {'ok': False, 'error': f"잘못된 요청: {e}"}
+            self.wfile.write((json.dumps(response, ensure_ascii=False) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+
+class _DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class CameraDaemon:
+    """
+    인증된 PTPIPClient 연결을 카메라별로 유지하면서 Unix 도메인 소켓으로 명령을 받는 상주 프로세스
+
+    요청: {"command": "download", "camera_ip": "192.168.1.11", "args": {"dest_dir": "/abs/path"}}
+    응답: {"ok": true, "result": ...} 또는 {"ok": false, "error": "..."}
+    같은 카메라에 대한 명령은 카메라별 잠금으로 순서대로, 다른 카메라끼리는 동시에 처리된다.
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH):
+        self.socket_path = socket_path
+        self.clients: Dict[str, 'PTPIPClient'] = {}
+        self.camera_locks: Dict[str, threading.Lock] = {}
+        self.lock = threading.Lock()  # clients / camera_locks 보호
+        self.server: Optional[_DaemonServer] = None
+        self.started_at = time.time()
+
+    def _camera_lock(self, camera_ip: str) -> threading.Lock:
+        with self.lock:
+            return self.camera_locks.setdefault(camera_ip, threading.Lock())
+
+    def _client(self, camera_ip: str) -> 'PTPIPClient':
+        """살아 있는 인증된 연결을 반환 (없거나 끊겼으면 다시 인증)"""
+        from nikon_authenticator import open_authenticated_client
+
+        client = self.clients.get(camera_ip)
+        if client is not None and client.event_thread and client.event_thread.is_alive():
+            return client
+
+        if client is not None:
+            logger.warning(f"[{camera_ip}] 연결이 끊어짐 - 재인증")
+            client.disconnect()
+
+        client = open_authenticated_client(camera_ip)
+        if client is None:
+            raise ConnectionError("니콘 인증 실패")
+        with self.lock:
+            self.clients[camera_ip] = client
+        return client
+
+    def _drop_client(self, camera_ip: str):
+        with self.lock:
+            client = self.clients.pop(camera_ip, None)
+        if client is not None:
+            try:
+                client.close_session()
+            finally:
+                client.disconnect()
+
+    def dispatch(self, request: dict) -> dict:
+        """요청 하나를 처리하고 응답 dict를 반환"""
+        command = request.get('command', '')
+        camera_ip = request.get('camera_ip')
+        args = request.get('args') or {}
+        handler = getattr(self, f"_cmd_{command}", None)
+        if handler is None:
+            return {'ok': False, 'error': f"알 수 없는 명령: {command}"}
+
+        start_time = time.monotonic()
+        try:
+            if camera_ip is None:
+                result = handler(**args)
+            else:
+                with self._camera_lock(camera_ip):
+                    result = handler(camera_ip, **args)
+        except Exception as e:
+            logger.error(f"❌ 명령 실패: {command} {camera_ip or ''} ({e})")
+            if camera_ip is not None and isinstance(e, (ConnectionError, OSError)):
+                self._drop_client(camera_ip)
+            return {'ok': False, 'error': str(e)}
+
+        logger.info(f"명령 처리: {command} {camera_ip or ''} ({(time.monotonic() - start_time) * 1000:.0f}ms)")
+        return {'ok': True, 'result': result}
+
+    # ---- 데몬 명령 ----
+
+    def _cmd_ping(self) -> dict:
+        return {'pid': os.getpid(), 'uptime': time.time() - self.started_at}
+
+    def _cmd_status(self) -> list:
+        with self.lock:
+            clients = list(self.clients.items())
+        return [{
+            'camera_ip': camera_ip,
+            'model': client.device_info.get('model', '') if client.device_info else '',
+            'serial_number': client.device_info.get('serial_number', '') if client.device_info else '',
+            'connected': bool(client.event_thread and client.event_thread.is_alive())
+        } for camera_ip, client in clients]
+
+    def _cmd_shutdown(self) -> bool:
+        # 응답을 보낸 뒤 종료되도록 별도 스레드에서 서버 중지
+        threading.Thread(target=self.server.shutdown, daemon=True).start()
+        return True
+
+    def _cmd_connect(self, camera_ip: str) -> dict:
+        client = self._client(camera_ip)
+        return {'model': client.device_info.get('model', ''),
+                'serial_number': client.device_info.get('serial_number', '')}
+
+    def _cmd_disconnect(self, camera_ip: str) -> bool:
+        self._drop_client(camera_ip)
+        return True
+
+    def _cmd_list(self, camera_ip: str) -> list:
+        return [{'handle': info.handle, 'filename': info.filename,
+                 'size': info.compressed_size, 'capture_date': info.capture_date}
+                for info in self._client(camera_ip).list_objects() if not info.is_folder]
+
+    def _cmd_config(self, camera_ip: str) -> list:
+        return self._client(camera_ip).read_all_properties()
+
+    def _cmd_download(self, camera_ip: str, dest_dir: str) -> dict:
+        return self._client(camera_ip).download_all(dest_dir)
+
+    def _cmd_sync(self, camera_ip: str, dest_dir: str) -> dict:
+        from object_index import ObjectIndex, INDEX_FILENAME
+
+        client = self._client(camera_ip)
+        os.makedirs(dest_dir, exist_ok=True)
+        index = ObjectIndex(os.path.join(dest_dir, INDEX_FILENAME))
+        try:
+            summary = client.sync(dest_dir, index)
+        finally:
+            index.close()
+        if summary is None:
+            raise RuntimeError("동기화 실패")
+        return summary
+
+    def _cmd_capture(self, camera_ip: str, dest_dir: Optional[str] = None) -> dict:
+        result = self._client(camera_ip).capture(dest_dir)
+        if result is None:
+            raise RuntimeError("촬영 실패")
+        return result
+
+    # ---- 서버 수명 ----
+
+    def serve_forever(self):
+        """소켓을 열고 shutdown 명령이나 Ctrl+C까지 요청 처리"""
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+        if os.path.exists(self.socket_path):
+            if request('ping', socket_path=self.socket_path) is not None:
+                raise RuntimeError(f"데몬이 이미 실행 중입니다: {self.socket_path}")
+            os.remove(self.socket_path)  # 이전 실행이 남긴 소켓 파일
+
+        self.server = _DaemonServer(self.socket_path, _DaemonRequestHandler)
+        self.server.camera_daemon = self
+        os.chmod(self.socket_path, 0o600)
+        logger.info(f"🚀 카메라 데몬 시작: {self.socket_path} (PID {os.getpid()})")
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("사용자가 데몬 종료를 요청했습니다")
+        finally:
+            self.server.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            for camera_ip in list(self.clients):
+                self._drop_client(camera_ip)
+            logger.info("카메라 데몬 종료")
+
+
+def request(command: str, camera_ip: Optional[str] = None, socket_path: str = DEFAULT_SOCKET_PATH,
+            timeout: Optional[float] = None, **args) -> Optional[dict]:
+    """
+    데몬에 명령 하나를 보내고 응답 dict를 반환
+
+    데몬이 실행 중이 아니면 None (호출 측은 직접 실행으로 대체). timeout은 응답 대기 시간이며
+    다운로드처럼 오래 걸리는 명령을 위해 기본값은 무제한이다.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(2)
+        sock.connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError, socket.timeout):
+        sock.close()
+        return None
+
+    try:
+        sock.settimeout(timeout)
+        message = {'command': command, 'camera_ip': camera_ip, 'args': args}
+        sock.sendall((json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8'))
+        with sock.makefile('rb') as reader:
+            line = reader.readline()
+        if not line:
+            return {'ok': False, 'error': "데몬이 응답 없이 연결을 닫았습니다"}
+        return json.loads(line)
+    finally:
+        sock.close()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    socket_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SOCKET_PATH
+    try:
+        CameraDaemon(socket_path).serve_forever()
+    except RuntimeError as e:
+        logger.error(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Camera Fleet Manager
+Brings a rig of Nikon cameras online concurrently and tracks per-camera health
+"""
+
+import time
+import socket
+import logging
+import ipaddress
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Callable, Any
+
+from nikon_authenticator import open_authenticated_client
+from nikon_ptp_client import PTPIPClient, PTPStorageInfo
+
+logger = logging.getLogger(__name__)
+
+# 카메라 상태
+STATE_PENDING = "pending"  # 아직 연결 시도 전
+STATE_AUTHENTICATING = "authenticating"  # 2단계 인증 진행 중
+STATE_ONLINE = "online"  # 인증된 세션 유지 중
+STATE_FAILED = "failed"  # 인증 실패
+STATE_OFFLINE = "offline"  # 연결이 끊겼거나 응답 없음
+
+
+class FleetCamera:
+    """플릿에 속한 카메라 한 대의 상태와 통계"""
+
+    def __init__(self, camera_ip: str):
+        self.camera_ip = camera_ip
+        self.state = STATE_PENDING
+        self.client: Optional[PTPIPClient] = None
+        self.model = ""
+        self.serial_number = ""
+        self.auth_seconds: Optional[float] = None  # 인증 시작부터 세션이 열릴 때까지 걸린 시간
+        self.last_latency: Optional[float] = None  # 마지막 명령 왕복 시간 (초)
+        self.command_count = 0
+        self.error_count = 0
+        self.last_error = ""
+        self.lock = threading.Lock()  # 같은 카메라에 대한 작업 직렬화
+
+    def record(self, latency: float, error: Optional[str] = None):
+        """명령 하나의 결과를 통계에 반영"""
+        self.last_latency = latency
+        self.command_count += 1
+        if error is not None:
+            self.error_count += 1
+            self.last_error = error
+
+    def status(self) -> dict:
+        return {
+            'camera_ip': self.camera_ip,
+            'state': self.state,
+            'model': self.model,
+            'serial_number': self.serial_number,
+            'auth_seconds': self.auth_seconds,
+            'last_latency': self.last_latency,
+            'command_count': self.command_count,
+            'error_count': self.error_count,
+            'last_error': self.last_error
+        }
+
+
+class CameraFleet:
+    """
+    여러 대의 니콘 카메라를 동시에 인증하고 인증된 PTPIPClient를 유지하는 플릿 관리자
+
+    인증은 카메라마다 기존 2단계 흐름(0x952b → 0x935a → 재연결)을 그대로 쓰되 스레드 풀에서 병렬로 실행하므로
+    전체 소요 시간이 카메라 수에 비례하지 않고 가장 느린 카메라 한 대 수준이 된다.
+    """
+
+    def __init__(self, camera_ips: List[str], max_workers: int = 16, camera_port: int = 15740):
+        self.camera_port = camera_port
+        self.max_workers = max_workers
+        self.cameras: Dict[str, FleetCamera] = {ip: FleetCamera(ip) for ip in camera_ips}
+
+    @staticmethod
+    def expand_targets(targets: List[str], camera_port: int = 15740, probe_timeout: float = 0.5) -> List[str]:
+        """
+        IP 주소와 CIDR(예: 192.168.1.0/24)을 카메라 IP 목록으로 펼침
+
+        CIDR 범위는 PTP/IP 포트가 열려 있는 호스트만 남긴다 (빈 주소마다 10초 연결 타임아웃을 기다리지 않도록).
+        """
+        camera_ips = []
+        for target in targets:
+            if '/' not in target:
+                camera_ips.append(target)
+                continue
+
+            hosts = [str(host) for host in ipaddress.ip_network(target, strict=False).hosts()]
+            logger.info(f"🔍 {target}: {len(hosts)}개 주소에서 PTP/IP 포트 확인 중...")
+            with ThreadPoolExecutor(max_workers=64) as executor:
+                reachable = executor.map(lambda ip: CameraFleet._port_open(ip, camera_port, probe_timeout), hosts)
+                found = [ip for ip, is_open in zip(hosts, reachable) if is_open]
+            logger.info(f"🔍 {target}: 카메라 후보 {len(found)}대 발견")
+            camera_ips.extend(found)
+
+        # 순서를 유지하면서 중복 제거
+        return list(dict.fromkeys(camera_ips))
+
+    @staticmethod
+    def _port_open(camera_ip: str, camera_port: int, timeout: float) -> bool:
+        try:
+            with socket.create_connection((camera_ip, camera_port), timeout=timeout):
+                return True
+        except OSError:
+            return False
+
+    def connect_all(self) -> int:
+        """아직 온라인이 아닌 모든 카메라를 병렬로 인증하고 온라인 대수를 반환"""
+        targets = [camera for camera in self.cameras.values() if camera.state != STATE_ONLINE]
+        logger.info(f"🚀 플릿 인증 시작: {len(targets)}대 (동시 {self.max_workers}대)")
+        start_time = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fleet-auth') as executor:
+            list(executor.map(self._bring_online, targets))
+
+        online = len(self.online_cameras())
+        logger.info(f"🎉 플릿 인증 완료: {online}/{len(self.cameras)}대 온라인 "
+                    f"({time.monotonic() - start_time:.1f}초)")
+        return online
+
+    def _bring_online(self, camera: FleetCamera):
+        """카메라 한 대 인증 (플릿 인증 스레드에서 실행)"""
+        with camera.lock:
+            camera.state = STATE_AUTHENTICATING
+            start_time = time.monotonic()
+            try:
+                client = open_authenticated_client(camera.camera_ip, self.camera_port)
+            except Exception as e:
+                client = None
+                camera.last_error = str(e)
+
+            elapsed = time.monotonic() - start_time
+            if client is None:
+                camera.state = STATE_FAILED
+                camera.error_count += 1
+                camera.last_error = camera.last_error or "인증 실패"
+                logger.error(f"❌ [{camera.camera_ip}] 인증 실패 ({elapsed:.1f}초)")
+                return
+
+            camera.client = client
+            camera.auth_seconds = elapsed
+            camera.model = client.device_info.get('model', '')
+            camera.serial_number = client.device_info.get('serial_number', '')
+            camera.state = STATE_ONLINE
+            logger.info(f"✅ [{camera.camera_ip}] {camera.model} (S/N {camera.serial_number}) 온라인 ({elapsed:.1f}초)")
+
+    def online_cameras(self) -> List[FleetCamera]:
+        return [camera for camera in self.cameras.values() if camera.state == STATE_ONLINE]
+
+    def run_on_all(self, operation: Callable[[PTPIPClient], Any]) -> Dict[str, Any]:
+        """
+        온라인 카메라 모두에 operation(client)을 병렬로 실행하고 {IP: 결과}를 반환
+
+        실행 시간은 카메라별 지연 시간으로, 예외는 오류 횟수로 기록된다 (예외가 난 카메라의 결과는 None).
+        """
+        def run(camera: FleetCamera):
+            with camera.lock:
+                start_time = time.monotonic()
+                try:
+                    result = operation(camera.client)
+                    camera.record(time.monotonic() - start_time)
+                    return result
+                except Exception as e:
+                    camera.record(time.monotonic() - start_time, str(e))
+                    logger.error(f"❌ [{camera.camera_ip}] 작업 실패: {e}")
+                    return None
+
+        cameras = self.online_cameras()
+        if not cameras:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(cameras)),
+                                thread_name_prefix='fleet-op') as executor:
+            results = executor.map(run, cameras)
+            return {camera.camera_ip: result for camera, result in zip(cameras, results)}
+
+    def trigger_all(self, barrier_timeout: float = 5.0) -> Dict[str, dict]:
+        """
+        온라인 카메라 모두에서 최대한 동시에 셔터를 누르고 카메라별 전송/응답 편차를 반환
+
+        카메라마다 스레드 하나가 InitiateCapture 패킷을 미리 만들어 둔 채 barrier에서 기다리다가 마지막 스레드가
+        도착하면 동시에 전송한다. 결과는 {IP: {response_code, send_offset, ack_latency, ack_skew}}이며 시간은 초 단위:
+        send_offset은 barrier 해제부터 전송까지, ack_latency는 전송부터 응답까지, ack_skew는 가장 빠른 응답 대비 지연.
+        barrier_timeout 안에 모든 카메라가 준비되지 않으면 (다른 작업이 잠금을 잡고 있는 등) 아무 카메라도 촬영하지 않는다.
+        """
+        cameras = self.online_cameras()
+        if not cameras:
+            return {}
+
+        released_at = []
+        barrier = threading.Barrier(len(cameras), action=lambda: released_at.append(time.perf_counter()),
+                                    timeout=barrier_timeout)
+
+        def fire(camera: FleetCamera) -> Optional[tuple]:
+            with camera.lock:
+                try:
+                    result = camera.client.trigger_capture_staged(barrier)
+                except threading.BrokenBarrierError:
+                    logger.error(f"❌ [{camera.camera_ip}] 동시 촬영 준비 시간 초과")
+                    return None
+                except (ConnectionError, OSError) as e:
+                    barrier.abort()
+                    camera.record(0.0, str(e))
+                    logger.error(f"❌ [{camera.camera_ip}] 촬영 명령 실패: {e}")
+                    return None
+                camera.record(result[2] - result[1],
+                              None if result[0] == PTPIPClient.PTP_RC_OK else f"응답 코드 0x{result[0]:04x}")
+                return result
+
+        # barrier에 모든 카메라가 동시에 모여야 하므로 카메라 수만큼 스레드 사용
+        logger.info(f"📷 동시 촬영: {len(cameras)}대")
+        with ThreadPoolExecutor(max_workers=len(cameras), thread_name_prefix='fleet-trigger') as executor:
+            results = dict(zip((camera.camera_ip for camera in cameras), executor.map(fire, cameras)))
+
+        fired = {camera_ip: result for camera_ip, result in results.items() if result is not None}
+        if not fired or not released_at:
+            return {}
+
+        first_ack = min(acked_at for _, _, acked_at in fired.values())
+        report = {camera_ip: {
+            'response_code': response_code,
+            'send_offset': sent_at - released_at[0],
+            'ack_latency': acked_at - sent_at,
+            'ack_skew': acked_at - first_ack
+        } for camera_ip, (response_code, sent_at, acked_at) in fired.items()}
+
+        send_spread = max(sent_at for _, sent_at, _ in fired.values()) - min(sent_at for _, sent_at, _ in fired.values())
+        logger.info(f"📷 동시 촬영 완료: {len(fired)}/{len(cameras)}대, 전송 편차 {send_spread * 1000:.1f}ms, "
+                    f"응답 편차 {max(r['ack_skew'] for r in report.values()) * 1000:.1f}ms")
+        return report
+
+    def storage_report(self, low_space_ratio: float = 0.05, low_space_images: int = 20) -> Dict[str, dict]:
+        """
+        온라인 카메라별 저장소 상태와 촬영에 쓸 카드, 공간 부족 여부
+
+        저장소 정보는 클라이언트 캐시(StorageInfoChanged 등 이벤트로만 무효화)에서 읽으므로 반복 호출해도
+        바뀐 카드가 없으면 카메라와 통신하지 않는다. 남은 공간이 low_space_ratio 미만이거나 남은 촬영 매수가
+        low_space_images 미만인 카드만 남은 카메라는 low_space로 표시하고 경고를 남긴다.
+        Returns: {IP: {'storages': [dict], 'best_storage': 저장소 ID 또는 None, 'low_space': bool}}
+        """
+        def is_low(storage: PTPStorageInfo) -> bool:
+            if storage.free_images != PTPStorageInfo.FREE_IMAGES_UNKNOWN and storage.free_images < low_space_images:
+                return True
+            return storage.free_ratio < low_space_ratio
+
+        def inspect(client: PTPIPClient) -> dict:
+            storages = client.get_storages()
+            usable = [storage for storage in storages if not is_low(storage)]
+            best = max(usable or storages, key=lambda storage: storage.free_bytes, default=None)
+            return {'storages': [storage.to_dict() for storage in storages],
+                    'best_storage': best.storage_id if best is not None else None,
+                    'low_space': not usable}
+
+        report = {camera_ip: result for camera_ip, result in self.run_on_all(inspect).items() if result is not None}
+        for camera_ip, result in report.items():
+            if result['low_space']:
+                logger.warning(f"⚠️ [{camera_ip}] 저장 공간 부족: " + ", ".join(
+                    f"0x{storage['storage_id']:08x} {storage['free_ratio']:.0%}" for storage in result['storages']))
+        return report
+
+    def apply_profile(self, profile: dict, verify_timeout: float = 2.0) -> Dict[str, dict]:
+        """
+        온라인 카메라 모두에 같은 촬영 프리셋을 동시에 적용 (카메라마다 바뀌는 속성만 전송)
+
+        Returns: {IP: PTPIPClient.apply_profile 결과}
+        """
+        logger.info(f"⚙️ 플릿 프로필 적용: {len(profile)}개 속성")
+        results = self.run_on_all(lambda client: client.apply_profile(profile, verify_timeout))
+        return {camera_ip: result for camera_ip, result in results.items() if result is not None}
+
+    def check_health(self) -> Dict[str, str]:
+        """
+        온라인 카메라에 GetDeviceInfo를 보내 응답 지연을 측정하고, 응답이 없거나 이벤트 채널이 끊긴
+        카메라는 offline으로 표시한다. {IP: 상태}를 반환.
+
+        확인과 상태 변경은 카메라 잠금 안에서 한 번에 하므로 그 사이 다른 스레드가 다시 연결한 클라이언트를
+        끊지 않는다. 기존 클라이언트는 교체가 끝난 뒤 잠금 밖에서 연결 해제한다.
+        """
+        def check(camera: FleetCamera):
+            with camera.lock:
+                client = camera.client
+                if camera.state != STATE_ONLINE or client is None:
+                    return
+                start_time = time.monotonic()
+                try:
+                    if not (client.event_thread and client.event_thread.is_alive()):
+                        raise ConnectionError("이벤트 채널 끊김")
+                    response_code, _ = client._send_ptp_command(client.PTP_OC_GetDeviceInfo)
+                    if response_code != client.PTP_RC_OK:
+                        raise ConnectionError(f"GetDeviceInfo 응답 코드 0x{response_code:04x}")
+                    camera.record(time.monotonic() - start_time)
+                    return
+                except Exception as e:
+                    camera.record(time.monotonic() - start_time, str(e))
+                    logger.warning(f"⚠️ [{camera.camera_ip}] 응답 없음 - offline 처리: {e}")
+                    camera.client = None
+                    camera.state = STATE_OFFLINE
+            client.disconnect()
+
+        cameras = self.online_cameras()
+        if cameras:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(cameras)),
+                                    thread_name_prefix='fleet-health') as executor:
+                list(executor.map(check, cameras))
+        return {camera_ip: camera.state for camera_ip, camera in self.cameras.items()}
+
+    def status(self) -> List[dict]:
+        """카메라별 상태, 지연 시간, 오류 횟수"""
+        return [camera.status() for camera in self.cameras.values()]
+
+    def disconnect_all(self):
+        """모든 온라인 카메라의 세션을 닫고 연결 해제"""
+        def close(camera: FleetCamera):
+            with camera.lock:
+                if camera.client is None:
+                    return
+                try:
+                    camera.client.close_session()
+                finally:
+                    camera.client.disconnect()
+                    camera.client = None
+                    camera.state = STATE_OFFLINE
+
+        cameras = self.online_cameras()
+        if cameras:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(cameras))) as executor:
+                list(executor.map(close, cameras))
+        logger.info("플릿 연결 해제 완료")
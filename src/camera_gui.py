@@ -16,7 +16,8 @@ import sys
 from datetime import datetime
 
 # 기존 모듈 import
-from nikon_ptp_client import PTPIPClient
+from nikon_authenticator import open_authenticated_client
+from thumbnail_cache import get_thumbnail_cache, prefetch_thumbnails
 
 
 class CameraGUI:
@@ -95,6 +96,8 @@ class CameraGUI:
                    command=self.open_work_folder, width=15).grid(row=2, column=0, pady=2)
         ttk.Button(advanced_frame, text=" 로그 지우기",
                    command=self.clear_log, width=15).grid(row=3, column=0, pady=2)
+        ttk.Button(advanced_frame, text=" 자동 수집",
+                   command=self.toggle_auto_ingest, width=15).grid(row=4, column=0, pady=2)
 
         # 로그 섹션
         log_frame = ttk.LabelFrame(main_frame, text="작업 로그", padding="10")
@@ -184,69 +187,22 @@ class CameraGUI:
             self.nikon_client = None
             self.nikon_authenticated = False
 
+        # 인증기와 같은 2단계 흐름 (Phase 2는 고정 대기 없이 카메라가 준비되는 즉시 재연결)
         try:
-            # Phase 1: 승인 요청
-            temp_client = PTPIPClient(camera_ip)
-
-            if not temp_client.connect():
-                self.log(" 연결 실패")
-                return False
-
-            device_info = temp_client.get_device_info()
-            if not device_info:
-                self.log(" 장치 정보 가져오기 실패")
-                return False
-
-            if not temp_client.open_session():
-                self.log(" 세션 열기 실패")
-                return False
-
-            response_code, _ = temp_client._send_ptp_command(0x952b)
-            if response_code != temp_client.PTP_RC_OK:
-                self.log(" 0x952b 실패")
-                return False
-
-            response_code, _ = temp_client._send_ptp_command_935a()
-            if response_code != temp_client.PTP_RC_OK:
-                self.log(" 0x935a 승인 실패")
-                return False
-
-            self.log(" Phase 1 완료")
-            temp_client.disconnect()
-
-            # Phase 2: 인증된 연결 설정 및 유지
-            import time
-            time.sleep(3)
-
-            self.nikon_client = PTPIPClient(camera_ip)
-
-            if not self.nikon_client.connect():
-                self.log(" 인증된 연결 실패")
-                return False
-
-            device_info = self.nikon_client.get_device_info()
-            if not device_info:
-                self.log(" 인증된 장치 정보 실패")
-                return False
-
-            if device_info.get('supports_944c'):
-                self.log(" 니콘 인증 완료!")
-                if self.nikon_client.open_session():
-                    self.log(" 인증된 세션 열기 성공")
-                    # 연결을 유지한 채로 두기
-                    self.nikon_authenticated = True
-                    return True
-                else:
-                    self.log(" 인증된 세션 열기 실패")
-                    return False
-            else:
-                self.log(" 인증 실패 - 고급 기능 비활성화")
-                return False
-
+            self.nikon_client = open_authenticated_client(camera_ip)
         except Exception as e:
             self.log(f" 인증 중 오류: {e}")
             return False
 
+        if self.nikon_client is None:
+            self.log(" 니콘 인증 실패")
+            return False
+
+        self.log(" 니콘 인증 완료! 인증된 세션 열기 성공")
+        # 연결을 유지한 채로 두기
+        self.nikon_authenticated = True
+        return True
+
     def run_gphoto2(self, args):
         """gphoto2 명령 실행"""
         try:
@@ -347,6 +303,21 @@ class CameraGUI:
                         return
 
             self.log(" 사진 촬영 시작...")
+
+            # 니콘 카메라는 유지 중인 인증 세션에서 직접 촬영하고 바로 다운로드 (gphoto2/재연결 없음)
+            if self.camera_type.get() == "니콘 카메라":
+                # 자동 수집 중이면 수집 스레드가 내려받으므로 촬영만 수행
+                auto_ingest = self.nikon_client.ingest_queue is not None
+                download_dir = None if auto_ingest else os.path.join(os.getcwd(), "downloads")
+                result = self.nikon_client.capture(download_dir)
+                if result is None:
+                    self.log(" 사진 촬영 실패")
+                    return
+                for path in result['files']:
+                    self.log(f" 저장: {os.path.basename(path)}")
+                self.log(f" 사진 촬영 완료! ({result['elapsed']:.2f}초)")
+                return
+
             if self.run_gphoto2(['--capture-image']):
                 self.log(" 사진 촬영 완료!")
 
@@ -368,6 +339,18 @@ class CameraGUI:
                         return
 
             self.log(" 파일 목록 조회 중...")
+
+            # 니콘 카메라는 인증 세션으로 목록을 읽으면서 썸네일을 캐시로 미리 가져옴
+            if self.camera_type.get() == "니콘 카메라":
+                thumbnail_cache = get_thumbnail_cache()
+                summary = prefetch_thumbnails(
+                    self.nikon_client, thumbnail_cache,
+                    on_thumbnail=lambda handle, info, jpeg: self.log(
+                        f" {info.filename:<20} {info.compressed_size:>12} 바이트  {info.capture_date}"))
+                self.log(f" 총 {summary['objects']}개 (썸네일 캐시 {summary['cached']}개, "
+                         f"새로 받음 {summary['fetched']}개) → {thumbnail_cache.directory}")
+                return
+
             self.run_gphoto2(['--list-files'])
 
         self.run_in_thread(_list)
@@ -394,6 +377,15 @@ class CameraGUI:
 
             self.log(f" 파일 다운로드 시작: {download_dir}")
 
+            # 니콘 카메라는 유지 중인 인증 세션으로 직접 다운로드 (gphoto2/재인증 없음)
+            if self.camera_type.get() == "니콘 카메라":
+                summary = self.nikon_client.download_all(download_dir)
+                self.log(f" 다운로드 결과: {summary['downloaded']}/{summary['objects']}개, "
+                         f"{summary['bytes']} 바이트, 실패 {summary['failed']}개")
+                if summary['failed'] == 0:
+                    self.log(" 파일 다운로드 완료!")
+                return
+
             # 작업 디렉토리 변경
             original_dir = os.getcwd()
             os.chdir(download_dir)
@@ -422,6 +414,18 @@ class CameraGUI:
                         return
 
             self.log(" 카메라 설정 조회 중...")
+
+            # 니콘 카메라는 유지 중인 세션으로 장치 속성을 일괄 조회 (gphoto2 미사용)
+            if self.camera_type.get() == "니콘 카메라":
+                properties = self.nikon_client.read_all_properties()
+                for prop in properties:
+                    access = "읽기/쓰기" if prop['writable'] else "읽기 전용"
+                    allowed = f" 선택: {prop['choices']}" if prop['form'] == 'enum' else (
+                        f" 범위: {prop['minimum']}~{prop['maximum']}" if prop['form'] == 'range' else "")
+                    self.log(f" {prop['name']} (0x{prop['code']:04x}) = {prop['value']!r} [{access}]{allowed}")
+                self.log(f" 총 {len(properties)}개 속성")
+                return
+
             self.run_gphoto2(['--list-config'])
 
         self.run_in_thread(_config)
@@ -441,6 +445,32 @@ class CameraGUI:
 
         self.run_in_thread(_reauth)
 
+    def toggle_auto_ingest(self):
+        """자동 수집 (촬영 즉시 다운로드) 시작/중지"""
+
+        def _toggle():
+            if self.camera_type.get() != "니콘 카메라":
+                self.log(" 자동 수집은 니콘 카메라에서만 지원됩니다")
+                return
+
+            if self.nikon_client and self.nikon_client.ingest_queue is not None:
+                self.nikon_client.stop_auto_ingest()
+                self.log(" 자동 수집 중지")
+                return
+
+            if not self.nikon_authenticated or not self.nikon_client:
+                self.log(" 니콘 재인증 필요...")
+                if not self.authenticate_nikon(self.camera_ip.get()):
+                    self.log(" 니콘 인증 실패 - 자동 수집 불가")
+                    return
+
+            download_dir = os.path.join(os.getcwd(), "downloads")
+            self.nikon_client.start_auto_ingest(
+                download_dir, lambda path, info: self.log(f" 수집: {os.path.basename(path)}"))
+            self.log(f" 자동 수집 시작: {download_dir}")
+
+        self.run_in_thread(_toggle)
+
     def auto_detect(self):
         """자동 감지"""
 
@@ -4,12 +4,20 @@ Universal Camera Manager
 Handles Nikon authentication and integrates with gphoto2 for all camera brands
 """
 
+import os
 import subprocess
 import sys
 import socket
 import struct
 import logging
 import time
+import json
+
+from session_cache import session_cache
+import camera_daemon
+
+# PTP 클라이언트, 카메라 풀, 스케줄러, 썸네일 캐시는 사용하는 명령 안에서 가져온다.
+# 데몬에 맡기는 명령은 camera_daemon만 있으면 되므로 로그 파일 생성이나 캐시 디렉터리 탐색 없이 바로 끝난다.
 
 logging.basicConfig(
     level=logging.INFO,
@@ -50,29 +58,56 @@ def detect_nikon_camera(camera_ip):
     return False
 
 
+def is_nikon_camera(camera_ip):
+    """니콘 카메라 여부 - 최근 인증 기록이 있으면 감지 연결을 생략"""
+    from nikon_ptp_client import PTPIPClient
+
+    entry = session_cache.lookup(camera_ip, PTPIPClient.CLIENT_GUID)
+    if entry is not None:
+        logger.info(f"✅ 니콘 카메라 (인증 캐시: {entry['model']}, S/N {entry['serial_number']})")
+        return True
+    return detect_nikon_camera(camera_ip)
+
+
 def authenticate_nikon(camera_ip):
-    """니콘 카메라 인증 수행"""
+    """니콘 카메라 인증을 이 프로세스에서 수행하고 인증된 세션이 열린 클라이언트를 반환 (실패 시 None)"""
+    from nikon_authenticator import open_authenticated_client
+
     logger.info("니콘 카메라 인증 중...")
 
     try:
-        result = subprocess.run([
-            'python3', 'nikon_authenticator.py', camera_ip
-        ], capture_output=True, text=True, timeout=60)
-
-        if result.returncode == 0:
-            logger.info("✅ 니콘 인증 성공")
-            return True
-        else:
-            logger.error(f"❌ 니콘 인증 실패: {result.stderr}")
-            return False
-
-    except subprocess.TimeoutExpired:
-        logger.error("❌ 니콘 인증 타임아웃")
-        return False
+        client = open_authenticated_client(camera_ip)
     except Exception as e:
         logger.error(f"❌ 니콘 인증 오류: {e}")
+        return None
+
+    if client is None:
+        logger.error("❌ 니콘 인증 실패")
+        return None
+
+    logger.info("✅ 니콘 인증 성공")
+    return client
+
+
+def release_nikon_client(client):
+    """세션을 닫고 연결 해제 (gphoto2가 카메라를 쓸 수 있도록 하거나 명령 종료 시)"""
+    try:
+        client.close_session()
+    finally:
+        client.disconnect()
+
+
+def run_with_nikon_client(camera_ip, operation):
+    """인증된 클라이언트로 operation(client)을 실행하고 끝나면 연결을 정리"""
+    client = authenticate_nikon(camera_ip)
+    if client is None:
         return False
 
+    try:
+        return operation(client)
+    finally:
+        release_nikon_client(client)
+
 
 def run_gphoto2_command(command_args):
     """gphoto2 명령 실행"""
@@ -96,16 +131,247 @@ def run_gphoto2_command(command_args):
         return False
 
 
+def run_via_daemon(command, camera_ip, **args):
+    """카메라 데몬이 실행 중이면 명령을 맡기고 결과를 반환 (데몬이 없거나 실패하면 None → 직접 실행)"""
+    response = camera_daemon.request(command, camera_ip, **args)
+    if response is None:
+        return None
+    if not response.get('ok'):
+        logger.warning(f"데몬 명령 실패 ({response.get('error')}) - 직접 실행")
+        return None
+    logger.info("데몬의 인증된 연결로 처리")
+    return response['result']
+
+
+def download_nikon_files(client, dest_dir):
+    """인증된 PTP/IP 세션으로 니콘 카메라의 모든 파일을 직접 다운로드 (gphoto2 미사용)"""
+    summary = client.download_all(dest_dir)
+    logger.info(f"✅ 다운로드 완료: {summary['downloaded']}/{summary['objects']}개, "
+                f"{summary['bytes']} 바이트 → {dest_dir}")
+    return summary['failed'] == 0
+
+
+def sync_nikon_files(client, dest_dir):
+    """로컬 인덱스에 없는 새 파일만 니콘 카메라에서 다운로드"""
+    from object_index import ObjectIndex, INDEX_FILENAME
+
+    os.makedirs(dest_dir, exist_ok=True)
+    index = ObjectIndex(os.path.join(dest_dir, INDEX_FILENAME))
+    try:
+        summary = client.sync(dest_dir, index)
+        if summary is None:
+            return False
+        logger.info(f"✅ 동기화 완료: 새 파일 {summary['downloaded']}개 → {dest_dir}")
+        return summary['failed'] == 0
+    finally:
+        index.close()
+
+
+def ingest_nikon_files(client, dest_dir):
+    """새로 촬영된 사진을 이벤트로 감지해 바로 다운로드 (Ctrl+C로 종료)"""
+    try:
+        client.start_auto_ingest(dest_dir, lambda path, info: logger.info(f"📸 수집: {path}"))
+        logger.info("📸 자동 수집 중... Ctrl+C를 눌러 종료하세요")
+        while client.event_thread and client.event_thread.is_alive():
+            time.sleep(1)
+        logger.warning("이벤트 채널이 종료되었습니다")
+        return False
+    except KeyboardInterrupt:
+        logger.info("사용자가 자동 수집 종료를 요청했습니다")
+        return True
+    finally:
+        client.stop_auto_ingest()
+
+
+def capture_nikon_image(client, dest_dir=None):
+    """인증된 세션으로 바로 촬영하고 dest_dir이 있으면 같은 세션으로 다운로드 (gphoto2 미사용)"""
+    result = client.capture(dest_dir)
+    if result is None:
+        return False
+    for path in result['files']:
+        logger.info(f"📸 저장: {path}")
+    logger.info(f"✅ 촬영 완료 ({result['elapsed']:.2f}초)")
+    return True
+
+
+def interval_capture_nikon(client, interval, count, dest_dir=None):
+    """인증된 세션 하나로 interval초마다 촬영하고 새 파일은 별도 큐에서 다운로드 (Ctrl+C로 중지)"""
+    from capture_scheduler import CaptureScheduler
+
+    scheduler = CaptureScheduler(client, interval, count, dest_dir)
+    summary = scheduler.run()
+    print(f"촬영 {summary['triggers']}회 (실패 {summary['capture_failures']}회), "
+          f"놓친 예정 시각 {summary['missed_deadlines']}회, "
+          f"최대 지연 {summary['max_lateness'] * 1000:.0f}ms, 평균 지연 {summary['mean_lateness'] * 1000:.0f}ms")
+    if dest_dir is not None:
+        print(f"다운로드 {summary['downloaded']}개 (실패 {summary['download_failures']}개), "
+              f"{summary['bytes']} 바이트, 최대 대기열 {summary['max_queue_depth']}개")
+    return summary['capture_failures'] == 0 and summary['download_failures'] == 0
+
+
+def list_nikon_files(client):
+    """인증된 세션으로 파일 목록 출력 (gphoto2 미사용)"""
+    count = 0
+    # 전체 목록을 기다리지 않고 받는 대로 출력
+    for info in client.list_objects():
+        if not info.is_folder:
+            print(f"{info.filename:<20} {info.compressed_size:>12} 바이트  {info.capture_date}", flush=True)
+            count += 1
+    print(f"총 {count}개")
+    return True
+
+
+def prefetch_nikon_thumbnails(client, dest_dir=None):
+    """모든 객체의 썸네일을 캐시로 가져오고 dest_dir이 있으면 <파일명>.thumb.jpg로 저장"""
+    from thumbnail_cache import prefetch_thumbnails
+
+    def save(handle, info, jpeg):
+        if dest_dir is not None:
+            name = os.path.splitext(info.filename or f"{handle:08x}")[0]
+            with open(os.path.join(dest_dir, name + '.thumb.jpg'), 'wb') as f:
+                f.write(jpeg)
+
+    if dest_dir is not None:
+        os.makedirs(dest_dir, exist_ok=True)
+    summary = prefetch_thumbnails(client, on_thumbnail=save)
+    print(f"썸네일 {summary['objects']}개: 캐시 {summary['cached']}개, 새로 받음 {summary['fetched']}개, "
+          f"실패 {summary['failed']}개 ({summary['elapsed']:.1f}초)")
+    return summary['failed'] == 0
+
+
+def format_property(prop):
+    """장치 속성 한 줄 표시 (이름, 현재 값, 허용 값)"""
+    if prop['form'] == 'enum':
+        allowed = f"선택: {prop['choices']}"
+    elif prop['form'] == 'range':
+        allowed = f"범위: {prop['minimum']}~{prop['maximum']} (간격 {prop['step']})"
+    else:
+        allowed = ""
+    access = "읽기/쓰기" if prop['writable'] else "읽기 전용"
+    return f"0x{prop['code']:04x} {prop['name']:<28} = {prop['value']!r:<12} [{access}] {allowed}"
+
+
+def show_nikon_config(client):
+    """인증된 세션으로 모든 장치 속성을 한 번에 읽어 출력 (gphoto2 --list-config 대체)"""
+    properties = client.read_all_properties()
+    for prop in properties:
+        print(format_property(prop))
+    print(f"총 {len(properties)}개 속성")
+    return True
+
+
+def show_nikon_storage(client):
+    """저장소(메모리 카드)별 용량과 남은 공간 출력"""
+    storages = client.get_storages()
+    for storage in storages:
+        free_images = "-" if storage.free_images == storage.FREE_IMAGES_UNKNOWN else storage.free_images
+        print(f"0x{storage.storage_id:08x}  {storage.description or '-':<16} {storage.filesystem_name:<12} "
+              f"{storage.free_bytes / 1024 ** 3:>7.1f}/{storage.max_capacity / 1024 ** 3:.1f} GB 남음 "
+              f"({storage.free_ratio:.0%})  남은 매수 {free_images}")
+    return bool(storages)
+
+
+def bring_fleet_online(targets):
+    """IP/CIDR 목록의 니콘 카메라를 동시에 인증하고 카메라별 상태를 출력"""
+    from camera_fleet import CameraFleet
+
+    camera_ips = CameraFleet.expand_targets(targets)
+    if not camera_ips:
+        logger.error("❌ 카메라를 찾지 못했습니다")
+        return False
+
+    fleet = CameraFleet(camera_ips)
+    try:
+        online = fleet.connect_all()
+        fleet.check_health()
+        storage = fleet.storage_report()
+        for status in fleet.status():
+            auth_time = f"{status['auth_seconds']:.1f}초" if status['auth_seconds'] is not None else "-"
+            latency = f"{status['last_latency'] * 1000:.0f}ms" if status['last_latency'] is not None else "-"
+            free = "-"
+            if status['camera_ip'] in storage:
+                free = f"{max((s['free_ratio'] for s in storage[status['camera_ip']]['storages']), default=0):.0%}"
+                if storage[status['camera_ip']]['low_space']:
+                    free += " (부족)"
+            print(f"{status['camera_ip']:<16} {status['state']:<10} {status['model']:<12} "
+                  f"S/N {status['serial_number'] or '-':<12} 인증 {auth_time:<7} 지연 {latency:<7} "
+                  f"오류 {status['error_count']}  여유 {free}")
+        return online == len(camera_ips)
+    finally:
+        fleet.disconnect_all()
+
+
+def trigger_fleet(targets):
+    """IP/CIDR 목록의 니콘 카메라를 인증한 뒤 동시에 촬영하고 카메라별 편차를 출력"""
+    from camera_fleet import CameraFleet
+    from nikon_ptp_client import PTPIPClient
+
+    camera_ips = CameraFleet.expand_targets(targets)
+    if not camera_ips:
+        logger.error("❌ 카메라를 찾지 못했습니다")
+        return False
+
+    fleet = CameraFleet(camera_ips)
+    try:
+        fleet.connect_all()
+        report = fleet.trigger_all()
+        for camera_ip, result in sorted(report.items(), key=lambda item: item[1]['ack_skew']):
+            print(f"{camera_ip:<16} 응답 0x{result['response_code']:04x}  "
+                  f"전송 +{result['send_offset'] * 1000:.2f}ms  응답 {result['ack_latency'] * 1000:.1f}ms  "
+                  f"편차 +{result['ack_skew'] * 1000:.1f}ms")
+        return len(report) == len(camera_ips) and all(
+            result['response_code'] == PTPIPClient.PTP_RC_OK for result in report.values())
+    finally:
+        fleet.disconnect_all()
+
+
+def apply_fleet_profile(profile_path, targets):
+    """JSON 프리셋(속성 이름 또는 0x코드 → 값)을 여러 대의 니콘 카메라에 동시에 적용"""
+    from camera_fleet import CameraFleet
+
+    with open(profile_path, encoding='utf-8') as f:
+        profile = json.load(f)
+
+    camera_ips = CameraFleet.expand_targets(targets)
+    if not camera_ips:
+        logger.error("❌ 카메라를 찾지 못했습니다")
+        return False
+
+    fleet = CameraFleet(camera_ips)
+    try:
+        fleet.connect_all()
+        results = fleet.apply_profile(profile)
+        for camera_ip, result in results.items():
+            print(f"{camera_ip:<16} 변경 {len(result['changed'])}  동일 {len(result['unchanged'])}  "
+                  f"실패 {len(result['failed'])}  미확인 {len(result['unverified'])}  "
+                  f"({result['elapsed'] * 1000:.0f}ms)")
+            for key, reason in result['failed'].items():
+                print(f"    {key}: {reason}")
+        return len(results) == len(camera_ips) and not any(result['failed'] for result in results.values())
+    finally:
+        fleet.disconnect_all()
+
+
 def main():
     if len(sys.argv) < 2:
         print("범용 카메라 관리자")
         print("")
         print("사용법:")
         print("  python3 camera_manager.py detect <IP>           # 카메라 감지")
-        print("  python3 camera_manager.py capture <IP>          # 사진 촬영")
+        print("  python3 camera_manager.py capture <IP> [DIR]    # 사진 촬영 (DIR을 주면 바로 다운로드)")
+        print("  python3 camera_manager.py interval <IP> <초> [횟수(0=무제한)] [DIR]  # 인터벌/타임랩스 촬영 (니콘)")
         print("  python3 camera_manager.py list <IP>             # 파일 목록")
-        print("  python3 camera_manager.py download <IP>         # 파일 다운로드")
+        print("  python3 camera_manager.py storage <IP>          # 카드 용량/남은 공간 (니콘)")
+        print("  python3 camera_manager.py config <IP>           # 카메라 설정(장치 속성) 조회")
+        print("  python3 camera_manager.py profile <JSON> <IP|CIDR> ...  # 촬영 프리셋 일괄 적용 (니콘)")
+        print("  python3 camera_manager.py thumbnails <IP> [DIR] # 썸네일 일괄 캐시 (니콘)")
+        print("  python3 camera_manager.py download <IP> [DIR]   # 파일 다운로드")
+        print("  python3 camera_manager.py sync <IP> [DIR]       # 새 파일만 다운로드 (니콘)")
+        print("  python3 camera_manager.py ingest <IP> [DIR]     # 촬영 즉시 자동 다운로드 (니콘)")
+        print("  python3 camera_manager.py fleet <IP|CIDR> ...   # 여러 대 동시 인증 및 상태 확인 (니콘)")
+        print("  python3 camera_manager.py trigger <IP|CIDR> ... # 여러 대 동시 촬영 및 편차 측정 (니콘)")
         print("  python3 camera_manager.py gphoto2 <IP> [args]   # 직접 gphoto2 명령")
+        print("  python3 camera_manager.py daemon [start|stop|status]  # 인증된 연결을 유지하는 상주 데몬")
         print("")
         print("예시:")
         print("  python3 camera_manager.py detect 192.168.147.75")
@@ -124,13 +390,15 @@ def main():
 
         logger.info(f"카메라 감지 중: {camera_ip}")
 
-        if detect_nikon_camera(camera_ip):
+        if is_nikon_camera(camera_ip):
             logger.info("📷 니콘 카메라 감지 - 인증 필요")
-            if authenticate_nikon(camera_ip):
-                logger.info("🎉 인증 완료 - gphoto2 사용 가능")
-            else:
+            client = authenticate_nikon(camera_ip)
+            if client is None:
                 logger.error("❌ 인증 실패")
                 sys.exit(1)
+            # gphoto2가 카메라를 쓸 수 있도록 연결 해제
+            release_nikon_client(client)
+            logger.info("🎉 인증 완료 - gphoto2 사용 가능")
         else:
             logger.info("📷 일반 카메라 감지 - gphoto2 직접 사용 가능")
 
@@ -138,27 +406,217 @@ def main():
         logger.info("gphoto2로 카메라 상태 확인...")
         run_gphoto2_command(['--auto-detect'])
 
-    elif command in ["capture", "list", "download"]:
+    elif command == "download":
+        if len(sys.argv) not in (3, 4):
+            print("사용법: python3 camera_manager.py download <IP> [DIR]")
+            sys.exit(1)
+
+        camera_ip = sys.argv[2]
+        dest_dir = sys.argv[3] if len(sys.argv) == 4 else "downloads"
+
+        summary = run_via_daemon("download", camera_ip, dest_dir=os.path.abspath(dest_dir))
+        if summary is not None:
+            logger.info(f"✅ 다운로드 완료: {summary['downloaded']}/{summary['objects']}개 → {dest_dir}")
+            sys.exit(0 if summary['failed'] == 0 else 1)
+
+        # 니콘 카메라는 인증된 세션으로 직접 다운로드
+        if is_nikon_camera(camera_ip):
+            logger.info("니콘 카메라 - PTP/IP 직접 다운로드")
+            if not run_with_nikon_client(camera_ip, lambda client: download_nikon_files(client, dest_dir)):
+                sys.exit(1)
+        else:
+            os.makedirs(dest_dir, exist_ok=True)
+            os.chdir(dest_dir)
+            run_gphoto2_command(['--get-all-files'])
+
+    elif command == "sync":
+        if len(sys.argv) not in (3, 4):
+            print("사용법: python3 camera_manager.py sync <IP> [DIR]")
+            sys.exit(1)
+
+        camera_ip = sys.argv[2]
+        dest_dir = sys.argv[3] if len(sys.argv) == 4 else "downloads"
+
+        summary = run_via_daemon("sync", camera_ip, dest_dir=os.path.abspath(dest_dir))
+        if summary is not None:
+            logger.info(f"✅ 동기화 완료: 새 파일 {summary['downloaded']}개 → {dest_dir}")
+            sys.exit(0 if summary['failed'] == 0 else 1)
+
+        if not run_with_nikon_client(camera_ip, lambda client: sync_nikon_files(client, dest_dir)):
+            sys.exit(1)
+
+    elif command == "config":
         if len(sys.argv) != 3:
-            print(f"사용법: python3 camera_manager.py {command} <IP>")
+            print("사용법: python3 camera_manager.py config <IP>")
             sys.exit(1)
 
         camera_ip = sys.argv[2]
+        properties = run_via_daemon("config", camera_ip)
+        if properties is not None:
+            for prop in properties:
+                print(format_property(prop))
+            print(f"총 {len(properties)}개 속성")
+            sys.exit(0)
+
+        if is_nikon_camera(camera_ip):
+            if not run_with_nikon_client(camera_ip, show_nikon_config):
+                sys.exit(1)
+        else:
+            run_gphoto2_command(['--list-config'])
 
-        # 니콘 카메라인지 확인하고 필요시 인증
-        if detect_nikon_camera(camera_ip):
-            logger.info("니콘 카메라 - 인증 수행")
-            if not authenticate_nikon(camera_ip):
-                logger.error("인증 실패")
+    elif command == "profile":
+        if len(sys.argv) < 4:
+            print("사용법: python3 camera_manager.py profile <JSON> <IP|CIDR> [IP|CIDR ...]")
+            sys.exit(1)
+
+        if not apply_fleet_profile(sys.argv[2], sys.argv[3:]):
+            sys.exit(1)
+
+    elif command == "storage":
+        if len(sys.argv) != 3:
+            print("사용법: python3 camera_manager.py storage <IP>")
+            sys.exit(1)
+
+        if not run_with_nikon_client(sys.argv[2], show_nikon_storage):
+            sys.exit(1)
+
+    elif command == "thumbnails":
+        if len(sys.argv) not in (3, 4):
+            print("사용법: python3 camera_manager.py thumbnails <IP> [DIR]")
+            sys.exit(1)
+
+        camera_ip = sys.argv[2]
+        dest_dir = sys.argv[3] if len(sys.argv) == 4 else None
+
+        if not run_with_nikon_client(camera_ip, lambda client: prefetch_nikon_thumbnails(client, dest_dir)):
+            sys.exit(1)
+
+    elif command == "ingest":
+        if len(sys.argv) not in (3, 4):
+            print("사용법: python3 camera_manager.py ingest <IP> [DIR]")
+            sys.exit(1)
+
+        camera_ip = sys.argv[2]
+        dest_dir = sys.argv[3] if len(sys.argv) == 4 else "downloads"
+
+        if not run_with_nikon_client(camera_ip, lambda client: ingest_nikon_files(client, dest_dir)):
+            sys.exit(1)
+
+    elif command == "daemon":
+        action = sys.argv[2] if len(sys.argv) > 2 else "start"
+
+        if action == "start":
+            # 포그라운드 실행 (백그라운드로 두려면 & 또는 서비스 관리자 사용)
+            try:
+                camera_daemon.CameraDaemon().serve_forever()
+            except RuntimeError as e:
+                logger.error(f"❌ {e}")
                 sys.exit(1)
+        elif action in ("stop", "status"):
+            response = camera_daemon.request("shutdown" if action == "stop" else "status", timeout=10)
+            if response is None:
+                print("데몬이 실행 중이 아닙니다")
+                sys.exit(1)
+            if action == "status":
+                for camera in response['result']:
+                    state = "연결됨" if camera['connected'] else "끊김"
+                    print(f"{camera['camera_ip']:<16} {camera['model']:<12} S/N {camera['serial_number']:<12} {state}")
+                print(f"연결 유지 중인 카메라: {len(response['result'])}대")
+            else:
+                print("데몬 종료 요청 완료")
+        else:
+            print("사용법: python3 camera_manager.py daemon [start|stop|status]")
+            sys.exit(1)
 
-        # 작업 수행
-        if command == "capture":
+    elif command == "fleet":
+        if len(sys.argv) < 3:
+            print("사용법: python3 camera_manager.py fleet <IP|CIDR> [IP|CIDR ...]")
+            sys.exit(1)
+
+        if not bring_fleet_online(sys.argv[2:]):
+            sys.exit(1)
+
+    elif command == "trigger":
+        if len(sys.argv) < 3:
+            print("사용법: python3 camera_manager.py trigger <IP|CIDR> [IP|CIDR ...]")
+            sys.exit(1)
+
+        if not trigger_fleet(sys.argv[2:]):
+            sys.exit(1)
+
+    elif command == "capture":
+        if len(sys.argv) not in (3, 4):
+            print("사용법: python3 camera_manager.py capture <IP> [DIR]")
+            sys.exit(1)
+
+        camera_ip = sys.argv[2]
+        dest_dir = sys.argv[3] if len(sys.argv) == 4 else None
+
+        result = run_via_daemon("capture", camera_ip,
+                                dest_dir=os.path.abspath(dest_dir) if dest_dir else None)
+        if result is not None:
+            for path in result['files']:
+                logger.info(f"📸 저장: {path}")
+            logger.info(f"✅ 촬영 완료 ({result['elapsed']:.2f}초)")
+            sys.exit(0)
+
+        # 니콘 카메라는 인증된 세션에서 InitiateCapture로 직접 촬영
+        if is_nikon_camera(camera_ip):
+            logger.info("니콘 카메라 - PTP/IP 직접 촬영")
+            if not run_with_nikon_client(camera_ip, lambda client: capture_nikon_image(client, dest_dir)):
+                sys.exit(1)
+        elif dest_dir:
+            os.makedirs(dest_dir, exist_ok=True)
+            os.chdir(dest_dir)
+            run_gphoto2_command(['--capture-image-and-download'])
+        else:
             run_gphoto2_command(['--capture-image'])
-        elif command == "list":
+
+    elif command == "interval":
+        usage = "사용법: python3 camera_manager.py interval <IP> <초> [횟수(0=무제한)] [DIR]"
+        if len(sys.argv) not in (4, 5, 6):
+            print(usage)
+            sys.exit(1)
+
+        camera_ip = sys.argv[2]
+        try:
+            interval = float(sys.argv[3])
+            count = int(sys.argv[4]) if len(sys.argv) >= 5 else 0
+        except ValueError:
+            print(usage)
+            sys.exit(1)
+        if not interval > 0 or count < 0:
+            print("촬영 간격은 0보다 크고 횟수는 0 이상이어야 합니다")
+            print(usage)
+            sys.exit(1)
+        count = count or None
+        dest_dir = sys.argv[5] if len(sys.argv) == 6 else None
+
+        if not run_with_nikon_client(camera_ip, lambda client: interval_capture_nikon(client, interval, count, dest_dir)):
+            sys.exit(1)
+
+    elif command == "list":
+        if len(sys.argv) != 3:
+            print("사용법: python3 camera_manager.py list <IP>")
+            sys.exit(1)
+
+        camera_ip = sys.argv[2]
+
+        # 데몬이 있으면 니콘 카메라 파일 목록은 데몬의 연결로 바로 조회
+        files = run_via_daemon("list", camera_ip)
+        if files is not None:
+            for file in files:
+                print(f"{file['filename']:<20} {file['size']:>12} 바이트  {file['capture_date']}")
+            print(f"총 {len(files)}개")
+            sys.exit(0)
+
+        # 니콘 카메라는 인증된 세션을 그대로 사용해 목록 조회
+        if is_nikon_camera(camera_ip):
+            logger.info("니콘 카메라 - 인증 수행")
+            if not run_with_nikon_client(camera_ip, list_nikon_files):
+                sys.exit(1)
+        else:
             run_gphoto2_command(['--list-files'])
-        elif command == "download":
-            run_gphoto2_command(['--get-all-files'])
 
     elif command == "gphoto2":
         if len(sys.argv) < 4:
@@ -169,11 +627,13 @@ def main():
         gphoto2_args = sys.argv[3:]
 
         # 니콘 카메라인지 확인하고 필요시 인증
-        if detect_nikon_camera(camera_ip):
+        if is_nikon_camera(camera_ip):
             logger.info("니콘 카메라 - 인증 수행")
-            if not authenticate_nikon(camera_ip):
+            client = authenticate_nikon(camera_ip)
+            if client is None:
                 logger.error("인증 실패")
                 sys.exit(1)
+            release_nikon_client(client)
 
         # gphoto2 명령 실행
         run_gphoto2_command(gphoto2_args)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Capture Scheduler
+Interval / timelapse capture on a persistent PTPIPClient session with a separate download queue
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from typing import Optional, Callable
+
+from nikon_ptp_client import PTPIPClient
+
+logger = logging.getLogger(__name__)
+
+
+class CaptureScheduler:
+    """
+    인증된 PTPIPClient 세션 하나로 일정 간격 촬영(타임랩스/인터벌 버스트)을 수행하는 스케줄러
+
+    n번째 촬영 시각은 시작 시각 + n × interval로 고정되므로 촬영이나 지연이 누적되지 않는다.
+    촬영이 늦어 이미 지난 예정 시각은 몰아서 찍지 않고 건너뛴 뒤 missed_deadlines로 집계한다.
+    다운로드는 별도 스레드의 큐에서 GetPartialObject 조각 단위로 처리하므로, 명령 잠금을 조각 하나 동안만
+    잡아 다음 촬영 명령이 큰 파일 전송 뒤에 밀리지 않는다.
+    """
+
+    def __init__(self, client: PTPIPClient, interval: float, count: Optional[int] = None,
+                 dest_dir: Optional[str] = None, chunk_size: int = 256 * 1024, capture_timeout: float = 10.0,
+                 on_file: Optional[Callable[[str, dict], None]] = None):
+        if not interval > 0:
+            raise ValueError(f"촬영 간격은 0보다 커야 함: {interval}")
+        self.client = client
+        self.interval = interval
+        self.count = count  # None이면 stop()까지 계속 촬영
+        self.dest_dir = dest_dir  # None이면 촬영만 하고 다운로드하지 않음
+        self.chunk_size = chunk_size
+        self.capture_timeout = capture_timeout
+        self.on_file = on_file
+
+        self.download_queue: queue.Queue = queue.Queue()
+        self.stop_event = threading.Event()
+        self.trigger_thread: Optional[threading.Thread] = None
+        self.download_thread: Optional[threading.Thread] = None
+
+        # 통계
+        self.lock = threading.Lock()
+        self.triggers = 0
+        self.capture_failures = 0
+        self.missed_deadlines = 0
+        self.max_lateness = 0.0  # 예정 시각 대비 가장 늦게 보낸 촬영 명령 (초)
+        self.total_lateness = 0.0
+        self.max_queue_depth = 0
+        self.downloaded = 0
+        self.download_failures = 0
+        self.bytes = 0
+
+    def start(self):
+        """촬영 스레드와 다운로드 스레드 시작"""
+        if self.dest_dir is not None:
+            os.makedirs(self.dest_dir, exist_ok=True)
+            self.download_thread = threading.Thread(target=self._download_worker, name='capture-download',
+                                                    daemon=True)
+            self.download_thread.start()
+
+        self.stop_event.clear()
+        self.trigger_thread = threading.Thread(target=self._trigger_loop, name='capture-trigger', daemon=True)
+        self.trigger_thread.start()
+        logger.info(f"⏱️ 인터벌 촬영 시작: {self.interval}초 간격, "
+                    f"{self.count if self.count is not None else '무제한'}회")
+
+    def stop(self):
+        """촬영을 중지 (다운로드 큐에 남은 파일은 wait()에서 마저 내려받음)"""
+        self.stop_event.set()
+
+    def wait(self, timeout: Optional[float] = None) -> dict:
+        """촬영이 끝나고 대기 중인 다운로드가 모두 완료될 때까지 기다린 뒤 통계를 반환"""
+        if self.trigger_thread:
+            self.trigger_thread.join(timeout)
+        if self.download_thread:
+            self.download_queue.put(None)  # 종료 표시
+            self.download_thread.join(timeout)
+        summary = self.metrics()
+        logger.info(f"⏱️ 인터벌 촬영 종료: 촬영 {summary['triggers']}회, 놓친 예정 시각 {summary['missed_deadlines']}회, "
+                    f"다운로드 {summary['downloaded']}개 (최대 대기 {summary['max_queue_depth']}개)")
+        return summary
+
+    def run(self) -> dict:
+        """start() 후 끝날 때까지 대기 (Ctrl+C로 중지)"""
+        self.start()
+        try:
+            while self.trigger_thread.is_alive():
+                self.trigger_thread.join(0.5)
+        except KeyboardInterrupt:
+            logger.info("사용자가 인터벌 촬영 중지를 요청했습니다")
+            self.stop()
+        return self.wait()
+
+    def metrics(self) -> dict:
+        with self.lock:
+            fired = self.triggers
+            return {
+                'triggers': fired,
+                'capture_failures': self.capture_failures,
+                'missed_deadlines': self.missed_deadlines,
+                'max_lateness': self.max_lateness,
+                'mean_lateness': self.total_lateness / fired if fired else 0.0,
+                'queue_depth': self.download_queue.qsize(),
+                'max_queue_depth': self.max_queue_depth,
+                'downloaded': self.downloaded,
+                'download_failures': self.download_failures,
+                'bytes': self.bytes
+            }
+
+    def _trigger_loop(self):
+        """예정 시각마다 InitiateCapture 실행 (촬영 스레드)"""
+        start_time = time.monotonic()
+        slot = 0
+        while not self.stop_event.is_set() and (self.count is None or slot < self.count):
+            deadline = start_time + slot * self.interval
+            delay = deadline - time.monotonic()
+            if delay > 0 and self.stop_event.wait(delay):
+                break
+
+            lateness = time.monotonic() - deadline
+            try:
+                result = self.client.capture(None, timeout=self.capture_timeout)
+            except (ConnectionError, OSError) as e:
+                logger.error(f"❌ 촬영 중 연결 오류 - 인터벌 촬영 중지: {e}")
+                with self.lock:
+                    self.capture_failures += 1
+                break
+
+            with self.lock:
+                self.triggers += 1
+                self.max_lateness = max(self.max_lateness, lateness)
+                self.total_lateness += lateness
+                if result is None:
+                    self.capture_failures += 1
+
+            if result is not None and self.dest_dir is not None:
+                for handle in result['handles']:
+                    self.download_queue.put(handle)
+                with self.lock:
+                    self.max_queue_depth = max(self.max_queue_depth, self.download_queue.qsize())
+
+            # 이미 지나간 예정 시각은 건너뜀 (몰아서 찍으면 간격이 깨짐)
+            slot += 1
+            elapsed_slots = int((time.monotonic() - start_time) // self.interval) + 1
+            if elapsed_slots > slot:
+                skipped = elapsed_slots - slot
+                if self.count is not None:
+                    skipped = min(skipped, self.count - slot)
+                logger.warning(f"⚠️ 촬영이 늦어 예정 시각 {skipped}회를 건너뜀")
+                with self.lock:
+                    self.missed_deadlines += skipped
+                slot += skipped
+
+    def _download_worker(self):
+        """큐에 들어온 객체를 조각 단위로 내려받음 (다운로드 스레드)"""
+        while True:
+            handle = self.download_queue.get()
+            if handle is None:
+                break
+            try:
+                path = self._download(handle)
+            except (ConnectionError, OSError) as e:
+                path = None
+                logger.error(f"❌ 다운로드 중 오류: 핸들=0x{handle:08x}, {e}")
+
+            if path is None:
+                with self.lock:
+                    self.download_failures += 1
+            elif self.on_file is not None:
+                try:
+                    self.on_file(path, self.metrics())
+                except Exception as e:
+                    logger.error(f"❌ 다운로드 콜백 오류: {e}")
+
+    def _download(self, handle: int) -> Optional[str]:
+        """GetPartialObject를 chunk_size씩 반복해 파일로 저장하고 경로를 반환"""
+        info = self.client.get_object_info(handle)
+        if not info or info['object_format'] == self.client.PTP_OFC_Association:
+            return None
+
+        path = os.path.join(self.dest_dir, info['filename'] or f"{handle:08x}.bin")
+        part_path = path + '.part'
+        total_size = info['compressed_size']
+        offset = 0
+        with open(part_path, 'wb') as output:
+            while offset < total_size:
+                # 조각마다 명령 잠금을 놓으므로 그 사이에 촬영 명령이 끼어들 수 있음
+                received = self.client.get_partial_object(handle, offset, min(self.chunk_size, total_size - offset),
+                                                          output)
+                if not received:
+                    logger.error(f"❌ 다운로드 실패: {info['filename']} ({offset}/{total_size} 바이트)")
+                    return None
+                offset += received
+                with self.lock:
+                    self.bytes += received
+
+        os.replace(part_path, path)
+        with self.lock:
+            self.downloaded += 1
+        logger.info(f"📥 저장: {path} ({total_size} 바이트)")
+        return path
@@ -5,9 +5,10 @@ Performs 0x935a authentication and disconnects for gphoto2 usage
 """
 
 import sys
-import time
 import logging
-from nikon_ptp_client import PTPIPClient
+from typing import Optional
+from nikon_ptp_client import PTPIPClient, wait_for_authenticated_client
+from session_cache import SessionCache, session_cache
 
 # 간단한 로깅 설정
 logging.basicConfig(
@@ -17,86 +18,124 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def authenticate_nikon(camera_ip):
-    """니콘 카메라 인증만 수행하고 즉시 연결 해제"""
+def _open_cached_client(camera_ip, camera_port: int, cache: SessionCache) -> Optional[PTPIPClient]:
+    """인증 캐시에 승인 기록이 있으면 Phase 1 없이 바로 인증된 연결과 세션을 시도"""
+    client = PTPIPClient(camera_ip, camera_port)
+    entry = cache.lookup(camera_ip, client.client_guid)
+    if entry is None:
+        return None
+
+    logger.info(f"인증 캐시 적중: {camera_ip} (S/N {entry['serial_number']}) - Phase 1 생략")
+    try:
+        if client.connect():
+            device_info = client.get_device_info()
+            if (device_info and device_info.get('supports_944c')
+                    and device_info.get('serial_number') == entry['serial_number']
+                    and client.open_session()):
+                cache.store(camera_ip, entry['serial_number'], client.client_guid, entry['model'])
+                logger.info("✅ 캐시된 인증으로 세션 확인")
+                return client
+    except Exception as e:
+        logger.debug(f"캐시된 인증으로 연결 실패: {e}")
+
+    # 카메라가 재부팅되었거나 다른 카메라로 바뀜 - 전체 인증으로 진행
+    logger.info("캐시된 인증이 유효하지 않음 - 전체 인증 진행")
+    cache.invalidate(camera_ip, client.client_guid)
+    client.disconnect()
+    return None
+
+
+def open_authenticated_client(camera_ip, camera_port: int = 15740,
+                              cache: Optional[SessionCache] = session_cache) -> Optional[PTPIPClient]:
+    """
+    니콘 카메라 인증 후 인증된 연결과 세션을 연 채로 클라이언트를 반환
+
+    cache에 이 카메라가 우리 GUID를 승인한 기록이 있으면 Phase 1(0x952b/0x935a)을 건너뛰고 바로 연결한다.
+    cache=None이면 항상 전체 인증을 수행한다.
+    """
     logger.info(f"니콘 카메라 인증 시작: {camera_ip}")
 
+    if cache is not None:
+        cached_client = _open_cached_client(camera_ip, camera_port, cache)
+        if cached_client is not None:
+            return cached_client
+
     # Phase 1: 초기 연결 및 승인 요청
     logger.info("Phase 1: 초기 연결 및 0x935a 승인 요청")
-    client = PTPIPClient(camera_ip)
+    client = PTPIPClient(camera_ip, camera_port)
 
     try:
         # 1-5단계: 기존 로직과 동일
         if not client.connect():
             logger.error("연결 실패")
-            return False
+            return None
 
         device_info = client.get_device_info()
         if not device_info:
             logger.error("장치 정보 가져오기 실패")
-            return False
+            return None
 
         if not client.open_session():
             logger.error("세션 열기 실패")
-            return False
+            return None
 
         response_code, _ = client._send_ptp_command(0x952b)
         if response_code != client.PTP_RC_OK:
             logger.error("0x952b 실패")
-            return False
+            return None
 
         response_code, _ = client._send_ptp_command_935a()
         if response_code != client.PTP_RC_OK:
             logger.error("0x935a 승인 실패")
-            return False
+            return None
 
         logger.info("✅ Phase 1 완료 - 연결 승인 성공")
 
     except Exception as e:
         logger.error(f"Phase 1 오류: {e}")
-        return False
+        return None
     finally:
         client.disconnect()
 
-    # 카메라 내부 처리 대기
-    logger.info("카메라 상태 변경 대기 중... (3초)")
-    time.sleep(3)
-
-    # Phase 2: 인증된 연결 확인 후 즉시 해제
+    # Phase 2: 카메라가 준비되는 즉시 인증된 연결 (고정 대기 대신 재연결 확인)
     logger.info("Phase 2: 인증 상태 확인")
-    auth_client = PTPIPClient(camera_ip)
+    auth_client = wait_for_authenticated_client(camera_ip, camera_port, model=device_info.get('model', ''))
+    if auth_client is None:
+        logger.error("인증 실패 - 카메라가 인증된 연결을 받아들이지 않음")
+        return None
 
     try:
-        if not auth_client.connect():
-            logger.error("인증된 연결 실패")
-            return False
-
-        device_info = auth_client.get_device_info()
-        if not device_info:
-            logger.error("인증된 장치 정보 가져오기 실패")
-            return False
-
-        # 인증 성공 확인
-        if device_info.get('supports_944c'):
-            logger.info("✅ 인증 완료 - 모든 기능 활성화됨")
-
-            # 빠른 세션 열기/닫기로 연결 상태 확정
-            if auth_client.open_session():
-                logger.info("✅ 인증된 세션 확인")
-                auth_client.close_session()
-
-            return True
-        else:
-            logger.error("인증 실패 - 고급 기능 비활성화")
-            return False
+        logger.info("✅ 인증 완료 - 모든 기능 활성화됨")
+        if not auth_client.open_session():
+            logger.error("인증된 세션 열기 실패")
+            auth_client.disconnect()
+            return None
+
+        logger.info("✅ 인증된 세션 확인")
+        if cache is not None:
+            cache.store(camera_ip, auth_client.device_info.get('serial_number', ''), auth_client.client_guid,
+                        auth_client.device_info.get('model', ''))
+        return auth_client
 
     except Exception as e:
         logger.error(f"Phase 2 오류: {e}")
+        auth_client.disconnect()
+        return None
+
+
+def authenticate_nikon(camera_ip):
+    """니콘 카메라 인증만 수행하고 즉시 연결 해제"""
+    auth_client = open_authenticated_client(camera_ip)
+    if auth_client is None:
         return False
+
+    try:
+        auth_client.close_session()
     finally:
         # 중요: gphoto2 사용을 위해 즉시 연결 해제
         auth_client.disconnect()
         logger.info("✅ 인증 완료 - gphoto2 사용 가능")
+    return True
 
 
 def main():
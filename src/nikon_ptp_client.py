@@ -12,7 +12,16 @@ import threading
 import time
 import uuid
 import logging
-from typing import Optional, List, Tuple
+import queue
+import functools
+import hashlib
+import json
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Tuple, Dict, Iterator, Callable, Union, BinaryIO
+
+import ptp_codec
 
 # 로그 파일 이름 생성 (현재 시간 포함)
 import os
@@ -47,8 +56,598 @@ logger.info(f"로그 파일 생성: {log_filename}")
 logger.info("=" * 60)
 
 
-class PTPIPClient:
-    """니콘 카메라와 PTP/IP 프로토콜로 통신하는 클라이언트 클래스"""
+class PTPIPPacketReader:
+    """
+    PTP/IP 스트림에서 길이 접두(length-prefixed) 패킷을 하나씩 읽어내는 프레임 리더
+
+    8바이트 헤더(길이, 타입)를 읽은 뒤 정확히 length 바이트가 모일 때까지 수신한다.
+    재사용 가능한 bytearray 버퍼에 recv_into로 직접 받으므로 왕복마다 버퍼를 새로 만들지 않고,
+    한 번의 recv에 여러 패킷이 붙어 오거나 한 패킷이 여러 세그먼트로 나뉘어 와도 올바르게 분리한다.
+    반환되는 payload는 내부 버퍼에 대한 memoryview이며 다음 read 호출 전까지만 유효하다.
+    """
+
+    HEADER = struct.Struct('<II')  # [길이:4] [타입:4]
+
+    def __init__(self, sock: socket.socket, buffer_size: int = 64 * 1024):
+        self.sock = sock
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        self._start = 0  # 아직 소비되지 않은 데이터의 시작 위치
+        self._end = 0  # 수신된 데이터의 끝 위치
+        self.partial = 0  # read_header로 시작한 패킷에서 아직 읽지 않은 payload 바이트 (타임아웃으로 중단된 경우)
+
+    def _reserve(self, size: int):
+        """버퍼 시작 위치부터 size 바이트를 담을 수 있도록 압축하거나 확장"""
+        pending = self._end - self._start
+        if size > len(self._buffer):
+            # 버퍼보다 큰 패킷: 두 배 이상으로 확장 (이후 왕복에서 재사용됨)
+            new_buffer = bytearray(max(size, len(self._buffer) * 2))
+            new_buffer[:pending] = self._view[self._start:self._end]
+            self._buffer = new_buffer
+            self._view = memoryview(new_buffer)
+            logger.debug(f"수신 버퍼 확장: {len(new_buffer)} 바이트")
+        elif pending:
+            self._view[:pending] = self._view[self._start:self._end]
+        self._start = 0
+        self._end = pending
+
+    def _fill(self, size: int):
+        """미소비 데이터가 최소 size 바이트가 될 때까지 수신 (타임아웃이 나도 받은 데이터는 유지)"""
+        while self._end - self._start < size:
+            if self._start + size > len(self._buffer):
+                self._reserve(size)
+            received = self.sock.recv_into(self._view[self._end:])
+            if received == 0:
+                raise ConnectionError("PTP/IP 연결이 상대방에 의해 종료됨")
+            self._end += received
+
+    def read_header(self) -> Tuple[int, int]:
+        """다음 패킷의 헤더만 읽어 (payload 길이, 패킷 타입)을 반환 (payload는 아직 소비하지 않음)"""
+        self._fill(self.HEADER.size)
+        length, packet_type = self.HEADER.unpack_from(self._buffer, self._start)
+        if length < self.HEADER.size:
+            raise ValueError(f"잘못된 PTP/IP 패킷 길이: {length}")
+        self._start += self.HEADER.size
+        self.partial = length - self.HEADER.size
+        return length - self.HEADER.size, packet_type
+
+    def read_exact(self, size: int) -> memoryview:
+        """정확히 size 바이트를 읽어 반환 (다음 read 호출 전까지만 유효)"""
+        self._fill(size)
+        data = self._view[self._start:self._start + size]
+        self._start += size
+        self.partial = max(0, self.partial - size)
+        if self._start == self._end:
+            # 버퍼를 모두 소비했으면 다음 수신은 처음부터
+            self._start = self._end = 0
+        return data
+
+    def iter_payload(self, size: int, chunk_size: int = 64 * 1024) -> Iterator[memoryview]:
+        """
+        size 바이트의 payload를 최대 chunk_size 크기의 조각으로 나눠 순서대로 반환
+
+        큰 데이터 패킷을 버퍼에 통째로 모으지 않고 고정 크기 버퍼로 흘려보내므로
+        객체 크기와 상관없이 메모리 사용량이 일정하다. 각 조각은 다음 조각을 요청하기 전까지만 유효하다.
+        """
+        remaining = size
+        while remaining > 0:
+            if self._start == self._end:
+                # 버퍼가 비었으면 이번 패킷의 남은 길이만큼만 버퍼 처음부터 수신
+                self._start = self._end = 0
+                limit = min(remaining, chunk_size, len(self._buffer))
+                received = self.sock.recv_into(self._view[:limit])
+                if received == 0:
+                    raise ConnectionError("PTP/IP 연결이 상대방에 의해 종료됨")
+                self._end = received
+
+            count = min(self._end - self._start, remaining, chunk_size)
+            chunk = self._view[self._start:self._start + count]
+            self._start += count
+            remaining -= count
+            self.partial = max(0, self.partial - count)
+            yield chunk
+
+        if self._start == self._end:
+            self._start = self._end = 0
+
+    def skip_partial(self):
+        """타임아웃 등으로 중간에 멈춘 패킷의 남은 payload를 읽어 버려 다음 읽기가 패킷 경계에서 시작하게 함"""
+        if self.partial:
+            logger.warning(f"⚠️ 중단된 패킷의 남은 {self.partial} 바이트를 건너뜀")
+            for _ in self.iter_payload(self.partial):
+                pass
+
+    def read_packet(self) -> Tuple[int, memoryview]:
+        """
+        패킷 하나를 읽어 (패킷 타입, 헤더를 제외한 payload)를 반환
+
+        패킷 전체가 모일 때까지 헤더를 소비하지 않으므로 중간에 소켓 타임아웃이 나도
+        다음 호출에서 같은 패킷을 이어서 받는다.
+        """
+        self._fill(self.HEADER.size)
+        length, packet_type = self.HEADER.unpack_from(self._buffer, self._start)
+        if length < self.HEADER.size:
+            raise ValueError(f"잘못된 PTP/IP 패킷 길이: {length}")
+        self._fill(length)
+        self._start += self.HEADER.size
+        return packet_type, self.read_exact(length - self.HEADER.size)
+
+
+def _with_command_lock(method):
+    """명령 채널 트랜잭션이 여러 스레드에서 섞이지 않도록 command_lock을 잡고 실행하는 데코레이터"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.command_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class PTPEvent:
+    """이벤트 채널에서 디코딩된 PTP 이벤트 하나"""
+
+    __slots__ = ('code', 'transaction_id', 'parameters', 'timestamp', 'sequence')
+
+    def __init__(self, code: int, transaction_id: int, parameters: Tuple[int, ...]):
+        self.code = code
+        self.transaction_id = transaction_id
+        self.parameters = parameters
+        self.timestamp = time.monotonic()
+        self.sequence = 0  # PTPEventBus에 게시될 때 부여되는 일련번호
+
+    def __repr__(self):
+        return f"PTPEvent(code=0x{self.code:04x}, transaction_id={self.transaction_id}, parameters={self.parameters})"
+
+
+class PTPDeviceInfo(Mapping):
+    """
+    GetDeviceInfo 데이터셋 위의 읽기 전용 지연(lazy) 뷰
+
+    만들 때는 필드 위치만 계산하고 코드 배열과 문자열은 처음 접근할 때 디코딩해 보관한다. 기존 dict 결과와
+    같은 키를 제공하므로 device_info.get('model'), device_info['operation_count']처럼 그대로 쓸 수 있다.
+    parse()는 시리얼 번호별로 데이터셋 해시를 기억해 재연결 때 같은 데이터셋이 오면 이전 객체를 돌려준다.
+    """
+
+    __slots__ = ('data', 'digest', 'offsets', 'decoded', 'supported')
+
+    ARRAYS = ('operations', 'events', 'properties', 'capture_formats', 'image_formats')
+    STRINGS = ('manufacturer', 'model', 'device_version', 'serial_number')
+    SUPPORT_FLAGS = {'supports_pin_auth': 0x935a, 'supports_944c': 0x944c, 'supports_952a': 0x952a}
+    KEYS = (('standard_version', 'vendor_extension_id', 'vendor_description') + STRINGS + ARRAYS
+            + ('operation_count',) + tuple(SUPPORT_FLAGS))
+
+    # 시리얼 번호 → {데이터셋 해시: PTPDeviceInfo} (인증 전/후처럼 한 카메라가 보내는 데이터셋은 몇 개뿐)
+    cache: Dict[str, Dict[bytes, 'PTPDeviceInfo']] = {}
+    cache_lock = threading.Lock()
+    CACHE_PER_SERIAL = 4
+
+    def __init__(self, data: bytes, digest: bytes = b''):
+        self.data = bytes(data)
+        self.digest = digest
+        self.decoded: dict = {}
+        self.supported: Optional[frozenset] = None  # 동작 코드 집합 (supports_* 조회용)
+        self.offsets = self._layout(memoryview(self.data))
+
+    @classmethod
+    def parse(cls, data: bytes) -> Optional['PTPDeviceInfo']:
+        """DeviceInfo 데이터셋 → PTPDeviceInfo (데이터가 짧으면 None, 같은 카메라의 같은 데이터셋이면 캐시된 객체)"""
+        if len(data) < ptp_codec.DEVICE_INFO_HEADER.size:
+            return None
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        info = cls(data, digest)
+        serial_number = info['serial_number']
+        with cls.cache_lock:
+            entries = cls.cache.setdefault(serial_number, {})
+            cached = entries.get(digest)
+            if cached is not None:
+                return cached
+            if len(entries) >= cls.CACHE_PER_SERIAL:
+                entries.pop(next(iter(entries)))  # 가장 먼저 들어온 데이터셋
+            entries[digest] = info
+        return info
+
+    def _layout(self, buf: memoryview) -> dict:
+        """배열은 개수만, 문자열은 길이만 읽고 건너뛰며 각 필드의 시작 오프셋을 계산 (데이터가 끊기면 거기까지)"""
+        offsets = {}
+        offset = ptp_codec.DEVICE_INFO_HEADER.size
+        offsets['vendor_description'] = offset
+        offset += 1 + buf[offset] * 2 + 2 if offset < len(buf) else 0  # 벤더 설명 + Functional Mode
+        for name in self.ARRAYS:
+            if offset + 4 > len(buf):
+                return offsets
+            offsets[name] = offset
+            offset += 4 + ptp_codec.UINT32.unpack_from(buf, offset)[0] * 2
+        for name in self.STRINGS:
+            if offset >= len(buf):
+                return offsets
+            offsets[name] = offset
+            offset += 1 + buf[offset] * 2
+        return offsets
+
+    def _decode(self, key: str):
+        buf = memoryview(self.data)
+        if key == 'standard_version':
+            return ptp_codec.UINT16.unpack_from(buf, 0)[0]
+        if key == 'vendor_extension_id':
+            return ptp_codec.UINT32.unpack_from(buf, 2)[0]
+        if key in self.ARRAYS:
+            offset = self.offsets.get(key)
+            return ptp_codec.read_uint16_array(buf, offset)[0] if offset is not None else []
+        if key in self.STRINGS or key == 'vendor_description':
+            offset = self.offsets.get(key)
+            return ptp_codec.read_string(buf, offset)[0] if offset is not None else ''
+        if key == 'operation_count':
+            return len(self['operations'])
+        if key in self.SUPPORT_FLAGS:
+            if self.supported is None:
+                self.supported = frozenset(self['operations'])
+            return self.SUPPORT_FLAGS[key] in self.supported
+        raise KeyError(key)
+
+    def __getitem__(self, key: str):
+        try:
+            return self.decoded[key]
+        except KeyError:
+            value = self.decoded[key] = self._decode(key)
+            return value
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+    def to_dict(self) -> dict:
+        return dict(self)
+
+    def __repr__(self):
+        return f"PTPDeviceInfo(model={self['model']!r}, serial_number={self['serial_number']!r})"
+
+
+class PTPObjectInfo:
+    """
+    GetObjectInfo 데이터셋 하나를 디코딩한 객체 정보 레코드
+
+    목록 조회처럼 수천 개를 만들 때 dict보다 가볍도록 __slots__를 쓰고 고정 길이 52바이트는 미리 컴파일한
+    Struct(ptp_codec.OBJECT_INFO_FIXED)로 한 번에 읽는다.
+    """
+
+    __slots__ = ('handle', 'storage_id', 'object_format', 'protection_status', 'compressed_size',
+                 'thumb_format', 'thumb_compressed_size', 'thumb_width', 'thumb_height',
+                 'image_width', 'image_height', 'image_bit_depth', 'parent_object',
+                 'association_type', 'association_desc', 'sequence_number',
+                 'filename', 'capture_date', 'modification_date', 'keywords')
+
+    FOLDER_FORMAT = 0x3001  # PTP_OFC_Association
+
+    @classmethod
+    def parse(cls, data: ptp_codec.Buffer, handle: int = 0) -> Optional['PTPObjectInfo']:
+        """ObjectInfo 데이터셋을 레코드로 변환 (데이터가 짧으면 None)"""
+        if len(data) < ptp_codec.OBJECT_INFO_FIXED.size:
+            return None
+        buf = memoryview(data)
+        info = cls.__new__(cls)
+        info.handle = handle
+        (info.storage_id, info.object_format, info.protection_status, info.compressed_size,
+         info.thumb_format, info.thumb_compressed_size, info.thumb_width, info.thumb_height,
+         info.image_width, info.image_height, info.image_bit_depth, info.parent_object,
+         info.association_type, info.association_desc,
+         info.sequence_number) = ptp_codec.OBJECT_INFO_FIXED.unpack_from(buf, 0)
+
+        # 가변 길이 PTP 문자열 4개
+        (info.filename, info.capture_date, info.modification_date,
+         info.keywords), _ = ptp_codec.read_strings(buf, ptp_codec.OBJECT_INFO_FIXED.size, 4)
+        return info
+
+    @property
+    def is_folder(self) -> bool:
+        return self.object_format == self.FOLDER_FORMAT
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return (f"PTPObjectInfo(handle=0x{self.handle:08x}, filename={self.filename!r}, "
+                f"size={self.compressed_size}, capture_date={self.capture_date!r})")
+
+
+class PTPStorageInfo:
+    """GetStorageInfo 데이터셋 하나를 디코딩한 저장소(메모리 카드) 정보 레코드"""
+
+    __slots__ = ('storage_id', 'storage_type', 'filesystem_type', 'access_capability',
+                 'max_capacity', 'free_bytes', 'free_images', 'description', 'volume_label', 'updated_at')
+
+    FILESYSTEM_TYPES = {0x0001: "Flat", 0x0002: "Hierarchical", 0x0003: "DCF"}
+    FREE_IMAGES_UNKNOWN = 0xFFFFFFFF  # 카메라가 남은 촬영 매수를 알려주지 않음
+
+    @classmethod
+    def parse(cls, data: ptp_codec.Buffer, storage_id: int = 0) -> Optional['PTPStorageInfo']:
+        """StorageInfo 데이터셋을 레코드로 변환 (데이터가 짧으면 None)"""
+        if len(data) < ptp_codec.STORAGE_INFO_FIXED.size:
+            return None
+        buf = memoryview(data)
+        info = cls.__new__(cls)
+        info.storage_id = storage_id
+        (info.storage_type, info.filesystem_type, info.access_capability,
+         info.max_capacity, info.free_bytes, info.free_images) = ptp_codec.STORAGE_INFO_FIXED.unpack_from(buf, 0)
+        (info.description, info.volume_label), _ = ptp_codec.read_strings(buf, ptp_codec.STORAGE_INFO_FIXED.size, 2)
+        info.updated_at = time.time()
+        return info
+
+    @property
+    def filesystem_name(self) -> str:
+        return self.FILESYSTEM_TYPES.get(self.filesystem_type, f"0x{self.filesystem_type:04x}")
+
+    @property
+    def free_ratio(self) -> float:
+        return self.free_bytes / self.max_capacity if self.max_capacity else 0.0
+
+    def to_dict(self) -> dict:
+        result = {name: getattr(self, name) for name in self.__slots__}
+        result['filesystem_name'] = self.filesystem_name
+        result['free_ratio'] = self.free_ratio
+        return result
+
+    def __repr__(self):
+        return (f"PTPStorageInfo(storage_id=0x{self.storage_id:08x}, description={self.description!r}, "
+                f"free={self.free_bytes}/{self.max_capacity})")
+
+
+class PTPPropertyDesc:
+    """
+    GetDevicePropDesc 데이터셋 하나를 디코딩한 장치 속성 설명 레코드
+
+    모든 PTP 데이터 형식(정수 8~128비트, 부호 있음/없음, 배열, 문자열)을 지원하며 form은
+    'none', 'range'(minimum/maximum/step) 또는 'enum'(choices) 중 하나다.
+    """
+
+    __slots__ = ('code', 'datatype', 'writable', 'factory_default', 'current_value',
+                 'form', 'minimum', 'maximum', 'step', 'choices')
+
+    @classmethod
+    def parse(cls, data: ptp_codec.Buffer) -> Optional['PTPPropertyDesc']:
+        """DevicePropDesc 데이터셋을 레코드로 변환 (형식이 맞지 않으면 None)"""
+        decode = ptp_codec.decode_value
+        try:
+            buf = memoryview(data)
+            desc = cls.__new__(cls)
+            desc.code, desc.datatype, get_set = ptp_codec.PROP_DESC_HEADER.unpack_from(buf, 0)
+            desc.writable = get_set == 0x01
+            offset = ptp_codec.PROP_DESC_HEADER.size
+            desc.factory_default, offset = decode(buf, offset, desc.datatype)
+            desc.current_value, offset = decode(buf, offset, desc.datatype)
+
+            desc.form = 'none'
+            desc.minimum = desc.maximum = desc.step = None
+            desc.choices = None
+            form_flag = buf[offset] if offset < len(buf) else ptp_codec.FORM_NONE
+            offset += 1
+            if form_flag == ptp_codec.FORM_RANGE:
+                desc.form = 'range'
+                desc.minimum, offset = decode(buf, offset, desc.datatype)
+                desc.maximum, offset = decode(buf, offset, desc.datatype)
+                desc.step, offset = decode(buf, offset, desc.datatype)
+            elif form_flag == ptp_codec.FORM_ENUM:
+                desc.form = 'enum'
+                count = ptp_codec.UINT16.unpack_from(buf, offset)[0]
+                offset += 2
+                scalar = ptp_codec.SCALARS.get(desc.datatype)
+                if scalar is not None:
+                    # 고정 크기 선택지는 한 번에 읽음
+                    desc.choices = list(struct.unpack_from(f'<{count}{scalar.format[-1]}', buf, offset))
+                else:
+                    desc.choices = []
+                    for _ in range(count):
+                        value, offset = decode(buf, offset, desc.datatype)
+                        desc.choices.append(value)
+            return desc
+        except (struct.error, IndexError, ValueError) as e:
+            logger.error(f"장치 속성 설명 파싱 실패: {e}")
+            return None
+
+    def accepts(self, value) -> bool:
+        """값이 이 속성의 enum/range 조건을 만족하는지"""
+        if self.form == 'enum':
+            return value in self.choices
+        if self.form == 'range':
+            if not self.minimum <= value <= self.maximum:
+                return False
+            return not self.step or (value - self.minimum) % self.step == 0
+        return True
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return (f"PTPPropertyDesc(code=0x{self.code:04x}, datatype=0x{self.datatype:04x}, "
+                f"value={self.current_value!r}, form={self.form})")
+
+
+class PTPEventBus:
+    """
+    디코딩된 이벤트를 구독자에게 전달하고 최근 이벤트를 링 버퍼에 보관하는 이벤트 버스
+
+    - subscribe(code, callback): 해당 코드(None이면 모든 이벤트)의 이벤트마다 이벤트 스레드에서 callback(event) 호출
+    - wait_for(code, predicate, timeout, since): 조건에 맞는 이벤트를 기다림. 명령을 보내기 전에 sequence를
+      since로 기록해 두면 명령 응답보다 먼저 도착한 이벤트도 놓치지 않는다.
+    링 버퍼가 가득 차면 가장 오래된 이벤트부터 버려지며 dropped에 집계된다.
+    """
+
+    def __init__(self, backlog: int = 256):
+        self._events: deque = deque(maxlen=backlog)
+        self._condition = threading.Condition()
+        self._subscribers: dict = {}  # 이벤트 코드(None은 전체) → 콜백 튜플
+        self.sequence = 0  # 마지막으로 게시된 이벤트의 일련번호
+        self.dropped = 0  # 링 버퍼에서 밀려난 이벤트 수
+        self.callback_errors = 0  # 예외를 던진 구독자 콜백 호출 수
+
+    def subscribe(self, event_code: Optional[int], callback: Callable[['PTPEvent'], None]):
+        """이벤트 코드별 콜백 등록 (event_code=None이면 모든 이벤트)"""
+        with self._condition:
+            self._subscribers[event_code] = self._subscribers.get(event_code, ()) + (callback,)
+
+    def unsubscribe(self, event_code: Optional[int], callback: Callable[['PTPEvent'], None]):
+        """subscribe로 등록한 콜백 해제"""
+        with self._condition:
+            callbacks = tuple(c for c in self._subscribers.get(event_code, ()) if c is not callback)
+            if callbacks:
+                self._subscribers[event_code] = callbacks
+            else:
+                self._subscribers.pop(event_code, None)
+
+    def publish(self, event: 'PTPEvent'):
+        """이벤트를 링 버퍼에 넣고 대기 중인 wait_for와 구독자에게 알림 (이벤트 스레드에서 호출)"""
+        with self._condition:
+            self.sequence += 1
+            event.sequence = self.sequence
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            callbacks = self._subscribers.get(event.code, ()) + self._subscribers.get(None, ())
+            self._condition.notify_all()
+
+        # 콜백은 잠금 밖에서 호출 (콜백 안에서 subscribe/wait_for를 불러도 교착되지 않도록)
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                self.callback_errors += 1
+                logger.error(f"❌ 이벤트 콜백 오류: 0x{event.code:04x}, {e}")
+
+    def wait_for(self, event_code: Optional[int], predicate: Optional[Callable[['PTPEvent'], bool]] = None,
+                 timeout: Optional[float] = None, since: Optional[int] = None) -> Optional['PTPEvent']:
+        """
+        since 이후에 게시된 이벤트 중 코드와 predicate가 맞는 첫 이벤트를 반환 (타임아웃 시 None)
+
+        since를 생략하면 호출 시점 이후의 이벤트만 기다린다.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            last_seen = self.sequence if since is None else since
+            while True:
+                for event in self._events:
+                    if event.sequence <= last_seen:
+                        continue
+                    last_seen = event.sequence
+                    if event_code is not None and event.code != event_code:
+                        continue
+                    if predicate is None or predicate(event):
+                        return event
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+
+class PooledFileSink:
+    """ObjectWriterPool에서 연 파일 하나 - write()는 쓰기 스레드에 넘기고 바로 반환"""
+
+    def __init__(self, pool: 'ObjectWriterPool', path: str):
+        self.path = path
+        self._pool = pool
+        self._part_path = path + '.part'  # 완료 전까지는 임시 이름으로 기록
+        self._file = open(self._part_path, 'wb')
+        self._lock = threading.Lock()
+        self._offset = 0
+        self._pending = 0
+        self._closing = False
+        self._success = True
+        self._error: Optional[Exception] = None
+
+    def write(self, chunk) -> int:
+        """수신 버퍼의 조각을 복사해 쓰기 스레드에 넘김 (대기 중인 조각 수가 한도를 넘으면 블록)"""
+        data = bytes(chunk)
+        offset = self._offset
+        self._offset += len(data)
+        self._pool._slots.acquire()
+        with self._lock:
+            self._pending += 1
+        self._pool._executor.submit(self._write_at, offset, data)
+        return len(data)
+
+    def _write_at(self, offset: int, data: bytes):
+        try:
+            with self._lock:
+                if self._error is None:
+                    self._file.seek(offset)
+                    self._file.write(data)
+        except Exception as e:
+            self._error = e
+        finally:
+            self._pool._slots.release()
+            with self._lock:
+                self._pending -= 1
+                finalize = self._closing and self._pending == 0
+            if finalize:
+                self._finalize()
+
+    def close(self, success: bool = True):
+        """기록이 모두 끝나면 임시 파일을 최종 이름으로 바꾸도록 예약 (네트워크 스레드는 기다리지 않음)"""
+        with self._lock:
+            self._closing = True
+            self._success = success
+            finalize = self._pending == 0
+        if finalize:
+            self._finalize()
+
+    def _finalize(self):
+        try:
+            self._file.close()
+            if self._success and self._error is None:
+                os.replace(self._part_path, self.path)
+                self._pool._record(self.path, self._offset, None)
+            else:
+                os.remove(self._part_path)
+                self._pool._record(self.path, 0, self._error or Exception("수신 실패"))
+        except Exception as e:
+            self._pool._record(self.path, 0, e)
+
+
+class ObjectWriterPool:
+    """
+    네트워크 수신과 디스크 쓰기를 겹치기 위한 크기가 제한된 쓰기 스레드 풀
+
+    대기 중인 조각 수를 max_pending_chunks로 제한해 디스크가 느려도 메모리 사용량이 늘지 않는다.
+    """
+
+    def __init__(self, workers: int = 4, max_pending_chunks: int = 64):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ptp-writer')
+        self._slots = threading.BoundedSemaphore(max_pending_chunks)
+        self._results_lock = threading.Lock()
+        self.completed: List[Tuple[str, int]] = []  # (경로, 바이트 수)
+        self.failed: List[Tuple[str, Exception]] = []  # (경로, 오류)
+        self._paths = set()  # 이 풀에서 연 경로 (같은 경로를 두 번 열면 .part와 결과가 섞임)
+
+    def open(self, path: str) -> PooledFileSink:
+        """path를 쓰기용으로 열기 (이 풀에서 이미 연 경로면 FileExistsError)"""
+        with self._results_lock:
+            if path in self._paths:
+                raise FileExistsError(f"같은 경로를 두 번 기록할 수 없음: {path}")
+            self._paths.add(path)
+        return PooledFileSink(self, path)
+
+    def _record(self, path: str, size: int, error: Optional[Exception]):
+        with self._results_lock:
+            if error is None:
+                self.completed.append((path, size))
+            else:
+                logger.error(f"❌ 파일 기록 실패: {path} ({error})")
+                self.failed.append((path, error))
+
+    def shutdown(self):
+        """남은 쓰기 작업이 모두 끝날 때까지 대기"""
+        self._executor.shutdown(wait=True)
+
+
+class PTPIPProtocol:
+    """
+    PTP/IP 패킷 상수와 소켓에 의존하지 않는 패킷 생성/파싱 메서드
+
+    동기 클라이언트(PTPIPClient)와 asyncio 클라이언트(AsyncPTPIPClient)가 함께 사용한다.
+    """
+
+    # 패킷 로그에서 관찰된 공식 안드로이드 앱의 GUID (카메라는 이 GUID 단위로 연결을 승인)
+    CLIENT_GUID = bytes.fromhex('e9dca7d89c7b440dba010f9e04c0ec23')
 
     # PTP/IP 패킷 타입 정의
     PTPIP_INIT_COMMAND_REQUEST = 1  # 명령 채널 초기화 요청
@@ -63,6 +662,8 @@ class PTPIPClient:
     PTPIP_DATA_PACKET = 10  # 데이터 패킷
     PTPIP_CANCEL_TRANSACTION = 11  # 트랜잭션 취소
     PTPIP_END_DATA_PACKET = 12  # 데이터 패킷 종료
+    PTPIP_PROBE_REQUEST = 13  # 연결 확인 요청 (카메라 → 클라이언트, 이벤트 채널)
+    PTPIP_PROBE_RESPONSE = 14  # 연결 확인 응답
 
     # PTP 동작 코드 정의 (순서대로 정리)
     PTP_OC_GetDeviceInfo = 0x1001  # 장치 정보 가져오기
@@ -133,8 +734,243 @@ class PTPIPClient:
     PTP_RC_TRANSACTION_CANCELLED = 0x201F  # 트랜잭션 취소됨
     PTP_RC_SPECIFICATION_OF_DESTINATION_UNSUPPORTED = 0x2020  # 목적지 지정 지원 안함
 
+    # PTP 객체 형식 코드
+    PTP_OFC_Association = 0x3001  # 폴더 (Association)
+
     # PTP 이벤트 코드 정의
+    PTP_EC_CancelTransaction = 0x4001  # 트랜잭션 취소
+    PTP_EC_ObjectAdded = 0x4002  # 객체 추가 (새 사진 등)
+    PTP_EC_ObjectRemoved = 0x4003  # 객체 삭제
+    PTP_EC_StoreAdded = 0x4004  # 저장소 추가 (카드 삽입)
+    PTP_EC_StoreRemoved = 0x4005  # 저장소 제거 (카드 제거)
+    PTP_EC_DevicePropChanged = 0x4006  # 장치 속성 변경
+    PTP_EC_ObjectInfoChanged = 0x4007  # 객체 정보 변경
     PTP_EC_DeviceInfoChanged = 0x4008  # 장치 정보 변경 이벤트
+    PTP_EC_RequestObjectTransfer = 0x4009  # 객체 전송 요청
+    PTP_EC_StoreFull = 0x400A  # 저장소 가득 참
+    PTP_EC_StorageInfoChanged = 0x400C  # 저장소 정보 변경
+    PTP_EC_CaptureComplete = 0x400D  # 촬영 완료
+
+    # 니콘 전용 이벤트 코드
+    NIKON_EC_ObjectAddedInSDRAM = 0xC101  # 카드 없이 카메라 메모리(SDRAM)에 객체 추가
+    NIKON_EC_CaptureCompleteRecInSdram = 0xC102  # SDRAM 기록 촬영 완료
+    NIKON_EC_AdvancedTransfer = 0xC103  # 고급 전송
+    NIKON_EC_PreviewImageAdded = 0xC104  # 미리보기 이미지 추가
+
+    # 데이터 단계에서 카메라 → 클라이언트로 데이터를 받는 오퍼레이션 (data_phase=1)
+    DATA_IN_OPERATIONS = frozenset([
+        PTP_OC_GetDeviceInfo,
+        PTP_OC_GetStorageIDs,
+        PTP_OC_GetStorageInfo,
+        PTP_OC_GetObjectHandles,
+        PTP_OC_GetObjectInfo,
+        PTP_OC_GetObject,
+        PTP_OC_GetThumb,
+        PTP_OC_GetDevicePropDesc,
+        PTP_OC_GetDevicePropValue,
+        PTP_OC_GetPartialObject,
+        NIKON_OC_UNKNOWN_944C,
+        0x952b  # 0x952b도 데이터 수신 오퍼레이션
+    ])
+
+    # 공식앱 캡처 Frame 45의 0x935a 연결 승인 요청 (data_phase=1, 트랜잭션 ID 2, 매개변수 0x2001)
+    FRAME_45_PIN_AUTH_PACKET = bytes.fromhex("16000000" "06000000" "01000000" "5a93" "02000000" "01200000")
+
+    def _get_event_name(self, event_code: int) -> str:
+        """이벤트 코드의 이름을 반환하는 메서드"""
+        event_names = {
+            # 표준 PTP 이벤트 코드
+            0x4001: "CancelTransaction",
+            0x4002: "ObjectAdded",
+            0x4003: "ObjectRemoved",
+            0x4004: "StoreAdded",
+            0x4005: "StoreRemoved",
+            0x4006: "DevicePropChanged",
+            0x4007: "ObjectInfoChanged",
+            0x4008: "DeviceInfoChanged",
+            0x4009: "RequestObjectTransfer",
+            0x400A: "StoreFull",
+            0x400C: "StorageInfoChanged",
+            0x400D: "CaptureComplete",
+
+            # 니콘 전용 이벤트 코드
+            0xC101: "ObjectAddedInSDRAM (Nikon)",
+            0xC102: "CaptureCompleteRecInSdram (Nikon)",
+            0xC103: "AdvancedTransfer (Nikon)",
+            0xC104: "PreviewImageAdded (Nikon)"
+        }
+        return event_names.get(event_code, f"Unknown(0x{event_code:04x})")
+
+    def _parse_event(self, payload: bytes) -> 'PTPEvent':
+        """이벤트 패킷 payload 파싱: [이벤트코드(2)] [트랜잭션ID(4)] [매개변수들(4바이트씩, 최대 3개)]"""
+        event_code, transaction_id = struct.unpack_from('<HI', payload, 0)
+        param_count = (len(payload) - 6) // 4
+        parameters = struct.unpack_from(f'<{param_count}I', payload, 6)
+        return PTPEvent(event_code, transaction_id, parameters)
+
+    def _get_operation_name(self, op_code: int) -> str:
+        """오퍼레이션 코드의 이름을 반환하는 메서드"""
+        op_names = {
+            # 표준 PTP 오퍼레이션 코드
+            0x1001: "GetDeviceInfo",
+            0x1002: "OpenSession",
+            0x1003: "CloseSession",
+            0x1004: "GetStorageIDs",
+            0x1005: "GetStorageInfo",
+            0x1006: "GetNumObjects",
+            0x1007: "GetObjectHandles",
+            0x1008: "GetObjectInfo",
+            0x1009: "GetObject",
+            0x100A: "GetThumb",
+            0x100B: "DeleteObject",
+            0x100C: "SendObjectInfo",
+            0x100D: "SendObject",
+            0x100E: "InitiateCapture",
+            0x100F: "FormatStore",
+            0x1010: "ResetDevice",
+            0x1011: "SelfTest",
+            0x1012: "SetObjectProtection",
+            0x1013: "PowerDown",
+            0x1014: "GetDevicePropDesc",
+            0x1015: "GetDevicePropValue",
+            0x1016: "SetDevicePropValue",
+            0x1017: "ResetDevicePropValue",
+            0x1018: "TerminateOpenCapture",
+            0x1019: "MoveObject",
+            0x101A: "CopyObject",
+            0x101B: "GetPartialObject",
+            0x101C: "InitiateOpenCapture",
+
+            # 니콘 전용 오퍼레이션 코드
+            0x935a: "PIN_AUTH (Nikon)",
+            0x944c: "Unknown_944C (Nikon)",
+            0x952a: "Unknown_952A (Nikon)"
+        }
+        return op_names.get(op_code, f"Unknown(0x{op_code:04x})")
+
+    def _get_property_name(self, prop_code: int) -> str:
+        """장치 속성 코드의 이름을 반환하는 메서드"""
+        prop_names = {
+            # 표준 PTP 장치 속성 코드
+            0x5001: "BatteryLevel",
+            0x5002: "FunctionalMode",
+            0x5003: "ImageSize",
+            0x5004: "CompressionSetting",
+            0x5005: "WhiteBalance",
+            0x5006: "RGBGain",
+            0x5007: "FNumber",
+            0x5008: "FocalLength",
+            0x5009: "FocusDistance",
+            0x500A: "FocusMode",
+            0x500B: "ExposureMeteringMode",
+            0x500C: "FlashMode",
+            0x500D: "ExposureTime",
+            0x500E: "ExposureProgramMode",
+            0x500F: "ExposureIndex",
+            0x5010: "ExposureBiasCompensation",
+            0x5011: "DateTime",
+            0x5012: "CaptureDelay",
+            0x5013: "StillCaptureMode",
+            0x5014: "Contrast",
+            0x5015: "Sharpness",
+            0x5016: "DigitalZoom",
+            0x5017: "EffectMode",
+            0x5018: "BurstNumber",
+            0x5019: "BurstInterval",
+            0x501A: "TimelapseNumber",
+            0x501B: "TimelapseInterval",
+            0x501C: "FocusMeteringMode",
+            0x501D: "UploadURL",
+            0x501E: "Artist",
+            0x501F: "CopyrightInfo",
+        }
+        return prop_names.get(prop_code, f"Unknown(0x{prop_code:04x})")
+
+    def _build_command_packet(self, op_code: int, parameters: List[int], data_phase: int,
+                              transaction_id: int) -> bytes:
+        """일반적인 PTP/IP CMD_REQUEST 패킷 생성: [길이:4] [타입:4] [data_phase:4] [코드:2] [트랜잭션ID:4] [매개변수들...]"""
+        packet_length = 18 + len(parameters) * 4
+        packet = struct.pack('<II', packet_length, self.PTPIP_CMD_REQUEST)
+        packet += struct.pack('<IHI', data_phase, op_code, transaction_id)
+        for param in parameters:
+            packet += struct.pack('<I', param)
+        return packet
+
+    def _parse_device_info(self, data: bytes) -> Optional[PTPDeviceInfo]:
+        """
+        장치 정보 데이터를 PTPDeviceInfo로 변환하는 메서드
+
+        코드 배열과 문자열은 접근할 때 디코딩되며, 같은 카메라가 같은 데이터셋을 다시 보내면 이전 결과를 재사용한다.
+        """
+        logger.debug(f"장치 정보 데이터 크기: {len(data)} 바이트")
+        device_info = PTPDeviceInfo.parse(data)
+        if device_info is None:
+            logger.error("장치 정보 데이터가 너무 짧음")
+            return None
+        logger.info(f"장치 정보: {device_info['manufacturer']} {device_info['model']} "
+                    f"(S/N {device_info['serial_number']})")
+        return device_info
+
+    def _parse_storage_ids(self, data: bytes) -> list:
+        """저장소 ID 데이터를 파싱하는 메서드"""
+        logger.info("저장소 ID 파싱 시작")
+        logger.debug(f"파싱할 데이터 크기: {len(data)} 바이트")
+        logger.debug(f"저장소 ID 데이터: {data.hex()}")
+
+        if len(data) < 4:
+            logger.error("저장소 ID 데이터가 너무 짧음")
+            return []
+
+        try:
+            # PTP 배열 형태: [개수(4바이트)] [ID1(4바이트)] [ID2(4바이트)] ...
+            storage_count = ptp_codec.UINT32.unpack_from(data, 0)[0]
+            storage_ids, _ = ptp_codec.read_uint32_array(data, 0)
+            if len(storage_ids) < storage_count:
+                logger.warning(f"저장소 ID 데이터 부족: {len(storage_ids)}/{storage_count}")
+            logger.debug(f"저장소 ID: {', '.join(f'0x{storage_id:08x}' for storage_id in storage_ids)}")
+
+            logger.info(f"총 {len(storage_ids)}개의 저장소 ID 파싱 완료")
+            return storage_ids
+
+        except Exception as e:
+            logger.error(f"저장소 ID 파싱 중 오류: {e}")
+            return []
+
+    def _parse_object_handles(self, data: bytes):
+        """
+        객체 핸들 배열을 파싱하는 메서드: [개수(4바이트)] [핸들1(4바이트)] ...
+
+        핸들이 수만 개일 수 있으므로 목록 대신 ptp_codec.read_uint32_vector의 배열을 반환한다 (tolist()로 변환).
+        """
+        if len(data) < 4:
+            logger.error("객체 핸들 데이터가 너무 짧음")
+            return ptp_codec.read_uint32_vector(b'', 0)[0]
+
+        handle_count = ptp_codec.UINT32.unpack_from(data, 0)[0]
+        handles, _ = ptp_codec.read_uint32_vector(data, 0)
+        if len(handles) < handle_count:
+            logger.warning(f"객체 핸들 데이터 부족: {len(handles)}/{handle_count}")
+
+        logger.info(f"총 {len(handles)}개의 객체 핸들 파싱 완료")
+        return handles
+
+    # PTP String 읽기: [문자 수(1바이트)] [UTF-16LE 문자열...] -> (문자열, 다음 오프셋)
+    _read_ptp_string = staticmethod(ptp_codec.read_string)
+
+    def _parse_object_info(self, data: bytes, handle: int = 0) -> dict:
+        """ObjectInfo 데이터셋을 파싱하는 메서드 (PTPObjectInfo 레코드의 dict 형태)"""
+        info = PTPObjectInfo.parse(data, handle)
+        if info is None:
+            logger.error(f"객체 정보 데이터가 너무 짧음: {len(data)} 바이트")
+            return {}
+
+        logger.debug(f"객체 정보: {info.filename}, {info.compressed_size} 바이트, "
+                     f"형식=0x{info.object_format:04x}, 촬영={info.capture_date}")
+        return info.to_dict()
+
+
+class PTPIPClient(PTPIPProtocol):
+    """니콘 카메라와 PTP/IP 프로토콜로 통신하는 클라이언트 클래스"""
 
     # 실제 패킷 로그에서 관찰된 오퍼레이션 순서 (STA 모드)
     # 1. GetDeviceInfo (0x1001) - Transaction ID: 0
@@ -146,6 +982,10 @@ class PTPIPClient:
     # 7. Unknown_944C (0x944c) - Transaction ID: 1 (재연결 후)
     # 8. Unknown_952A (0x952a) - Transaction ID: 2 (재연결 후)
 
+    # 장치 속성 설명 캐시 (카메라 시리얼 → {속성 코드: PTPPropertyDesc}) - 재연결해도 모든 연결이 공유
+    property_desc_cache: dict = {}
+    property_desc_cache_lock = threading.Lock()
+
     def __init__(self, camera_ip: str, camera_port: int = 15740):
         """
         PTP/IP 클라이언트 초기화
@@ -162,6 +1002,9 @@ class PTPIPClient:
 
         self.command_socket: Optional[socket.socket] = None  # 명령 채널 소켓
         self.event_socket: Optional[socket.socket] = None  # 이벤트 채널 소켓
+        self.command_reader: Optional[PTPIPPacketReader] = None  # 명령 채널 프레임 리더
+        self.event_reader: Optional[PTPIPPacketReader] = None  # 이벤트 채널 프레임 리더
+        self.socket_timeout = 10.0  # 연결과 명령 응답을 기다리는 소켓 타임아웃 (초)
 
         # 세션 및 트랜잭션 관리
         self.session_id = 1  # 세션 ID
@@ -170,13 +1013,35 @@ class PTPIPClient:
 
         # 클라이언트 식별 정보
         # 패킷 로그에서 관찰된 실제 GUID와 이름 사용 (안드로이드 앱)
-        self.client_guid = bytes.fromhex('e9dca7d89c7b440dba010f9e04c0ec23')  # 안드로이드 앱 GUID
+        self.client_guid = self.CLIENT_GUID  # 안드로이드 앱 GUID
         self.client_name = "Android Device"  # 안드로이드 디바이스 이름
 
         # 이벤트 처리 관련
         self.event_thread: Optional[threading.Thread] = None  # 이벤트 모니터링 스레드
-        self.event_received = threading.Event()  # 이벤트 수신 신호
-        self.device_info_changed = False  # 장치 정보 변경 플래그
+        self.events = PTPEventBus()  # 디코딩된 이벤트 구독/대기
+
+        # 명령 채널은 한 번에 하나의 트랜잭션만 진행 (이벤트 처리 스레드 등과 공유)
+        self.command_lock = threading.RLock()
+
+        # 자동 수집 (새 객체 이벤트 → 다운로드)
+        self.ingest_queue: Optional[queue.Queue] = None
+        self.ingest_thread: Optional[threading.Thread] = None
+        self.device_info: Optional[PTPDeviceInfo] = None  # 마지막으로 받은 장치 정보 (시리얼 번호 등)
+
+        # 저장소 정보 캐시 (폴링하지 않고 StoreAdded/StoreRemoved/StorageInfoChanged 이벤트로만 무효화)
+        self.storage_lock = threading.Lock()
+        self.storage_ids: Optional[List[int]] = None  # None이면 아직 조회 전
+        self.storage_info: dict = {}  # 저장소 ID → PTPStorageInfo
+        self.stale_storage: set = set()  # 이벤트로 바뀐 것이 알려져 다시 읽어야 하는 저장소 ID
+        for event_code in (self.PTP_EC_StoreAdded, self.PTP_EC_StoreRemoved,
+                           self.PTP_EC_StorageInfoChanged, self.PTP_EC_StoreFull):
+            self.events.subscribe(event_code, self._on_storage_event)
+
+        # 장치 속성 값 캐시 (설명은 시리얼별로 property_desc_cache에 공유, 값은 DevicePropChanged로 무효화)
+        self.property_lock = threading.Lock()
+        self.property_values: dict = {}  # 속성 코드 → 현재 값
+        self.pending_property_sets: dict = {}  # 설정을 보냈지만 DevicePropChanged로 아직 확인되지 않은 (값, 기한)
+        self.events.subscribe(self.PTP_EC_DevicePropChanged, self._on_property_changed)
 
         logger.info(f"클라이언트 GUID 설정: {self.client_guid.hex()}")
         logger.info(f"클라이언트 이름 설정: {self.client_name}")
@@ -190,8 +1055,8 @@ class PTPIPClient:
             # 명령 채널 생성
             logger.info("명령 채널 소켓 생성 중...")
             self.command_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.command_socket.settimeout(10)  # 10초 타임아웃 설정
-            logger.debug(f"명령 채널 소켓 생성 완료 - 타임아웃: 10초")
+            self.command_socket.settimeout(self.socket_timeout)
+            logger.debug(f"명령 채널 소켓 생성 완료 - 타임아웃: {self.socket_timeout}초")
 
             # 소켓 옵션 설정 (공식앱과 동일한 설정 시도)
             self.command_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -201,6 +1066,7 @@ class PTPIPClient:
             logger.info(f"명령 채널 연결 시도: {self.camera_ip}:{self.camera_port}")
             logger.debug("TCP 연결 시작...")
             self.command_socket.connect((self.camera_ip, self.camera_port))
+            self.command_reader = PTPIPPacketReader(self.command_socket)
             logger.info("✅ 명령 채널 TCP 연결 성공!")
 
             # 명령 채널 초기화 요청 전송
@@ -212,12 +1078,13 @@ class PTPIPClient:
             # 이벤트 채널 생성
             logger.info("이벤트 채널 소켓 생성 중...")
             self.event_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.event_socket.settimeout(10)  # 10초 타임아웃 설정
-            logger.debug(f"이벤트 채널 소켓 생성 완료 - 타임아웃: 10초")
+            self.event_socket.settimeout(self.socket_timeout)
+            logger.debug(f"이벤트 채널 소켓 생성 완료 - 타임아웃: {self.socket_timeout}초")
 
             logger.info(f"이벤트 채널 연결 시도: {self.camera_ip}:{self.camera_port}")
             logger.debug("TCP 연결 시작...")
             self.event_socket.connect((self.camera_ip, self.camera_port))
+            self.event_reader = PTPIPPacketReader(self.event_socket, buffer_size=4096)
             logger.info("✅ 이벤트 채널 TCP 연결 성공!")
 
             # 이벤트 채널 초기화 요청 전송
@@ -292,34 +1159,26 @@ class PTPIPClient:
         # 명령 채널 초기화 응답 수신
         try:
             logger.info("📥 명령 채널 초기화 응답 대기 중...")
-            logger.debug("📥 recv() 호출...")
-            response = self.command_socket.recv(1024)
-            logger.info(f"📥 응답 데이터 수신: {len(response)} 바이트")
-            logger.debug(f"📥 응답 원본 데이터: {response.hex()}")
-
-            if len(response) < 8:
-                logger.error("❌ 응답 데이터가 너무 짧음 (최소 8바이트 필요)")
-                logger.error(f"   실제 수신: {len(response)} 바이트")
-                return False
+            packet_type, payload = self.command_reader.read_packet()
+            logger.info(f"📥 응답 데이터 수신: {len(payload) + 8} 바이트")
+            logger.debug(f"📥 응답 원본 데이터: {payload.hex()}")
 
-            # 응답 헤더 파싱
-            length, packet_type = struct.unpack('<II', response[:8])
             logger.info(f"📥 응답 패킷 정보:")
-            logger.info(f"   길이: {length} 바이트")
+            logger.info(f"   길이: {len(payload) + 8} 바이트")
             logger.info(f"   타입: {packet_type}")
 
             if packet_type == self.PTPIP_INIT_COMMAND_ACK:
                 logger.info("✅ 명령 채널 초기화 응답 수신 성공 (PTPIP_INIT_COMMAND_ACK)")
 
                 # 연결 번호 및 카메라 정보 추출
-                if len(response) >= 12:
-                    self.connection_number = struct.unpack('<I', response[8:12])[0]
+                if len(payload) >= 4:
+                    self.connection_number = struct.unpack_from('<I', payload, 0)[0]
                     logger.info(f"📥 연결 번호 수신: {self.connection_number}")
 
                     # 카메라 이름 추출 (있는 경우)
-                    if len(response) > 12:
+                    if len(payload) > 4:
                         try:
-                            camera_name_data = response[12:]
+                            camera_name_data = bytes(payload[4:])
                             logger.debug(f"카메라 이름 원본 데이터: {camera_name_data.hex()}")
                             # UTF-16LE로 디코딩 시도
                             camera_name = camera_name_data.decode('utf-16le', errors='ignore').rstrip('\x00')
@@ -335,8 +1194,8 @@ class PTPIPClient:
             elif packet_type == self.PTPIP_INIT_FAIL:
                 logger.error("❌ 명령 채널 초기화 실패 응답 수신 (PTPIP_INIT_FAIL)")
                 # 실패 사유 코드 추출 (있는 경우)
-                if len(response) >= 12:
-                    fail_reason = struct.unpack('<I', response[8:12])[0]
+                if len(payload) >= 4:
+                    fail_reason = struct.unpack_from('<I', payload, 0)[0]
                     logger.error(f"   실패 사유 코드: {fail_reason}")
                 return False
 
@@ -378,17 +1237,9 @@ class PTPIPClient:
         # 이벤트 채널 초기화 응답 수신
         try:
             logger.info("이벤트 채널 초기화 응답 대기 중...")
-            response = self.event_socket.recv(1024)
-            logger.debug(f"응답 데이터 수신: {len(response)} 바이트")
-            logger.debug(f"응답 데이터: {response.hex()}")
-
-            if len(response) < 8:
-                logger.error("응답 데이터가 너무 짧음")
-                return False
-
-            # 응답 헤더 파싱
-            length, packet_type = struct.unpack('<II', response[:8])
-            logger.debug(f"응답 패킷 길이: {length}, 타입: {packet_type}")
+            # ACK 뒤에 바로 붙어 온 이벤트는 리더 버퍼에 남아 이벤트 스레드가 처리
+            packet_type, payload = self.event_reader.read_packet()
+            logger.debug(f"응답 패킷 길이: {len(payload) + 8}, 타입: {packet_type}")
 
             if packet_type == self.PTPIP_INIT_EVENT_ACK:
                 logger.info("이벤트 채널 초기화 응답 수신 성공")
@@ -410,160 +1261,768 @@ class PTPIPClient:
 
         while True:
             try:
-                # 이벤트 데이터 수신
-                data = self.event_socket.recv(1024)
-                if not data:
-                    logger.warning("이벤트 소켓에서 데이터 수신 중단")
-                    break
-
-                logger.debug(f"이벤트 데이터 수신: {len(data)} 바이트")
-                logger.debug(f"이벤트 데이터: {data.hex()}")
-
-                # 최소 헤더 크기 확인
-                if len(data) >= 8:
-                    length, packet_type = struct.unpack('<II', data[:8])
-                    logger.debug(f"이벤트 패킷 길이: {length}, 타입: {packet_type}")
-
-                    # 이벤트 패킷 처리
-                    if packet_type == self.PTPIP_EVENT and len(data) >= 18:
-                        # 이벤트 정보 파싱
-                        event_code = struct.unpack('<H', data[12:14])[0]
-                        transaction_id = struct.unpack('<I', data[14:18])[0]
-                        logger.info(f"이벤트 수신: 코드=0x{event_code:04x}, 트랜잭션ID={transaction_id}")
-
-                        # 특정 이벤트 처리
-                        if event_code == self.PTP_EC_DeviceInfoChanged:
-                            logger.info("장치 정보 변경 이벤트 수신 - 모든 기능 사용 가능!")
-                            self.device_info_changed = True
-                            self.event_received.set()
-                        else:
-                            logger.info(f"알 수 없는 이벤트 코드: 0x{event_code:04x}")
-
-                        # 이벤트에 추가 데이터가 있는 경우 처리
-                        if len(data) > 18:
-                            additional_data = data[18:]
-                            logger.debug(f"이벤트 추가 데이터: {additional_data.hex()}")
-
-                    else:
-                        logger.debug(f"알 수 없는 패킷 타입: {packet_type}")
-
+                # 한 번의 수신에 여러 이벤트가 붙어 오거나 한 이벤트가 나뉘어 와도 패킷 단위로 분리
+                packet_type, payload = self.event_reader.read_packet()
+                logger.debug(f"이벤트 패킷 길이: {len(payload) + 8}, 타입: {packet_type}")
+
+                if packet_type == self.PTPIP_EVENT and len(payload) >= 6:
+                    self._handle_event(self._parse_event(payload))
+                elif packet_type == self.PTPIP_PROBE_REQUEST:
+                    # 카메라의 연결 확인 요청에 응답하지 않으면 카메라가 연결을 끊음
+                    logger.debug("연결 확인 요청 수신 - 응답 전송")
+                    self.event_socket.sendall(struct.pack('<II', 8, self.PTPIP_PROBE_RESPONSE))
                 else:
-                    logger.warning("수신된 이벤트 데이터가 너무 짧음")
+                    logger.debug(f"알 수 없는 패킷 타입: {packet_type}")
 
             except socket.timeout:
                 logger.debug("이벤트 모니터링 타임아웃 (정상)")
                 continue
+            except ConnectionError as e:
+                logger.warning(f"이벤트 소켓에서 데이터 수신 중단: {e}")
+                break
             except Exception as e:
                 logger.error(f"이벤트 모니터링 중 오류 발생: {e}")
                 break
 
         logger.info("이벤트 모니터링 종료")
 
-    def _get_operation_name(self, op_code: int) -> str:
-        """오퍼레이션 코드의 이름을 반환하는 메서드"""
-        op_names = {
-            # 표준 PTP 오퍼레이션 코드
-            0x1001: "GetDeviceInfo",
-            0x1002: "OpenSession",
-            0x1003: "CloseSession",
-            0x1004: "GetStorageIDs",
-            0x1005: "GetStorageInfo",
-            0x1006: "GetNumObjects",
-            0x1007: "GetObjectHandles",
-            0x1008: "GetObjectInfo",
-            0x1009: "GetObject",
-            0x100A: "GetThumb",
-            0x100B: "DeleteObject",
-            0x100C: "SendObjectInfo",
-            0x100D: "SendObject",
-            0x100E: "InitiateCapture",
-            0x100F: "FormatStore",
-            0x1010: "ResetDevice",
-            0x1011: "SelfTest",
-            0x1012: "SetObjectProtection",
-            0x1013: "PowerDown",
-            0x1014: "GetDevicePropDesc",
-            0x1015: "GetDevicePropValue",
-            0x1016: "SetDevicePropValue",
-            0x1017: "ResetDevicePropValue",
-            0x1018: "TerminateOpenCapture",
-            0x1019: "MoveObject",
-            0x101A: "CopyObject",
-            0x101B: "GetPartialObject",
-            0x101C: "InitiateOpenCapture",
+    def _handle_event(self, event: 'PTPEvent'):
+        """디코딩된 이벤트를 처리하는 메서드 (이벤트 스레드에서 호출)"""
+        logger.info(f"이벤트 수신: {self._get_event_name(event.code)} (0x{event.code:04x}), "
+                    f"트랜잭션ID={event.transaction_id}, 매개변수={[f'0x{p:08x}' for p in event.parameters]}")
+
+        if event.code == self.PTP_EC_DeviceInfoChanged:
+            logger.info("장치 정보 변경 이벤트 수신 - 모든 기능 사용 가능!")
+
+        self.events.publish(event)
+
+    def _queue_ingest(self, event: 'PTPEvent'):
+        """새 객체 이벤트 구독자: 핸들을 자동 수집 큐로 전달"""
+        ingest_queue = self.ingest_queue
+        if ingest_queue is not None and event.parameters:
+            ingest_queue.put(event.parameters[0])
+            logger.debug(f"자동 수집 큐에 추가: 핸들=0x{event.parameters[0]:08x}")
+
+    def _on_storage_event(self, event: PTPEvent):
+        """저장소 이벤트로 캐시만 갱신 (이벤트 스레드에서 명령을 보내지 않도록 다시 읽기는 다음 조회 때)"""
+        storage_id = event.parameters[0] if event.parameters else None
+        with self.storage_lock:
+            if storage_id is None:
+                # 어느 저장소인지 모르면 목록부터 다시 읽고, 제거 이벤트면 캐시된 정보도 모두 버림
+                logger.warning(f"⚠️ 저장소 ID 없는 이벤트: 0x{event.code:04x}")
+                self.storage_ids = None
+                if event.code == self.PTP_EC_StoreRemoved:
+                    self.storage_info.clear()
+                    self.stale_storage.clear()
+                return
+
+            if event.code == self.PTP_EC_StoreRemoved:
+                self.storage_info.pop(storage_id, None)
+                self.stale_storage.discard(storage_id)
+                if self.storage_ids is not None and storage_id in self.storage_ids:
+                    self.storage_ids.remove(storage_id)
+                logger.info(f"💾 저장소 제거: 0x{storage_id:08x}")
+                return
+
+            if event.code == self.PTP_EC_StoreAdded:
+                if self.storage_ids is not None and storage_id not in self.storage_ids:
+                    self.storage_ids.append(storage_id)
+                logger.info(f"💾 저장소 추가: 0x{storage_id:08x}")
+            elif event.code == self.PTP_EC_StoreFull:
+                logger.warning(f"⚠️ 저장소 가득 참: 0x{storage_id:08x}")
+            self.stale_storage.add(storage_id)
+
+    def get_storage_info(self, storage_id: int, refresh: bool = False) -> Optional[PTPStorageInfo]:
+        """
+        저장소 정보 (용량, 남은 바이트/매수, 파일 시스템, 설명)
 
-            # 니콘 전용 오퍼레이션 코드
-            0x935a: "PIN_AUTH (Nikon)",
-            0x944c: "Unknown_944C (Nikon)",
-            0x952a: "Unknown_952A (Nikon)"
-        }
-        return op_names.get(op_code, f"Unknown(0x{op_code:04x})")
+        캐시된 값이 있고 그 뒤로 바뀌었다는 이벤트가 없으면 카메라에 묻지 않는다.
+        """
+        with self.storage_lock:
+            cached = self.storage_info.get(storage_id)
+            if cached is not None and not refresh and storage_id not in self.stale_storage:
+                return cached
+            self.stale_storage.discard(storage_id)
+
+        response_code, data = self._send_ptp_command(self.PTP_OC_GetStorageInfo, [storage_id])
+        info = PTPStorageInfo.parse(data, storage_id) if response_code == self.PTP_RC_OK else None
+        if info is None:
+            logger.error(f"저장소 정보 가져오기 실패: 0x{storage_id:08x}, 응답 코드 0x{response_code:04x}")
+            return None
 
-    def _parse_multiple_ptpip_packets(self, data: bytes) -> Tuple[bytes, int, bytes]:
+        logger.info(f"💾 저장소 0x{storage_id:08x} ({info.description or info.filesystem_name}): "
+                    f"{info.free_bytes}/{info.max_capacity} 바이트 남음 ({info.free_ratio:.0%})")
+        with self.storage_lock:
+            self.storage_info[storage_id] = info
+        return info
+
+    def get_storages(self, refresh: bool = False) -> List[PTPStorageInfo]:
+        """모든 저장소의 정보 (목록과 정보 모두 캐시 사용, 이벤트로 바뀐 저장소만 다시 조회)"""
+        with self.storage_lock:
+            storage_ids = None if refresh else self.storage_ids
+        if storage_ids is None:
+            storage_ids = self.get_storage_ids()
+            with self.storage_lock:
+                self.storage_ids = list(storage_ids)
+        else:
+            storage_ids = list(storage_ids)
+
+        storages = []
+        for storage_id in storage_ids:
+            info = self.get_storage_info(storage_id, refresh)
+            if info is not None:
+                storages.append(info)
+        return storages
+
+    def _on_property_changed(self, event: PTPEvent):
+        """DevicePropChanged 이벤트로 해당 속성의 캐시된 값만 버림 (다음 조회 때 다시 읽음)"""
+        if not event.parameters:
+            return
+        prop_code = event.parameters[0]
+        with self.property_lock:
+            pending = self.pending_property_sets.pop(prop_code, None)
+            if pending is not None and time.monotonic() <= pending[1]:
+                # 우리가 보낸 설정이 적용됨 - 다시 읽지 않고 보낸 값을 현재 값으로 사용
+                self.property_values[prop_code] = pending[0]
+                return
+            # 기한이 지난 설정은 확인 이벤트가 오지 않은 것으로 봄 (카메라 본체에서 바꾼 값일 수 있음)
+            self.property_values.pop(prop_code, None)
+        logger.debug(f"속성 값 무효화: {self._get_property_name(prop_code)}")
+
+    def _property_descs(self) -> dict:
+        """이 카메라(시리얼)의 공유 속성 설명 캐시"""
+        serial_number = self.device_info.get('serial_number', '') if self.device_info else ''
+        with self.property_desc_cache_lock:
+            return self.property_desc_cache.setdefault(serial_number or f"{self.camera_ip}:{self.camera_port}", {})
+
+    @_with_command_lock
+    def _send_command_batch(self, commands: List[Tuple[int, List[int]]], window: int = 1) -> List[Tuple[int, bytes]]:
         """
-        하나의 TCP 패킷에 포함된 여러 PTP/IP 패킷을 파싱
-        Returns: (data_payload, response_code, remaining_data)
+        데이터 수신 명령 여러 개를 보내고 (응답 코드, 데이터)를 순서대로 반환
+
+        PTP는 세션당 진행 중인 트랜잭션을 하나로 보므로 기본은 순차 전송(window=1)이다. 겹친 요청을 받는 것이
+        확인된 카메라에서만 window를 늘려 응답을 기다리지 않고 다음 요청을 미리 보낸다.
+        응답은 트랜잭션 ID로 확인하며, 타임아웃이나 순서 어긋남이 생기면 남은 명령은 보내지 않고
+        (0, b'')로 채운다 (이미 보낸 요청의 응답은 비워서 다음 명령과 섞이지 않게 함).
         """
-        offset = 0
-        data_payload = b''
-        response_code = 0
+        window = max(1, window)
+        results = []
+        pending = deque()
+        next_index = 0
+        self.command_socket.settimeout(self.socket_timeout)
+        try:
+            while next_index < len(commands) or pending:
+                while next_index < len(commands) and len(pending) < window:
+                    op_code, parameters = commands[next_index]
+                    data_phase = 1 if op_code in self.DATA_IN_OPERATIONS else 0
+                    self.command_socket.sendall(
+                        self._build_command_packet(op_code, parameters, data_phase, self.transaction_id))
+                    pending.append(self.transaction_id)
+                    self.transaction_id += 1
+                    next_index += 1
+                response_code, data, _ = self._receive_response(transaction_id=pending[0])
+                pending.popleft()
+                results.append((response_code, data))
+        except socket.timeout:
+            logger.error(f"❌ 일괄 명령 응답 타임아웃 - 중단 ({len(results)}/{len(commands)} 완료)")
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ 일괄 명령 중단: {e} ({len(results)}/{len(commands)} 완료)")
+
+        if pending:
+            self._resync_command_channel(pending[-1])
+        results.extend((0, b'') for _ in range(len(commands) - len(results)))
+        return results
+
+    def get_property_desc(self, prop_code: int, refresh: bool = False) -> Optional[PTPPropertyDesc]:
+        """장치 속성 설명 (데이터 형식, 쓰기 가능 여부, enum/range) - 시리얼별 캐시 사용"""
+        descs = self._property_descs()
+        desc = descs.get(prop_code)
+        if desc is not None and not refresh:
+            return desc
+
+        response_code, data = self._send_ptp_command(self.PTP_OC_GetDevicePropDesc, [prop_code])
+        desc = PTPPropertyDesc.parse(data) if response_code == self.PTP_RC_OK else None
+        if desc is None:
+            logger.error(f"속성 설명 가져오기 실패: {self._get_property_name(prop_code)}, 응답 코드 0x{response_code:04x}")
+            return None
 
-        logger.debug(f"🔍 다중 PTP/IP 패킷 파싱 시작: {len(data)} 바이트")
-        logger.debug(f"🔍 원본 데이터: {data.hex()}")
+        descs[prop_code] = desc
+        with self.property_lock:
+            self.property_values[prop_code] = desc.current_value
+        return desc
 
-        while offset < len(data):
-            if offset + 8 > len(data):
+    def get_property(self, prop_code: int, refresh: bool = False):
+        """장치 속성 현재 값 (DevicePropChanged 이벤트가 없었으면 캐시된 값, 실패 시 None)"""
+        with self.property_lock:
+            if not refresh and prop_code in self.property_values:
+                return self.property_values[prop_code]
+
+        desc = self.get_property_desc(prop_code)
+        if desc is None:
+            return None
+        with self.property_lock:
+            # 설명을 처음 받았다면 값도 함께 들어 있음
+            if not refresh and prop_code in self.property_values:
+                return self.property_values[prop_code]
+
+        response_code, data = self._send_ptp_command(self.PTP_OC_GetDevicePropValue, [prop_code])
+        if response_code != self.PTP_RC_OK:
+            logger.error(f"속성 값 가져오기 실패: {self._get_property_name(prop_code)}, 응답 코드 0x{response_code:04x}")
+            return None
+        value, _ = ptp_codec.decode_value(data, 0, desc.datatype)
+        with self.property_lock:
+            self.property_values[prop_code] = value
+        return value
+
+    def _check_property_value(self, desc: PTPPropertyDesc, value) -> Optional[str]:
+        """설정할 수 없는 값이면 이유를, 가능하면 None을 반환"""
+        if not desc.writable:
+            return "읽기 전용 속성"
+        if not desc.accepts(value):
+            allowed = desc.choices if desc.form == 'enum' else (desc.minimum, desc.maximum, desc.step)
+            return f"허용되지 않는 값 {value!r} ({allowed})"
+        return None
+
+    def _write_property(self, desc: PTPPropertyDesc, value, confirm_timeout: float = 2.0) -> int:
+        """
+        SetDevicePropValue 전송 - 값 캐시는 DevicePropChanged 이벤트가 오면 보낸 값으로 갱신된다
+
+        confirm_timeout 안에 온 이벤트만 보낸 값의 확인으로 본다. 그 뒤에 온 이벤트는 카메라 본체에서 바꾼
+        것일 수 있으므로 보통 이벤트처럼 캐시된 값만 버린다.
+        """
+        with self.property_lock:
+            self.pending_property_sets[desc.code] = (value, time.monotonic() + confirm_timeout)
+        response_code, _ = self._send_ptp_command_with_data(self.PTP_OC_SetDevicePropValue, [desc.code],
+                                                            ptp_codec.encode_value(value, desc.datatype))
+        with self.property_lock:
+            if desc.code in self.pending_property_sets:
+                # 아직 확인 이벤트 전 (또는 실패) - 이전 값은 더 이상 믿을 수 없음
+                self.property_values.pop(desc.code, None)
+                if response_code != self.PTP_RC_OK:
+                    del self.pending_property_sets[desc.code]
+                else:
+                    self.pending_property_sets[desc.code] = (value, time.monotonic() + confirm_timeout)
+        return response_code
+
+    def set_property(self, prop_code: int, value) -> bool:
+        """장치 속성 값 설정 (설명의 enum/range에 맞지 않는 값은 카메라에 보내지 않음)"""
+        desc = self.get_property_desc(prop_code)
+        if desc is None:
+            return False
+        name = self._get_property_name(prop_code)
+        reason = self._check_property_value(desc, value)
+        if reason is not None:
+            logger.error(f"❌ 속성 설정 불가: {name} - {reason}")
+            return False
+
+        response_code = self._write_property(desc, value)
+        if response_code != self.PTP_RC_OK:
+            logger.error(f"❌ 속성 설정 실패: {name} = {value!r}, 응답 코드 0x{response_code:04x}")
+            return False
+        logger.info(f"⚙️ 속성 설정: {name} = {value!r}")
+        return True
+
+    def _resolve_property_code(self, key: Union[int, str]) -> Optional[int]:
+        """속성 코드(int, '0x500F') 또는 이름('ExposureIndex')을 코드로 변환"""
+        if isinstance(key, int):
+            return key
+        if key.lower().startswith('0x'):
+            try:
+                return int(key, 16)
+            except ValueError:
+                return None
+        device_info = self.device_info or {}
+        for code in device_info.get('properties', []):
+            if self._get_property_name(code) == key:
+                return code
+        return None
+
+    def apply_profile(self, profile: dict, verify_timeout: float = 2.0) -> dict:
+        """
+        촬영 프리셋(속성 코드 또는 이름 → 값)을 적용하고 결과를 반환
+
+        캐시된 현재 값과 비교해 바뀌는 속성만 SetDevicePropValue로 보내고, 다시 읽는 대신 각 속성의
+        DevicePropChanged 이벤트로 적용을 확인한다. verify_timeout 안에 이벤트가 오지 않은 속성은 unverified.
+        Returns: {'changed': [코드], 'unchanged': [코드], 'failed': {키: 이유}, 'unverified': [코드], 'elapsed': 초}
+        """
+        start_time = time.monotonic()
+        result = {'changed': [], 'unchanged': [], 'failed': {}, 'unverified': []}
+
+        # 1. 현재 값과 비교 (캐시가 유효하면 통신 없음)
+        writes = []
+        for key, value in profile.items():
+            prop_code = self._resolve_property_code(key)
+            desc = self.get_property_desc(prop_code) if prop_code is not None else None
+            if desc is None:
+                result['failed'][key] = "지원하지 않는 속성"
+                continue
+            if self.get_property(prop_code) == value:
+                result['unchanged'].append(prop_code)
+                continue
+            reason = self._check_property_value(desc, value)
+            if reason is not None:
+                result['failed'][key] = reason
+                continue
+            writes.append((key, desc, value))
+
+        # 2. 바뀌는 속성만 전송 (확인 이벤트를 놓치지 않도록 전송 전에 위치 기록)
+        since = self.events.sequence
+        for key, desc, value in writes:
+            response_code = self._write_property(desc, value, verify_timeout)
+            if response_code == self.PTP_RC_OK:
+                result['changed'].append(desc.code)
+            else:
+                result['failed'][key] = f"응답 코드 0x{response_code:04x}"
+
+        # 3. DevicePropChanged 이벤트로 확인
+        waiting = set(result['changed'])
+        deadline = time.monotonic() + verify_timeout
+        while waiting:
+            event = self.events.wait_for(self.PTP_EC_DevicePropChanged,
+                                         lambda e: bool(e.parameters) and e.parameters[0] in waiting,
+                                         timeout=max(0.0, deadline - time.monotonic()), since=since)
+            if event is None:
                 break
+            waiting.discard(event.parameters[0])
+            since = event.sequence
+        result['unverified'] = sorted(waiting)
+
+        result['elapsed'] = time.monotonic() - start_time
+        logger.info(f"⚙️ 프로필 적용: 변경 {len(result['changed'])}개, 동일 {len(result['unchanged'])}개, "
+                    f"실패 {len(result['failed'])}개, 미확인 {len(result['unverified'])}개 ({result['elapsed'] * 1000:.0f}ms)")
+        return result
 
-            # PTP/IP 헤더 파싱
-            length, packet_type = struct.unpack('<II', data[offset:offset + 8])
-            logger.debug(f"🔍 오프셋 {offset}: 길이={length}, 타입={packet_type}")
+    def read_all_properties(self, refresh: bool = False, window: int = 1) -> List[dict]:
+        """
+        DeviceInfo의 모든 장치 속성을 설명과 현재 값으로 읽음 (gphoto2 --list-config 대체)
 
-            if offset + length > len(data):
-                logger.warning(f"⚠️ 패킷 길이 초과: 필요={length}, 남은={len(data) - offset}")
+        캐시에 없는 설명과 무효화된 값만 한 번의 일괄 요청(_send_command_batch)으로 가져온다.
+        Returns: 속성별 dict (code, name, value, datatype, writable, form, minimum, maximum, step, choices)
+        """
+        device_info = self.device_info or self.get_device_info()
+        prop_codes = device_info.get('properties', []) if device_info else []
+        descs = self._property_descs()
+        with self.property_lock:
+            if refresh:
+                self.property_values.clear()
+            missing_descs = [code for code in prop_codes if refresh or code not in descs]
+            stale_values = [code for code in prop_codes
+                            if code not in missing_descs and code not in self.property_values]
+
+        commands = ([(self.PTP_OC_GetDevicePropDesc, [code]) for code in missing_descs] +
+                    [(self.PTP_OC_GetDevicePropValue, [code]) for code in stale_values])
+        if commands:
+            logger.info(f"⚙️ 속성 일괄 조회: 설명 {len(missing_descs)}개, 값 {len(stale_values)}개")
+        results = self._send_command_batch(commands, window) if commands else []
+
+        for code, (response_code, data) in zip(missing_descs, results):
+            desc = PTPPropertyDesc.parse(data) if response_code == self.PTP_RC_OK else None
+            if desc is None:
+                logger.warning(f"속성 설명 가져오기 실패: {self._get_property_name(code)} (0x{response_code:04x})")
+                continue
+            descs[code] = desc
+            with self.property_lock:
+                self.property_values[code] = desc.current_value
+        for code, (response_code, data) in zip(stale_values, results[len(missing_descs):]):
+            if response_code == self.PTP_RC_OK:
+                value, _ = ptp_codec.decode_value(data, 0, descs[code].datatype)
+                with self.property_lock:
+                    self.property_values[code] = value
+
+        properties = []
+        with self.property_lock:
+            for code in prop_codes:
+                desc = descs.get(code)
+                if desc is None:
+                    continue
+                row = desc.to_dict()
+                del row['current_value']
+                row['name'] = self._get_property_name(code)
+                row['value'] = self.property_values.get(code)
+                properties.append(row)
+        return properties
+
+    def start_auto_ingest(self, dest_dir: str, on_ingested: Optional[Callable[[str, dict], None]] = None) -> bool:
+        """
+        새 객체 이벤트(ObjectAdded, 니콘 ObjectAddedInSDRAM)가 올 때마다 바로 dest_dir로 내려받는 자동 수집 시작
+
+        이벤트 스레드는 핸들만 큐에 넣고, 별도의 수집 스레드가 GetObjectInfo → GetObject를 수행한다.
+        on_ingested(경로, ObjectInfo)는 파일 저장이 끝날 때마다 수집 스레드에서 호출된다.
+        """
+        if self.ingest_thread and self.ingest_thread.is_alive():
+            logger.warning("자동 수집이 이미 실행 중")
+            return False
+
+        os.makedirs(dest_dir, exist_ok=True)
+        self.ingest_queue = queue.Queue()
+        self.ingest_thread = threading.Thread(target=self._ingest_worker, args=(dest_dir, self.ingest_queue, on_ingested),
+                                              daemon=True)
+        self.ingest_thread.start()
+        self.events.subscribe(self.PTP_EC_ObjectAdded, self._queue_ingest)
+        self.events.subscribe(self.NIKON_EC_ObjectAddedInSDRAM, self._queue_ingest)
+        logger.info(f"📸 자동 수집 시작: {dest_dir}")
+        return True
+
+    def stop_auto_ingest(self):
+        """자동 수집 중지 (이미 큐에 들어온 객체는 모두 받은 뒤 종료)"""
+        if self.ingest_queue is None:
+            return
+        self.events.unsubscribe(self.PTP_EC_ObjectAdded, self._queue_ingest)
+        self.events.unsubscribe(self.NIKON_EC_ObjectAddedInSDRAM, self._queue_ingest)
+        ingest_queue = self.ingest_queue
+        self.ingest_queue = None
+        ingest_queue.put(None)  # 종료 신호
+        if self.ingest_thread:
+            self.ingest_thread.join()
+        logger.info("자동 수집 중지")
+
+    def _ingest_worker(self, dest_dir: str, ingest_queue: queue.Queue,
+                       on_ingested: Optional[Callable[[str, dict], None]]):
+        """자동 수집 스레드: 큐에서 핸들을 꺼내 객체를 내려받음"""
+        while True:
+            handle = ingest_queue.get()
+            if handle is None:
                 break
 
-            packet_data = data[offset:offset + length]
+            try:
+                info = self.get_object_info(handle)
+                if not info or info['object_format'] == self.PTP_OFC_Association:
+                    continue
+
+                path = os.path.join(dest_dir, info['filename'] or f"{handle:08x}.bin")
+                start_time = time.monotonic()
+                if self.download_object(handle, path) is not None:
+                    logger.info(f"📸 자동 수집 완료: {path} ({time.monotonic() - start_time:.2f}초)")
+                    if on_ingested is not None:
+                        on_ingested(path, info)
+            except Exception as e:
+                logger.error(f"❌ 자동 수집 중 오류: 핸들=0x{handle:08x}, {e}")
+                logger.debug("자동 수집 오류 상세:", exc_info=True)
+
+    def _receive_response(self, write: Optional[Callable[[memoryview], object]] = None,
+                          chunk_size: int = 64 * 1024,
+                          on_start_data: Optional[Callable[[int], None]] = None,
+                          transaction_id: Optional[int] = None) -> Tuple[int, bytes, List[int]]:
+        """
+        명령 채널에서 CMD_RESPONSE가 올 때까지 패킷을 프레임 단위로 읽음
+
+        write가 주어지면 데이터 단계의 payload를 chunk_size 이하의 조각으로 write에 바로 넘기고
+        (반환되는 data_payload는 비어 있음), 없으면 메모리에 모아 반환한다.
+        on_start_data는 Start Data Packet을 받는 즉시 예상 데이터 크기와 함께 호출된다.
+        transaction_id를 주면 그보다 앞선 트랜잭션의 데이터/응답(앞서 실패한 파이프라인 요청이 남긴 것)은
+        읽어 버리고, 더 뒤의 트랜잭션이 오면 채널이 어긋난 것이므로 연결을 끊고 ConnectionError를 낸다.
+        write가 예외를 내면(디스크 가득 참 등) 남은 데이터와 응답까지 읽어 버린 뒤 그 예외를 다시 발생시킨다.
+        Returns: (response_code, data_payload, response_parameters)
+        """
+        data_payload = bytearray()
+        if write is None:
+            write = data_payload.extend
+        received_size = 0
+        expected_size = 0
+        write_error: Optional[Exception] = None
+
+        # 이전 명령이 패킷 중간에서 멈췄다면 그 나머지부터 버림
+        self.command_reader.skip_partial()
+
+        while True:
+            payload_length, packet_type = self.command_reader.read_header()
+            logger.debug(f"🔍 패킷 수신: 타입={packet_type}, 길이={payload_length + 8}")
+
+            if packet_type in (self.PTPIP_DATA_PACKET, self.PTPIP_END_DATA_PACKET):
+                # (End) Data Packet 구조: [트랜잭션ID(4)] [실제데이터...] - 실제 데이터는 조각 단위로 스트리밍
+                packet_transaction_id = struct.unpack('<I', self.command_reader.read_exact(4))[0]
+                if self._is_stale_transaction(packet_transaction_id, transaction_id):
+                    self.command_reader.skip_partial()
+                    continue
+                for chunk in self.command_reader.iter_payload(payload_length - 4, chunk_size):
+                    if write_error is not None:
+                        continue  # 기록은 이미 실패 - 채널이 어긋나지 않도록 끝까지 읽기만 함
+                    try:
+                        write(chunk)
+                    except Exception as e:
+                        logger.error(f"❌ 수신 데이터 기록 실패 - 응답까지 읽어 버림: {e}")
+                        write_error = e
+                received_size += payload_length - 4
+                logger.debug(f"📥 Data Packet에서 {payload_length - 4} 바이트 추출 (누적 {received_size}/{expected_size})")
+                continue
+
+            payload = self.command_reader.read_exact(payload_length)
 
             if packet_type == self.PTPIP_START_DATA_PACKET:
-                logger.debug("📥 Start Data Packet 발견")
-                if length >= 20:
-                    expected_size = struct.unpack('<Q', packet_data[12:20])[0]
-                    logger.debug(f"📥 예상 데이터 크기: {expected_size} 바이트")
-                    # Start Data Packet에는 보통 헤더만 있고 실제 데이터는 End Data에 있음
-                    if length > 20:
-                        start_payload = packet_data[20:]
-                        if start_payload:  # 실제 데이터가 있는 경우만 추가
-                            data_payload += start_payload
-                            logger.debug(f"📥 Start Data에서 {len(start_payload)} 바이트 추출")
-
-            elif packet_type == self.PTPIP_END_DATA_PACKET:
-                logger.debug("📥 End Data Packet 발견")
-                # End Data Packet 구조: [길이(4)] [타입(4)] [트랜잭션ID(4)] [실제데이터...]
-                # 헤더는 12바이트가 아니라 20바이트 (길이+타입+트랜잭션ID+데이터 크기)
-                header_size = 12  # PTP/IP End Data Packet 헤더는 12바이트
-                if length > header_size:
-                    end_payload = packet_data[header_size:]
-                    data_payload += end_payload
-                    logger.debug(f"📥 End Data에서 {len(end_payload)} 바이트 추출")
-                    logger.debug(f"📥 End Data 헤더 크기: {header_size} 바이트")
-                    logger.debug(f"📥 End Data 전체 길이: {length} 바이트")
-                elif length == header_size:
-                    logger.debug("📥 End Data는 헤더만 있음 (데이터는 Start Data에서 추출됨)")
+                # Start Data Packet 구조: [트랜잭션ID(4)] [전체 데이터 크기(8)]
+                packet_transaction_id, data_size = struct.unpack_from('<IQ', payload, 0)
+                if self._is_stale_transaction(packet_transaction_id, transaction_id):
+                    continue
+                expected_size = data_size
+                logger.debug(f"📥 Start Data Packet: 트랜잭션={packet_transaction_id}, 예상 데이터 크기={expected_size} 바이트")
+                if on_start_data is not None:
+                    on_start_data(expected_size)
 
             elif packet_type == self.PTPIP_CMD_RESPONSE:
-                logger.debug("📥 Command Response 발견")
-                if length >= 14:
-                    response_code = struct.unpack('<H', packet_data[8:10])[0]
-                    transaction_id = struct.unpack('<I', packet_data[10:14])[0]
-                    logger.info(f"📥 CMD_RESPONSE: 코드=0x{response_code:04x}, 트랜잭션={transaction_id}")
+                # CMD_RESPONSE 구조: [응답코드(2)] [트랜잭션ID(4)] [매개변수들...]
+                response_code, packet_transaction_id = struct.unpack_from('<HI', payload, 0)
+                if self._is_stale_transaction(packet_transaction_id, transaction_id):
+                    continue
+                param_count = (len(payload) - 6) // 4
+                parameters = list(struct.unpack_from(f'<{param_count}I', payload, 6))
+                logger.info(f"📥 CMD_RESPONSE: 코드=0x{response_code:04x}, 트랜잭션={packet_transaction_id}")
+                if parameters:
+                    logger.debug(f"📥 응답 매개변수: {parameters}")
+                if expected_size and received_size != expected_size:
+                    logger.warning(f"⚠️ 데이터 크기 불일치: 예상={expected_size}, 수신={received_size}")
+                if write_error is not None:
+                    raise write_error
+                return response_code, bytes(data_payload), parameters
+
+            else:
+                logger.warning(f"예상치 못한 패킷 타입: {packet_type}")
+
+    def _is_stale_transaction(self, received: int, expected: Optional[int]) -> bool:
+        """
+        받은 패킷이 앞선 트랜잭션의 것이면 True (버릴 것), 기다리는 트랜잭션이면 False
+
+        기다리는 것보다 뒤의 트랜잭션이면 응답 순서를 더 이상 믿을 수 없으므로 연결을 끊는다.
+        """
+        if expected is None or received == expected:
+            return False
+        if received < expected:
+            logger.warning(f"⚠️ 이전 트랜잭션 {received}의 남은 패킷을 버림 (기다리는 트랜잭션 {expected})")
+            return True
+        self._abort_command_channel()
+        raise ConnectionError(f"명령 채널 동기화 깨짐: 트랜잭션 {expected} 대신 {received} 수신")
+
+    def _abort_command_channel(self):
+        """
+        명령 채널을 다시 맞출 수 없을 때 소켓을 끊음
+
+        이후 명령은 바로 실패하고 이벤트 스레드도 종료되므로 데몬/카메라 풀의 재연결 경로(연결 끊김 감지)를 탄다.
+        """
+        logger.error("❌ 명령 채널 응답 순서를 맞출 수 없어 연결을 끊습니다 (재연결 필요)")
+        for sock in (self.command_socket, self.event_socket):
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass  # 이미 끊긴 연결
+
+    def _resync_command_channel(self, last_transaction_id: int, timeout: float = 5.0) -> bool:
+        """
+        파이프라인 요청이 도중에 실패한 뒤 last_transaction_id까지 남은 데이터/응답을 읽어 버림
+
+        timeout 안에 다시 맞추지 못하면 연결을 끊는다. Returns: 다시 맞췄으면 True
+        """
+        try:
+            self.command_socket.settimeout(timeout)
+            self._receive_response(lambda chunk: None, transaction_id=last_transaction_id)
+            logger.info(f"명령 채널 재동기화 완료 (트랜잭션 {last_transaction_id}까지 비움)")
+            return True
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ 명령 채널 재동기화 실패: {e}")
+            self._abort_command_channel()
+            return False
+
+    @_with_command_lock
+    def _receive_data_to_sink(self, op_code: int, parameters: List[int], sink: Union[str, BinaryIO],
+                              chunk_size: int) -> Optional[int]:
+        """
+        데이터 수신 명령을 보내고 데이터 단계를 sink로 스트리밍
+        sink가 문자열이면 파일 경로로 보고 새로 만들어 쓴다. 성공 시 기록한 바이트 수, 실패 시 None 반환
+        """
+        operation_name = self._get_operation_name(op_code)
+        logger.info(f"📥 스트리밍 수신 시작: {operation_name} (0x{op_code:04x}) (트랜잭션ID: {self.transaction_id})")
+        logger.debug(f"명령 매개변수: {parameters}")
+
+        try:
+            output = open(sink, 'wb') if isinstance(sink, str) else sink
+        except OSError as e:
+            logger.error(f"❌ 저장 파일 열기 실패: {e}")
+            return None
+        written = 0
+
+        def write(chunk: memoryview):
+            nonlocal written
+            output.write(chunk)
+            written += len(chunk)
+
+        response_code = 0
+        try:
+            packet = self._build_command_packet(op_code, parameters, 1, self.transaction_id)
+            self.command_socket.sendall(packet)
+            self.command_socket.settimeout(self.socket_timeout)
+            response_code, _, _ = self._receive_response(write, chunk_size, transaction_id=self.transaction_id)
+        except socket.timeout:
+            logger.error(f"❌ {operation_name} 수신 타임아웃")
+        except Exception as e:
+            logger.error(f"❌ {operation_name} 수신 중 오류: {e}")
+            logger.debug("스트리밍 수신 오류 상세:", exc_info=True)
+        finally:
+            self.transaction_id += 1
+            if output is not sink:
+                output.close()
+
+        if response_code != self.PTP_RC_OK:
+            logger.error(f"{operation_name} 실패: 응답 코드 0x{response_code:04x}")
+            if output is not sink and os.path.exists(sink):
+                os.remove(sink)  # 불완전한 파일은 남기지 않음
+            return None
+
+        logger.info(f"✅ {operation_name} 완료: {written} 바이트")
+        return written
+
+    def download_object(self, handle: int, sink: Union[str, BinaryIO], chunk_size: int = 64 * 1024) -> Optional[int]:
+        """
+        GetObject로 객체 전체를 내려받아 sink(파일 경로 또는 write 가능한 객체)에 저장
+
+        데이터 패킷을 chunk_size 단위로 바로 흘려보내므로 50~100MB RAW/NEF 파일도 메모리 사용량이 일정하다.
+        Returns: 기록한 바이트 수 (실패 시 None)
+        """
+        logger.info(f"객체 다운로드 시작: 핸들=0x{handle:08x}")
+        return self._receive_data_to_sink(self.PTP_OC_GetObject, [handle], sink, chunk_size)
+
+    def get_partial_object(self, handle: int, offset: int, max_bytes: int, sink: Union[str, BinaryIO],
+                           chunk_size: int = 64 * 1024) -> Optional[int]:
+        """GetPartialObject로 객체의 offset부터 최대 max_bytes를 내려받아 sink에 저장"""
+        logger.info(f"부분 객체 다운로드: 핸들=0x{handle:08x}, 오프셋={offset}, 최대={max_bytes} 바이트")
+        return self._receive_data_to_sink(self.PTP_OC_GetPartialObject, [handle, offset, max_bytes],
+                                          sink, chunk_size)
+
+    def get_object_size(self, handle: int) -> Optional[int]:
+        """GetObjectInfo의 ObjectCompressedSize 필드로 객체 크기를 가져오는 메서드"""
+        response_code, data = self._send_ptp_command(self.PTP_OC_GetObjectInfo, [handle])
+
+        if response_code == self.PTP_RC_OK and len(data) >= 12:
+            # ObjectInfo 구조: [StorageID(4)] [ObjectFormat(2)] [ProtectionStatus(2)] [ObjectCompressedSize(4)] ...
+            object_size = struct.unpack_from('<I', data, 8)[0]
+            logger.debug(f"객체 크기: 핸들=0x{handle:08x}, {object_size} 바이트")
+            return object_size
+        else:
+            logger.error(f"객체 크기 가져오기 실패: 응답 코드 0x{response_code:04x}")
+            return None
+
+    @_with_command_lock
+    def download_object_chunked(self, handle: int, path: str, chunk_size: int = 1024 * 1024, window: int = 1,
+                                total_size: Optional[int] = None, resume: bool = True) -> Optional[dict]:
+        """
+        GetPartialObject를 chunk_size 단위로 반복해 객체를 파일로 내려받는 파이프라인 전송
+
+        PTP는 세션당 진행 중인 트랜잭션을 하나로 보므로 기본은 순차 전송(window=1)이다 (_send_command_batch와 같음).
+        겹친 요청을 받는 것이 확인된 카메라에서만 window를 늘리면 현재 조각의 Start Data Packet이 도착하는 즉시
+        다음 조각 요청을 미리 보내 최대 window개의 요청이 동시에 진행되도록 한다 (Wi-Fi 왕복 지연을 숨김).
+        resume이 True이면 이미 있는 파일의 현재 크기부터 이어받는다 (연결이 끊긴 뒤 재연결해서 다시 호출).
+
+        Returns: 전송 통계 dict (bytes, elapsed, mb_per_sec, resumed_from, total_size) 또는 실패 시 None
+        """
+        window = max(1, window)
+        if total_size is None:
+            total_size = self.get_object_size(handle)
+            if total_size is None:
+                return None
+
+        offset = 0
+        if resume and os.path.exists(path):
+            offset = min(os.path.getsize(path), total_size)
+            logger.info(f"이어받기: {offset}/{total_size} 바이트부터 시작")
+
+        logger.info(f"청크 전송 시작: 핸들=0x{handle:08x}, 크기={total_size}, 청크={chunk_size}, 윈도우={window}")
+
+        pending = deque()  # 응답을 기다리는 요청들: (트랜잭션ID, 오프셋, 크기)
+        next_offset = offset
+        completed_offset = offset  # 파일에 연속으로 기록이 끝난 위치
+        response_code = self.PTP_RC_OK
+        start_time = time.monotonic()
+
+        def issue_next():
+            nonlocal next_offset
+            size = min(chunk_size, total_size - next_offset)
+            packet = self._build_command_packet(self.PTP_OC_GetPartialObject, [handle, next_offset, size], 1,
+                                                self.transaction_id)
+            self.command_socket.sendall(packet)
+            pending.append((self.transaction_id, next_offset, size))
+            logger.debug(f"📤 GetPartialObject 요청: 트랜잭션={self.transaction_id}, 오프셋={next_offset}, 크기={size}")
+            self.transaction_id += 1
+            next_offset += size
+
+        def prefetch(expected_size: int):
+            # 현재 조각의 데이터 헤더가 도착했으므로 다음 조각 요청을 미리 보냄
+            if len(pending) < window and next_offset < total_size:
+                issue_next()
+
+        output = open(path, 'r+b' if offset else 'wb')
+        try:
+            self.command_socket.settimeout(self.socket_timeout)
+            if next_offset < total_size:
+                issue_next()
+
+            while pending:
+                transaction_id, chunk_offset, size = pending[0]
+                written = 0
 
-            offset += length
+                def write(chunk: memoryview):
+                    nonlocal written
+                    output.write(chunk)
+                    written += len(chunk)
+
+                output.seek(chunk_offset)
+                if response_code == self.PTP_RC_OK:
+                    try:
+                        code, _, _ = self._receive_response(write, on_start_data=prefetch,
+                                                            transaction_id=transaction_id)
+                    except OSError as e:
+                        if isinstance(e, (socket.timeout, ConnectionError)):
+                            raise
+                        # 파일 기록 실패 - 이 조각의 응답은 이미 다 읽었으므로 남은 요청의 응답만 비워냄
+                        logger.error(f"❌ 조각 저장 실패: 오프셋={chunk_offset}, {e}")
+                        code = 0
+                else:
+                    # 앞선 조각이 실패했으면 이미 보낸 요청의 응답만 비워냄
+                    code, _, _ = self._receive_response(lambda chunk: None, transaction_id=transaction_id)
+                pending.popleft()
+
+                if response_code != self.PTP_RC_OK:
+                    continue
+                if code != self.PTP_RC_OK or written != size:
+                    logger.error(f"❌ 조각 수신 실패: 오프셋={chunk_offset}, 응답=0x{code:04x}, 수신={written}/{size}")
+                    response_code = code if code != self.PTP_RC_OK else self.PTP_RC_INCOMPLETE_TRANSFER
+                    continue
+                completed_offset = chunk_offset + size
+                if not pending and next_offset < total_size:
+                    # 미리 보낸 요청이 없으면 (window=1 등) 여기서 다음 조각 요청
+                    issue_next()
 
-        logger.debug(f"🔍 파싱 완료: 데이터={len(data_payload)}바이트, 응답=0x{response_code:04x}")
-        logger.debug(f"🔍 추출된 데이터: {data_payload[:50].hex()}...")
-        return data_payload, response_code, data[offset:] if offset < len(data) else b''
+        except socket.timeout:
+            logger.error("❌ 청크 전송 타임아웃")
+            response_code = 0
+        except Exception as e:
+            logger.error(f"❌ 청크 전송 중 오류: {e}")
+            logger.debug("청크 전송 오류 상세:", exc_info=True)
+            response_code = 0
+        finally:
+            if pending:
+                # 응답을 받지 못한 요청이 남아 있으면 다음 명령이 그 응답을 자기 것으로 읽지 않도록 비움
+                self._resync_command_channel(pending[-1][0])
+            # 연속으로 완료된 위치까지만 남겨 다음 호출에서 정확히 이어받을 수 있게 함
+            output.truncate(completed_offset)
+            output.close()
+
+        elapsed = time.monotonic() - start_time
+        transferred = completed_offset - offset
+        mb_per_sec = transferred / elapsed / (1024 * 1024) if elapsed > 0 else 0.0
+        logger.info(f"📊 청크 전송 결과: {transferred} 바이트, {elapsed:.2f}초, {mb_per_sec:.2f} MB/s")
+
+        if response_code != self.PTP_RC_OK:
+            logger.error(f"청크 전송 중단: {completed_offset}/{total_size} 바이트 저장됨 (resume으로 이어받기 가능)")
+            return None
 
+        logger.info(f"✅ 청크 전송 완료: {path}")
+        return {
+            'bytes': transferred,
+            'elapsed': elapsed,
+            'mb_per_sec': mb_per_sec,
+            'resumed_from': offset,
+            'total_size': total_size
+        }
+
+    @_with_command_lock
     def _send_ptp_command_with_data(self, op_code: int, parameters: List[int] = None, data_to_send: bytes = b'') -> Tuple[int, bytes]:
         """데이터와 함께 PTP 명령을 전송하고 응답 코드와 데이터를 반환"""
         if parameters is None:
@@ -624,127 +2083,26 @@ class PTPIPClient:
             self.transaction_id += 1
             return 0, b''
 
-        # 4단계: 응답 수신 - 0x944c는 특별 처리
+        # 4단계: 응답 수신 - 데이터 패킷과 명령 응답을 프레임 단위로 모두 읽음
         response_code = 0
         response_data = b''
 
-        if op_code == self.NIKON_OC_UNKNOWN_944C:
-            try:
-                logger.info("📥 0x944c 특별 처리: 카메라에서 데이터 전송 대기 중...")
-
-                # 모든 응답 패킷을 한 번에 수신할 수 있음
-                logger.info("📥 응답 패킷들 수신 중...")
-                self.command_socket.settimeout(10)
-                all_data = self.command_socket.recv(4096)
-                logger.info(f"📥 전체 응답 수신: {len(all_data)} 바이트")
-                logger.debug(f"📥 전체 데이터: {all_data.hex()}")
-
-                # 다중 패킷 파싱 사용
-                response_data, response_code, remaining = self._parse_multiple_ptpip_packets(all_data)
-
-                # 응답 코드가 0이면 추가 데이터 수신 시도
-                if response_code == 0 and remaining:
-                    logger.info("📥 추가 응답 데이터 처리 중...")
-                    additional_data, additional_code, _ = self._parse_multiple_ptpip_packets(remaining)
-                    if additional_code != 0:
-                        response_code = additional_code
-
-                # 여전히 응답 코드가 0이면 별도로 Operation Response 수신
-                if response_code == 0:
-                    try:
-                        logger.info("📥 Operation Response 별도 수신 중...")
-                        cmd_response = self.command_socket.recv(1024)
-                        logger.info(f"📥 Operation Response 수신: {len(cmd_response)} 바이트")
-                        logger.debug(f"📥 Operation Response: {cmd_response.hex()}")
-
-                        if len(cmd_response) >= 14:
-                            length, packet_type = struct.unpack('<II', cmd_response[:8])
-                            if packet_type == self.PTPIP_CMD_RESPONSE:
-                                response_code = struct.unpack('<H', cmd_response[8:10])[0]
-                                transaction_id = struct.unpack('<I', cmd_response[10:14])[0]
-                                logger.info(f"📥 별도 응답: 코드=0x{response_code:04x}, 트랜잭션={transaction_id}")
-                    except socket.timeout:
-                        logger.warning("⚠️ Operation Response 별도 수신 타임아웃")
-
-                logger.info(f"📥 0x944c 최종 결과: 응답=0x{response_code:04x}, 데이터={len(response_data)}바이트")
-
-            except socket.timeout:
-                logger.error("❌ 0x944c 응답 수신 타임아웃")
-            except Exception as e:
-                logger.error(f"❌ 0x944c 처리 중 오류: {e}")
-                logger.debug("0x944c 오류 상세:", exc_info=True)
-        else:
-            # 기존 로직: 일반적인 PTP 명령 처리
-            try:
-                logger.info("📥 응답 수신 대기 중...")
-
-                data_phase = 1 if op_code in [
-                    self.PTP_OC_GetDeviceInfo,
-                    self.PTP_OC_GetStorageIDs,
-                    self.PTP_OC_GetStorageInfo,
-                    self.PTP_OC_GetObjectHandles,
-                    self.PTP_OC_GetObjectInfo,
-                    self.PTP_OC_GetObject,
-                    self.PTP_OC_GetThumb,
-                    self.PTP_OC_GetDevicePropDesc,
-                    self.PTP_OC_GetDevicePropValue,
-                    self.PTP_OC_GetPartialObject,
-                    self.NIKON_OC_UNKNOWN_944C  # 니콘 전용 - 데이터 수신
-                ] else 0
-                logger.debug(f"데이터 수신 예상: {'예' if data_phase else '아니오'}")
-
-                if data_phase == 1:
-                    # 데이터가 있는 명령: 여러 패킷이 함께 올 수 있음
-                    logger.info("📥 데이터 응답 수신 중...")
-                    self.command_socket.settimeout(10)
-                    raw_response = self.command_socket.recv(4096)
-                    logger.info(f"📥 원본 응답 수신: {len(raw_response)} 바이트")
-                    logger.debug(f"📥 원본 데이터: {raw_response.hex()}")
-
-                    # 다중 패킷 파싱 사용
-                    response_data, response_code, remaining = self._parse_multiple_ptpip_packets(raw_response)
-
-                    if response_code == 0:
-                        # 응답이 없으면 별도로 수신
-                        logger.info("📥 명령 응답 별도 수신 중...")
-                        try:
-                            cmd_response = self.command_socket.recv(1024)
-                            logger.info(f"📥 명령 응답 수신: {len(cmd_response)} 바이트")
-                            logger.debug(f"📥 명령 응답 데이터: {cmd_response.hex()}")
-
-                            if len(cmd_response) >= 14:
-                                length, packet_type = struct.unpack('<II', cmd_response[:8])
-                                if packet_type == self.PTPIP_CMD_RESPONSE:
-                                    response_code = struct.unpack('<H', cmd_response[8:10])[0]
-                                    transaction_id = struct.unpack('<I', cmd_response[10:14])[0]
-                                    logger.info(f"📥 별도 응답: 코드=0x{response_code:04x}, 트랜잭션={transaction_id}")
-                        except socket.timeout:
-                            logger.warning("⚠️ 명령 응답 타임아웃")
-
-                else:
-                    # 데이터가 없는 명령: 명령 응답만
-                    logger.info("📥 명령 응답만 수신 중...")
-                    self.command_socket.settimeout(10)
-                    cmd_response = self.command_socket.recv(1024)
-                    logger.info(f"📥 명령 응답 수신: {len(cmd_response)} 바이트")
-                    logger.debug(f"📥 명령 응답 데이터: {cmd_response.hex()}")
-
-                    if len(cmd_response) >= 14:
-                        length, packet_type = struct.unpack('<II', cmd_response[:8])
-                        if packet_type == self.PTPIP_CMD_RESPONSE:
-                            response_code = struct.unpack('<H', cmd_response[8:10])[0]
-                            transaction_id = struct.unpack('<I', cmd_response[10:14])[0]
-                            logger.info(f"📥 응답: 코드=0x{response_code:04x}, 트랜잭션={transaction_id}")
+        try:
+            logger.info("📥 응답 수신 대기 중...")
+            self.command_socket.settimeout(self.socket_timeout)
+            response_code, response_data, _ = self._receive_response(transaction_id=self.transaction_id)
+            logger.info(f"📥 {self._get_operation_name(op_code)} 최종 결과: 응답=0x{response_code:04x}, 데이터={len(response_data)}바이트")
 
-            except socket.timeout:
-                logger.error("❌ 응답 수신 타임아웃")
-            except Exception as e:
-                logger.error(f"❌ 응답 수신 중 오류: {e}")
-                logger.debug("응답 수신 오류 상세:", exc_info=True)
+        except socket.timeout:
+            logger.error("❌ 응답 수신 타임아웃")
+        except Exception as e:
+            logger.error(f"❌ 응답 수신 중 오류: {e}")
+            logger.debug("응답 수신 오류 상세:", exc_info=True)
 
         self.transaction_id += 1
         return response_code, response_data
 
+    @_with_command_lock
     def _send_ptp_command(self, op_code: int, parameters: List[int] = None) -> Tuple[int, bytes]:
         """PTP 명령을 전송하고 응답 코드와 데이터를 반환"""
         if parameters is None:
@@ -798,32 +2156,16 @@ class PTPIPClient:
 
         else:
             # 기존 로직: 일반적인 PTP 명령
-            data_phase = 1 if op_code in [
-                self.PTP_OC_GetDeviceInfo,
-                self.PTP_OC_GetStorageIDs,
-                self.PTP_OC_GetStorageInfo,
-                self.PTP_OC_GetObjectHandles,
-                self.PTP_OC_GetObjectInfo,
-                self.PTP_OC_GetObject,
-                self.PTP_OC_GetThumb,
-                self.PTP_OC_GetDevicePropDesc,
-                self.PTP_OC_GetDevicePropValue,
-                self.PTP_OC_GetPartialObject,
-                self.NIKON_OC_UNKNOWN_944C,
-                0x952b  # 0x952b도 데이터 수신 오퍼레이션
-            ] else 0
+            data_phase = 1 if op_code in self.DATA_IN_OPERATIONS else 0
             
-            packet_length = 18 + len(parameters) * 4
-            packet = struct.pack('<II', packet_length, self.PTPIP_CMD_REQUEST)
-            packet += struct.pack('<IHI', data_phase, op_code, self.transaction_id)
-
-            # 매개변수 추가
-            for param in parameters:
-                packet += struct.pack('<I', param)
+            packet = self._build_command_packet(op_code, parameters, data_phase, self.transaction_id)
 
             logger.debug(f"명령 패킷 길이: {len(packet)} 바이트")
             logger.debug(f"명령 패킷 데이터: {packet.hex()}")
 
+        # 0x944c/0x952b는 공식앱처럼 트랜잭션 ID를 고정하므로 실제 패킷의 값으로 응답을 맞춤
+        request_transaction_id = struct.unpack_from('<I', packet, 14)[0]
+
         # 패킷 전송
         try:
             bytes_sent = self.command_socket.send(packet)
@@ -839,57 +2181,8 @@ class PTPIPClient:
 
         try:
             logger.info("📥 응답 수신 대기 중...")
-            self.command_socket.settimeout(10)
-            
-            # 첫 번째 응답 수신
-            raw_response = self.command_socket.recv(4096)
-            logger.info(f"📥 응답 수신: {len(raw_response)} 바이트")
-            logger.debug(f"📥 응답 데이터: {raw_response.hex()}")
-
-            if len(raw_response) < 8:
-                logger.error("응답 데이터가 너무 짧음")
-                self.transaction_id += 1
-                return 0, b''
-
-            # PTP/IP 헤더 파싱
-            length, packet_type = struct.unpack('<II', raw_response[:8])
-            logger.debug(f"📥 패킷 길이: {length}, 타입: {packet_type}")
-
-            if packet_type == self.PTPIP_CMD_RESPONSE:
-                # Type 7: CMD_RESPONSE - [길이:4] [타입:4] [응답코드:2] [트랜잭션ID:4] [매개변수들...]
-                if length >= 14:
-                    response_code = struct.unpack('<H', raw_response[8:10])[0]
-                    transaction_id = struct.unpack('<I', raw_response[10:14])[0]
-                    logger.info(f"📥 CMD_RESPONSE: 코드=0x{response_code:04x}, 트랜잭션={transaction_id}")
-                    
-                    # 추가 매개변수가 있는 경우 파싱
-                    if length > 14:
-                        params_data = raw_response[14:length]
-                        logger.debug(f"📥 응답 매개변수: {params_data.hex()}")
-                        
-            elif packet_type == self.PTPIP_START_DATA_PACKET:
-                # Type 9: START_DATA_PACKET이 먼저 온 경우
-                logger.debug("📥 Start Data Packet 수신")
-                response_data, response_code, _ = self._parse_multiple_ptpip_packets(raw_response)
-                
-                # CMD_RESPONSE가 별도로 올 수 있음
-                if response_code == 0:
-                    try:
-                        cmd_response = self.command_socket.recv(1024)
-                        logger.info(f"📥 추가 CMD_RESPONSE 수신: {len(cmd_response)} 바이트")
-                        logger.debug(f"📥 CMD_RESPONSE 데이터: {cmd_response.hex()}")
-                        
-                        if len(cmd_response) >= 14:
-                            cmd_length, cmd_type = struct.unpack('<II', cmd_response[:8])
-                            if cmd_type == self.PTPIP_CMD_RESPONSE:
-                                response_code = struct.unpack('<H', cmd_response[8:10])[0]
-                                transaction_id = struct.unpack('<I', cmd_response[10:14])[0]
-                                logger.info(f"📥 추가 응답: 코드=0x{response_code:04x}, 트랜잭션={transaction_id}")
-                    except socket.timeout:
-                        logger.debug("추가 응답 타임아웃 (정상)")
-                        
-            else:
-                logger.warning(f"예상치 못한 패킷 타입: {packet_type}")
+            self.command_socket.settimeout(self.socket_timeout)
+            response_code, response_data, _ = self._receive_response(transaction_id=request_transaction_id)
 
         except socket.timeout:
             logger.error("❌ 응답 수신 타임아웃")
@@ -912,7 +2205,7 @@ class PTPIPClient:
         self.transaction_id += 1
         return response_code, response_data
     
-    def get_device_info(self) -> Optional[dict]:
+    def get_device_info(self) -> Optional[PTPDeviceInfo]:
         """장치 정보를 가져오는 메서드"""
         logger.info("장치 정보 요청 시작")
         logger.info("=" * 50)
@@ -921,220 +2214,12 @@ class PTPIPClient:
         
         if response_code == self.PTP_RC_OK and data:
             logger.info("장치 정보 수신 성공")
-            return self._parse_device_info(data)
+            self.device_info = self._parse_device_info(data)
+            return self.device_info
         else:
             logger.error(f"장치 정보 가져오기 실패: 응답 코드 0x{response_code:04x}")
             return None
     
-    def _parse_device_info(self, data: bytes) -> dict:
-        """장치 정보 데이터를 파싱하는 메서드"""
-        logger.info("장치 정보 파싱 시작")
-        logger.debug(f"파싱할 데이터 크기: {len(data)} 바이트")
-        logger.debug(f"전체 데이터 hex: {data.hex()}")
-
-        if len(data) < 8:
-            logger.error("장치 정보 데이터가 너무 짧음")
-            return {}
-
-        try:
-            # PTP DeviceInfo 구조 파싱
-            offset = 0
-
-            # Standard Version (2바이트)
-            standard_version = struct.unpack('<H', data[offset:offset + 2])[0]
-            offset += 2
-            logger.debug(f"Standard Version: 0x{standard_version:04x}")
-
-            # Vendor Extension ID (4바이트)
-            vendor_ext_id = struct.unpack('<I', data[offset:offset + 4])[0]
-            offset += 4
-            logger.debug(f"Vendor Extension ID: 0x{vendor_ext_id:08x}")
-
-            # Vendor Extension Version (2바이트)
-            vendor_ext_version = struct.unpack('<H', data[offset:offset + 2])[0]
-            offset += 2
-            logger.debug(f"Vendor Extension Version: 0x{vendor_ext_version:04x}")
-
-            # 벤더 확장 설명 읽기 (PTP String)
-            vendor_desc = ""
-            if offset < len(data):
-                desc_len = struct.unpack('<B', data[offset:offset + 1])[0]
-                offset += 1
-                logger.debug(f"벤더 설명 길이: {desc_len} 문자")
-
-                if desc_len > 0 and offset + desc_len * 2 <= len(data):
-                    vendor_desc_bytes = data[offset:offset + desc_len * 2]
-                    vendor_desc = vendor_desc_bytes.decode('utf-16le', errors='ignore').rstrip('\x00')
-                    offset += desc_len * 2
-                    logger.info(f"벤더 설명: {vendor_desc}")
-
-            # Functional Mode (2바이트)
-            if offset + 2 <= len(data):
-                functional_mode = struct.unpack('<H', data[offset:offset + 2])[0]
-                offset += 2
-                logger.debug(f"Functional Mode: 0x{functional_mode:04x}")
-
-            # 지원되는 동작 코드 읽기 (PTP Array)
-            operations = []
-            if offset + 4 <= len(data):
-                op_count = struct.unpack('<I', data[offset:offset + 4])[0]
-                offset += 4
-                logger.info(f"지원되는 동작 개수: {op_count}")
-
-                # 동작 코드 읽기
-                for i in range(op_count):
-                    if offset + 2 <= len(data):
-                        op_code = struct.unpack('<H', data[offset:offset + 2])[0]
-                        operations.append(op_code)
-                        offset += 2
-
-                        # 중요한 동작 코드 로깅
-                        if op_code in [self.PTP_OC_GetDeviceInfo, self.PTP_OC_OpenSession,
-                                       self.PTP_OC_CloseSession, self.NIKON_OC_PIN_AUTH,
-                                       self.NIKON_OC_UNKNOWN_944C, self.NIKON_OC_UNKNOWN_952A]:
-                            op_name = self._get_operation_name(op_code)
-                            logger.debug(f"중요 동작 발견: {op_name} (0x{op_code:04x})")
-
-            # 동작 코드 목록 출력
-            if operations:
-                operations_preview = [f'0x{op:04x}' for op in operations[:10]]
-                logger.info(f"지원 동작 (처음 10개): {', '.join(operations_preview)}")
-                if len(operations) > 10:
-                    logger.info(f"... 및 {len(operations) - 10}개 더")
-
-            # 이벤트 코드 읽기 (PTP Array)
-            events = []
-            if offset + 4 <= len(data):
-                event_count = struct.unpack('<I', data[offset:offset + 4])[0]
-                offset += 4
-                logger.debug(f"지원되는 이벤트 개수: {event_count}")
-
-                for i in range(event_count):
-                    if offset + 2 <= len(data):
-                        event_code = struct.unpack('<H', data[offset:offset + 2])[0]
-                        events.append(event_code)
-                        offset += 2
-
-            # 장치 속성 코드 읽기 (PTP Array)
-            properties = []
-            if offset + 4 <= len(data):
-                prop_count = struct.unpack('<I', data[offset:offset + 4])[0]
-                offset += 4
-                logger.debug(f"지원되는 장치 속성 개수: {prop_count}")
-
-                for i in range(prop_count):
-                    if offset + 2 <= len(data):
-                        prop_code = struct.unpack('<H', data[offset:offset + 2])[0]
-                        properties.append(prop_code)
-                        offset += 2
-
-            # 캡처 형식 읽기 (PTP Array)
-            capture_formats = []
-            if offset + 4 <= len(data):
-                format_count = struct.unpack('<I', data[offset:offset + 4])[0]
-                offset += 4
-                logger.debug(f"지원되는 캡처 형식 개수: {format_count}")
-
-                for i in range(format_count):
-                    if offset + 2 <= len(data):
-                        format_code = struct.unpack('<H', data[offset:offset + 2])[0]
-                        capture_formats.append(format_code)
-                        offset += 2
-
-            # 이미지 형식 읽기 (PTP Array)
-            image_formats = []
-            if offset + 4 <= len(data):
-                img_format_count = struct.unpack('<I', data[offset:offset + 4])[0]
-                offset += 4
-                logger.debug(f"지원되는 이미지 형식 개수: {img_format_count}")
-
-                for i in range(img_format_count):
-                    if offset + 2 <= len(data):
-                        img_format_code = struct.unpack('<H', data[offset:offset + 2])[0]
-                        image_formats.append(img_format_code)
-                        offset += 2
-
-            # 제조사 이름 읽기 (PTP String)
-            manufacturer = ""
-            if offset < len(data):
-                mfg_len = struct.unpack('<B', data[offset:offset + 1])[0]
-                offset += 1
-                if mfg_len > 0 and offset + mfg_len * 2 <= len(data):
-                    mfg_bytes = data[offset:offset + mfg_len * 2]
-                    manufacturer = mfg_bytes.decode('utf-16le', errors='ignore').rstrip('\x00')
-                    offset += mfg_len * 2
-                    logger.info(f"제조사: {manufacturer}")
-
-            # 모델명 읽기 (PTP String)
-            model = ""
-            if offset < len(data):
-                model_len = struct.unpack('<B', data[offset:offset + 1])[0]
-                offset += 1
-                if model_len > 0 and offset + model_len * 2 <= len(data):
-                    model_bytes = data[offset:offset + model_len * 2]
-                    model = model_bytes.decode('utf-16le', errors='ignore').rstrip('\x00')
-                    offset += model_len * 2
-                    logger.info(f"모델명: {model}")
-
-            # 장치 버전 읽기 (PTP String)
-            device_version = ""
-            if offset < len(data):
-                ver_len = struct.unpack('<B', data[offset:offset + 1])[0]
-                offset += 1
-                if ver_len > 0 and offset + ver_len * 2 <= len(data):
-                    ver_bytes = data[offset:offset + ver_len * 2]
-                    device_version = ver_bytes.decode('utf-16le', errors='ignore').rstrip('\x00')
-                    offset += ver_len * 2
-                    logger.info(f"장치 버전: {device_version}")
-
-            # 시리얼 번호 읽기 (PTP String)
-            serial_number = ""
-            if offset < len(data):
-                serial_len = struct.unpack('<B', data[offset:offset + 1])[0]
-                offset += 1
-                if serial_len > 0 and offset + serial_len * 2 <= len(data):
-                    serial_bytes = data[offset:offset + serial_len * 2]
-                    serial_number = serial_bytes.decode('utf-16le', errors='ignore').rstrip('\x00')
-                    offset += serial_len * 2
-                    logger.info(f"시리얼 번호: {serial_number}")
-
-            logger.info(f"총 {len(operations)}개의 동작 코드 지원")
-            logger.info(f"니콘 전용 동작 지원 여부:")
-            logger.info(f"  - PIN 인증 (0x935a): {'예' if self.NIKON_OC_PIN_AUTH in operations else '아니오'}")
-            logger.info(f"  - Unknown_944C: {'예' if self.NIKON_OC_UNKNOWN_944C in operations else '아니오'}")
-            logger.info(f"  - Unknown_952A: {'예' if self.NIKON_OC_UNKNOWN_952A in operations else '아니오'}")
-
-            return {
-                'standard_version': standard_version,
-                'vendor_extension_id': vendor_ext_id,
-                'vendor_description': vendor_desc,
-                'manufacturer': manufacturer,
-                'model': model,
-                'device_version': device_version,
-                'serial_number': serial_number,
-                'operations': operations,
-                'events': events,
-                'properties': properties,
-                'capture_formats': capture_formats,
-                'image_formats': image_formats,
-                'operation_count': len(operations),
-                'supports_pin_auth': self.NIKON_OC_PIN_AUTH in operations,
-                'supports_944c': self.NIKON_OC_UNKNOWN_944C in operations,
-                'supports_952a': self.NIKON_OC_UNKNOWN_952A in operations
-            }
-
-        except Exception as e:
-            logger.error(f"장치 정보 파싱 중 오류: {e}")
-            logger.debug("파싱 오류 상세:", exc_info=True)
-            return {
-                'vendor_description': vendor_desc if 'vendor_desc' in locals() else '',
-                'operations': operations if 'operations' in locals() else [],
-                'operation_count': len(operations) if 'operations' in locals() else 0,
-                'supports_pin_auth': False,
-                'supports_944c': False,
-                'supports_952a': False
-            }
-    
     def open_session(self) -> bool:
         """PTP 세션을 여는 메서드"""
         logger.info("PTP 세션 열기 시작")
@@ -1152,6 +2237,13 @@ class PTPIPClient:
 
         if response_code == self.PTP_RC_OK:
             logger.info("PTP 세션 열기 성공")
+            with self.storage_lock:
+                # 새 세션에서는 이전 연결의 저장소 정보를 믿지 않음
+                self.storage_ids = None
+                self.storage_info.clear()
+                self.stale_storage.clear()
+            with self.property_lock:
+                self.property_values.clear()
             return True
         else:
             logger.error(f"PTP 세션 열기 실패: 응답 코드 0x{response_code:04x}")
@@ -1174,8 +2266,9 @@ class PTPIPClient:
             logger.error("잘못된 PIN 코드 형식")
             return False
 
-        # 니콘 PIN 인증 명령 전송
+        # 니콘 PIN 인증 명령 전송 (응답보다 이벤트가 먼저 올 수 있으므로 전송 전 위치를 기록)
         logger.info("PIN 인증 명령 전송 중...")
+        since = self.events.sequence
         response_code, _ = self._send_ptp_command(self.NIKON_OC_PIN_AUTH, [pin_int])
         
         if response_code == self.PTP_RC_OK:
@@ -1186,7 +2279,7 @@ class PTPIPClient:
             logger.info("(카메라에서 인증 완료 신호를 기다리는 중...)")
 
             # 이벤트 수신 대기 (타임아웃 10초)
-            if self.event_received.wait(timeout=10):
+            if self.events.wait_for(self.PTP_EC_DeviceInfoChanged, timeout=10, since=since):
                 logger.info("인증 성공! 모든 기능을 사용할 수 있습니다.")
                 return True
             else:
@@ -1210,40 +2303,345 @@ class PTPIPClient:
             logger.error(f"저장소 ID 가져오기 실패: 응답 코드 0x{response_code:04x}")
             return []
 
-    def _parse_storage_ids(self, data: bytes) -> list:
-        """저장소 ID 데이터를 파싱하는 메서드"""
-        logger.info("저장소 ID 파싱 시작")
-        logger.debug(f"파싱할 데이터 크기: {len(data)} 바이트")
-        logger.debug(f"저장소 ID 데이터: {data.hex()}")
+    def get_object_handles(self, storage_id: int = 0xFFFFFFFF, object_format: int = 0, parent: int = 0) -> list:
+        """객체 핸들 목록을 가져오는 메서드 (기본값: 모든 저장소의 모든 객체)"""
+        return self._get_object_handle_vector(storage_id, object_format, parent).tolist()
 
-        if len(data) < 4:
-            logger.error("저장소 ID 데이터가 너무 짧음")
-            return []
+    def _get_object_handle_vector(self, storage_id: int = 0xFFFFFFFF, object_format: int = 0, parent: int = 0):
+        """GetObjectHandles 결과를 파이썬 정수 목록으로 풀지 않은 배열 그대로 반환"""
+        logger.info(f"객체 핸들 요청 시작: 저장소=0x{storage_id:08x}, 형식=0x{object_format:04x}, 부모=0x{parent:08x}")
+
+        response_code, data = self._send_ptp_command(self.PTP_OC_GetObjectHandles, [storage_id, object_format, parent])
+
+        if response_code == self.PTP_RC_OK and data:
+            return self._parse_object_handles(data)
+        else:
+            logger.error(f"객체 핸들 가져오기 실패: 응답 코드 0x{response_code:04x}")
+            return ptp_codec.read_uint32_vector(b'', 0)[0]
+
+    def get_object_info(self, handle: int) -> Optional[dict]:
+        """객체 정보(ObjectInfo)를 가져오는 메서드"""
+        response_code, data = self._send_ptp_command(self.PTP_OC_GetObjectInfo, [handle])
+
+        if response_code == self.PTP_RC_OK and data:
+            return self._parse_object_info(data, handle)
+        else:
+            logger.error(f"객체 정보 가져오기 실패: 핸들=0x{handle:08x}, 응답 코드 0x{response_code:04x}")
+            return None
+
+    def list_objects(self, storage_id: int = 0xFFFFFFFF, object_format: Optional[int] = None,
+                     parent: Optional[int] = None, start: int = 0,
+                     limit: Optional[int] = None) -> Iterator[PTPObjectInfo]:
+        """
+        객체 목록을 PTPObjectInfo 레코드로 하나씩 돌려주는 제너레이터
+
+        GetObjectHandles는 한 번만 보내고 GetObjectInfo는 소비하는 만큼만 보내므로 카드 전체를 읽기 전에
+        앞쪽 항목을 바로 쓸 수 있다. start/limit로 핸들 목록의 일부(페이지)만 조회할 수 있으며, 항목 사이에는
+        명령 잠금을 잡지 않아 다른 명령이 끼어들 수 있다.
+        object_format/parent가 None이면 모든 형식/모든 폴더 (parent=0xFFFFFFFF는 루트만).
+        """
+        handles = self._get_object_handle_vector(storage_id, object_format or 0, parent or 0)
+        end = len(handles) if limit is None else min(len(handles), start + limit)
+        logger.info(f"객체 목록 조회: 전체 {len(handles)}개 중 {start}~{end}")
+
+        for handle in handles[start:end].tolist():
+            response_code, data = self._send_ptp_command(self.PTP_OC_GetObjectInfo, [handle])
+            info = PTPObjectInfo.parse(data, handle) if response_code == self.PTP_RC_OK else None
+            if info is None:
+                logger.error(f"객체 정보 가져오기 실패: 핸들=0x{handle:08x}, 응답 코드 0x{response_code:04x}")
+                continue
+            yield info
+
+    def get_thumbnail(self, handle: int, cache=None, capture_date: Optional[str] = None) -> Optional[bytes]:
+        """
+        GetThumb으로 객체의 썸네일(보통 JPEG)을 가져오는 메서드
+
+        cache(ThumbnailCache)가 주어지면 (시리얼, 핸들, 촬영일)로 먼저 찾고 없을 때만 카메라에 요청한 뒤 저장한다.
+        capture_date를 모르면 GetObjectInfo로 읽는다.
+        """
+        serial_number = self.device_info.get('serial_number', '') if self.device_info else ''
+        if cache is not None:
+            if capture_date is None:
+                info = self.get_object_info(handle)
+                if info is None:
+                    return None
+                capture_date = info['capture_date']
+            thumbnail = cache.get(serial_number, handle, capture_date)
+            if thumbnail is not None:
+                return thumbnail
+
+        response_code, data = self._send_ptp_command(self.PTP_OC_GetThumb, [handle])
+        if response_code != self.PTP_RC_OK or not data:
+            logger.error(f"썸네일 가져오기 실패: 핸들=0x{handle:08x}, 응답 코드 0x{response_code:04x}")
+            return None
 
+        if cache is not None:
+            cache.put(serial_number, handle, capture_date, data)
+        return data
+
+    @staticmethod
+    def _unique_path(dest_dir: str, filename: str, taken, overwrite: bool = True) -> str:
+        """
+        dest_dir 안에서 이번 다운로드의 다른 객체와 겹치지 않는 경로
+
+        저장소/폴더가 달라도 파일명(DSC_0001.JPG 등)은 같을 수 있으므로 겹치면 _1, _2 ... 를 붙인다.
+        overwrite가 False면 디스크에 이미 있는 파일도 피한다.
+        """
+        filename = os.path.basename(filename)
+        path = os.path.join(dest_dir, filename)
+        stem, extension = os.path.splitext(filename)
+        suffix = 1
+        while path in taken or (not overwrite and os.path.exists(path)):
+            path = os.path.join(dest_dir, f"{stem}_{suffix}{extension}")
+            suffix += 1
+        return path
+
+    def _download_handles(self, dest_dir: str, handles: List[int], writer_threads: int,
+                          should_download: Optional[Callable[[int, dict], bool]] = None,
+                          overwrite: bool = True) -> Tuple[dict, list]:
+        """
+        핸들 목록의 객체를 dest_dir로 내려받는 공통 루프
+
+        should_download(handle, info)가 False를 반환하는 객체는 건너뛴다.
+        디스크 쓰기는 ObjectWriterPool에서 처리해 네트워크 수신과 겹친다.
+        파일명이 겹치는 객체는 _unique_path로 서로 다른 경로에 저장한다 (overwrite=False면 기존 파일도 보존).
+        Returns: (결과 요약 dict, 저장에 성공한 [(핸들, ObjectInfo, 경로)] 목록)
+        """
+        os.makedirs(dest_dir, exist_ok=True)
+        start_time = time.monotonic()
+
+        object_count = 0
+        failures = 0
+        requested = {}  # 경로 -> (핸들, ObjectInfo)
+        pool = ObjectWriterPool(workers=writer_threads)
         try:
-            # PTP 배열 형태: [개수(4바이트)] [ID1(4바이트)] [ID2(4바이트)] ...
-            storage_count = struct.unpack('<I', data[0:4])[0]
-            logger.info(f"저장소 개수: {storage_count}")
-
-            storage_ids = []
-            offset = 4
-
-            for i in range(storage_count):
-                if offset + 4 <= len(data):
-                    storage_id = struct.unpack('<I', data[offset:offset + 4])[0]
-                    storage_ids.append(storage_id)
-                    logger.debug(f"저장소 ID {i}: 0x{storage_id:08x}")
-                    offset += 4
-                else:
-                    logger.warning(f"저장소 ID {i} 데이터 부족")
+            for handle in handles:
+                info = self.get_object_info(handle)
+                if not info:
+                    failures += 1
+                    continue
+                if should_download is not None and not should_download(handle, info):
+                    continue
+                if info['object_format'] == self.PTP_OFC_Association:
+                    continue  # 폴더는 건너뜀
+
+                object_count += 1
+                filename = info['filename'] or f"{handle:08x}.bin"
+                logger.info(f"📥 [{object_count}] {filename} ({info['compressed_size']} 바이트)")
+
+                path = self._unique_path(dest_dir, filename, requested, overwrite)
+                if path != os.path.join(dest_dir, filename):
+                    logger.info(f"파일명 중복 - 다른 이름으로 저장: {os.path.basename(path)}")
+                try:
+                    sink = pool.open(path)
+                except OSError as e:
+                    logger.error(f"❌ 파일 열기 실패: {path} ({e})")
+                    failures += 1
+                    continue
+                requested[path] = (handle, info)
+                size = self.download_object(handle, sink)
+                sink.close(success=size is not None)  # 실패한 객체는 풀의 failed에 기록됨
+        finally:
+            pool.shutdown()
+
+        elapsed = time.monotonic() - start_time
+        total_bytes = sum(size for _, size in pool.completed)
+        summary = {
+            'objects': object_count,
+            'downloaded': len(pool.completed),
+            'failed': failures + len(pool.failed),
+            'bytes': total_bytes,
+            'elapsed': elapsed
+        }
+        mb_per_sec = total_bytes / elapsed / (1024 * 1024) if elapsed > 0 else 0.0
+        logger.info(f"📊 다운로드 결과: {summary['downloaded']}/{object_count}개, "
+                    f"{total_bytes} 바이트, {elapsed:.2f}초, {mb_per_sec:.2f} MB/s")
+
+        saved = [(requested[path][0], requested[path][1], path) for path, _ in pool.completed]
+        return summary, saved
+
+    def download_all(self, dest_dir: str, storage_ids: Optional[List[int]] = None, writer_threads: int = 4) -> dict:
+        """
+        인증된 세션에서 모든 객체를 dest_dir로 내려받는 메서드
+
+        GetStorageIDs → GetObjectHandles → GetObjectInfo로 목록을 만든 뒤 GetObject로 하나씩 받는다.
+        Returns: 결과 요약 dict (objects, downloaded, failed, bytes, elapsed)
+        """
+        logger.info(f"전체 다운로드 시작: {dest_dir}")
+        logger.info("=" * 50)
+
+        if storage_ids is None:
+            storage_ids = self.get_storage_ids()
+
+        handles = []
+        for storage_id in storage_ids:
+            handles.extend(self.get_object_handles(storage_id))
+
+        summary, _ = self._download_handles(dest_dir, handles, writer_threads)
+        return summary
+
+    def sync(self, dest_dir: str, index, writer_threads: int = 4) -> Optional[dict]:
+        """
+        로컬 인덱스(ObjectIndex)에 없는 새 객체만 dest_dir로 내려받는 메서드
+
+        핸들은 포맷이나 카드 교체 뒤 다른 사진에 재사용되므로 객체는 (파일명, 크기, 촬영일)로 식별한다.
+        다만 저장소 서명(볼륨 레이블, 남은 바이트)이 마지막 동기화 때와 같으면 카드가 그대로이므로 이미 확인한
+        핸들은 믿고, 처음 보는 핸들만 GetObjectInfo로 확인한다 (새 객체가 없으면 저장소마다 핸들 목록 요청 한 번).
+        서명이 바뀐 저장소는 모든 핸들을 다시 확인한다. 이름이 같은 새 사진은 기존 파일을 덮어쓰지 않고
+        다른 이름으로 저장한다.
+        Returns: 결과 요약 dict (objects, downloaded, failed, bytes, elapsed, checked, skipped) 또는 실패 시 None
+        """
+        logger.info(f"동기화 시작: {dest_dir}")
+        logger.info("=" * 50)
+
+        device_info = self.device_info or self.get_device_info()
+        serial = device_info.get('serial_number') if device_info else None
+        if not serial:
+            logger.error("시리얼 번호를 알 수 없어 동기화할 수 없음")
+            return None
+
+        # 캐시된 저장소 정보가 아니라 지금 카드의 서명과 비교해야 함
+        signatures = {storage.storage_id: (storage.volume_label, storage.free_bytes)
+                      for storage in self.get_storages(refresh=True)}
+        if not signatures:
+            logger.warning("⚠️ 저장소 정보를 읽지 못함 - 모든 객체의 ObjectInfo를 확인")
+
+        handle_count = 0
+        unseen = []
+        for storage_id in signatures or [0xFFFFFFFF]:
+            handles = self._get_object_handle_vector(storage_id)
+            handle_count += len(handles)
+            signature = signatures.get(storage_id)
+            if signature is not None and index.storage_signature(serial, storage_id) == signature:
+                seen = index.known_handles(serial, storage_id)
+            else:
+                if signature is not None:
+                    logger.info(f"💾 저장소 0x{storage_id:08x} 변경됨 - 모든 핸들 다시 확인")
+                    index.forget_handles(serial, storage_id)
+                seen = set()
+            unseen.extend(ptp_codec.uint32_difference(handles, seen))
+
+        known = index.known_objects(serial)
+        logger.info(f"카메라 {serial}: 핸들 {handle_count}개 중 처음 보는 핸들 {len(unseen)}개, "
+                    f"인덱스에 있는 객체 {len(known)}개")
+
+        def remember(handle: int, info: dict, size: int):
+            if info['storage_id'] in signatures:
+                index.add_handle(serial, info['storage_id'], handle, info['filename'], size, info['capture_date'])
+
+        def should_download(handle: int, info: dict) -> bool:
+            if info['object_format'] == self.PTP_OFC_Association:
+                remember(handle, info, 0)  # 폴더도 기록해 두어 다음 동기화에서 다시 확인하지 않음
+                return False
+            key = (info['filename'], info['compressed_size'], info['capture_date'])
+            if key in known:
+                # 이미 받은 객체 - 핸들 번호만 기록 갱신
+                index.add(serial, handle, *key)
+                remember(handle, info, info['compressed_size'])
+                return False
+            return True
+
+        summary, saved = self._download_handles(dest_dir, unseen, writer_threads, should_download, overwrite=False)
+        for handle, info, _ in saved:
+            index.add(serial, handle, info['filename'], info['compressed_size'], info['capture_date'])
+            remember(handle, info, info['compressed_size'])
+        for storage_id, (volume_label, free_bytes) in signatures.items():
+            index.set_storage_signature(serial, storage_id, volume_label, free_bytes)
+        index.commit()
+
+        summary['checked'] = len(unseen)
+        summary['skipped'] = handle_count - summary['objects']
+        logger.info(f"✅ 동기화 완료: 새 객체 {summary['downloaded']}개, 건너뜀 {summary['skipped']}개 "
+                    f"(ObjectInfo 확인 {len(unseen)}개)")
+        return summary
+
+    def capture(self, dest_dir: Optional[str] = None, timeout: float = 10.0,
+                storage_id: int = 0, object_format: int = 0) -> Optional[dict]:
+        """
+        InitiateCapture로 촬영하고 이벤트 채널에서 ObjectAdded/CaptureComplete를 기다리는 메서드
+
+        gphoto2나 재연결 없이 열린 세션에서 바로 촬영하며, dest_dir이 주어지면 같은 세션으로 촬영된 객체를 내려받는다.
+        ObjectAdded(니콘 SDRAM 촬영은 ObjectAddedInSDRAM)로 받은 핸들을 모으다가 CaptureComplete가 오면 끝낸다.
+        Returns: {'handles', 'files', 'object_latency', 'elapsed'} (촬영 명령 실패 또는 객체가 없으면 None)
+        """
+        logger.info("📷 촬영 시작 (InitiateCapture)")
+        added_codes = (self.PTP_EC_ObjectAdded, self.NIKON_EC_ObjectAddedInSDRAM)
+        complete_codes = (self.PTP_EC_CaptureComplete, self.NIKON_EC_CaptureCompleteRecInSdram)
+        start_time = time.monotonic()
+
+        # 응답보다 이벤트가 먼저 올 수 있으므로 명령 전에 위치 기록
+        since = self.events.sequence
+        response_code, _ = self._send_ptp_command(self.PTP_OC_InitiateCapture, [storage_id, object_format])
+        if response_code != self.PTP_RC_OK:
+            logger.error(f"❌ 촬영 실패: 응답 코드 0x{response_code:04x}")
+            return None
+
+        handles = []
+        object_latency = None
+        deadline = start_time + timeout
+        while True:
+            event = self.events.wait_for(None, lambda e: e.code in added_codes or e.code in complete_codes,
+                                         timeout=max(0.0, deadline - time.monotonic()), since=since)
+            if event is None:
+                if handles:
+                    logger.warning("⚠️ CaptureComplete 이벤트 없이 대기 시간 초과 - 받은 객체로 진행")
                     break
+                logger.error(f"❌ 촬영 후 {timeout:.0f}초 동안 새 객체 이벤트가 없음")
+                return None
+            since = event.sequence
+
+            if event.code in added_codes and event.parameters:
+                handles.append(event.parameters[0])
+                if object_latency is None:
+                    object_latency = time.monotonic() - start_time
+            elif event.code in complete_codes:
+                break
 
-            logger.info(f"총 {len(storage_ids)}개의 저장소 ID 파싱 완료")
-            return storage_ids
+        result = {'handles': handles, 'files': [], 'object_latency': object_latency, 'elapsed': 0.0}
+        if dest_dir is not None:
+            os.makedirs(dest_dir, exist_ok=True)
+            for handle in handles:
+                info = self.get_object_info(handle)
+                if not info or info['object_format'] == self.PTP_OFC_Association:
+                    continue
+                path = os.path.join(dest_dir, info['filename'] or f"{handle:08x}.bin")
+                if self.download_object(handle, path) is not None:
+                    result['files'].append(path)
+
+        result['elapsed'] = time.monotonic() - start_time
+        logger.info(f"📷 촬영 완료: 객체 {len(handles)}개, 저장 {len(result['files'])}개, "
+                    f"촬영→파일 {result['elapsed']:.2f}초")
+        return result
+
+    @_with_command_lock
+    def trigger_capture_staged(self, barrier: threading.Barrier, storage_id: int = 0,
+                               object_format: int = 0) -> Tuple[int, float, float]:
+        """
+        InitiateCapture 패킷을 미리 만들어 두고 barrier가 풀리는 순간 전송하는 메서드 (여러 대 동시 촬영용)
 
-        except Exception as e:
-            logger.error(f"저장소 ID 파싱 중 오류: {e}")
-            return []
+        패킷 생성, 로그, 잠금 획득을 barrier 전에 끝내 두므로 barrier 이후에는 send 한 번만 남는다.
+        시각은 time.perf_counter() 값이라 같은 프로세스의 다른 카메라와 비교할 수 있다.
+        Returns: (응답 코드, 전송 시각, 응답 수신 시각)
+        """
+        transaction_id = self.transaction_id
+        packet = self._build_command_packet(self.PTP_OC_InitiateCapture, [storage_id, object_format], 0,
+                                            transaction_id)
+        self.command_socket.settimeout(self.socket_timeout)
+
+        barrier.wait()
+        sent_at = time.perf_counter()
+        try:
+            self.command_socket.sendall(packet)
+            response_code, _, _ = self._receive_response(transaction_id=transaction_id)
+        except socket.timeout:
+            logger.error("❌ 촬영 명령 응답 타임아웃")
+            response_code = 0
+        finally:
+            self.transaction_id += 1
+        acked_at = time.perf_counter()
+
+        logger.info(f"📷 동시 촬영 명령 응답: 0x{response_code:04x} ({(acked_at - sent_at) * 1000:.1f}ms)")
+        return response_code, sent_at, acked_at
 
     def close_session(self) -> bool:
         """PTP 세션을 닫는 메서드"""
@@ -1264,8 +2662,15 @@ class PTPIPClient:
         """카메라와의 연결을 끊는 메서드"""
         logger.info("카메라 연결 해제 시작")
 
+        # 자동 수집 중이면 남은 객체를 받은 뒤 중지
+        self.stop_auto_ingest()
+
         # 명령 소켓 닫기
         if self.command_socket:
+            try:
+                self.command_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass  # 이미 끊긴 연결
             try:
                 self.command_socket.close()
                 logger.info("명령 소켓 닫기 완료")
@@ -1274,18 +2679,15 @@ class PTPIPClient:
             finally:
                 self.command_socket = None
 
-        # 이벤트 소켓 닫기
+        # 이벤트 소켓 종료 (shutdown으로 수신 대기 중인 이벤트 스레드를 깨움)
         if self.event_socket:
             try:
-                self.event_socket.close()
-                logger.info("이벤트 소켓 닫기 완료")
-            except Exception as e:
-                logger.warning(f"이벤트 소켓 닫기 중 오류: {e}")
-            finally:
-                self.event_socket = None
+                self.event_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass  # 이미 끊긴 연결
 
-        # 이벤트 스레드 종료 대기
-        if self.event_thread and self.event_thread.is_alive():
+        # 이벤트 스레드 종료 대기 (스레드가 소켓을 쓰는 동안 닫지 않도록 소켓 닫기 전에 대기)
+        if self.event_thread and self.event_thread.is_alive() and self.event_thread is not threading.current_thread():
             logger.info("이벤트 스레드 종료 대기 중...")
             self.event_thread.join(timeout=2)
             if self.event_thread.is_alive():
@@ -1293,8 +2695,19 @@ class PTPIPClient:
             else:
                 logger.info("이벤트 스레드 종료 완료")
 
+        # 이벤트 소켓 닫기
+        if self.event_socket:
+            try:
+                self.event_socket.close()
+                logger.info("이벤트 소켓 닫기 완료")
+            except Exception as e:
+                logger.warning(f"이벤트 소켓 닫기 중 오류: {e}")
+            finally:
+                self.event_socket = None
+
         logger.info("카메라 연결 해제 완료")
 
+    @_with_command_lock
     def _send_ptp_command_935a(self) -> Tuple[int, bytes]:
         """Frame 45와 동일한 0x935a 오퍼레이션 전송 (연결 승인 요청)"""
         logger.info("0x935a 연결 승인 요청 전송 중...")
@@ -1318,12 +2731,10 @@ class PTPIPClient:
         logger.debug(f"0x935a 패킷 데이터: {packet.hex()}")
 
         # Frame 45와 동일한 패킷인지 확인
-        expected_packet = "1600000006000000010000005a93020000000120000"
-        actual_hex = packet.hex()
-        logger.debug(f"예상 패킷: {expected_packet}")
-        logger.debug(f"실제 패킷: {actual_hex}")
+        logger.debug(f"예상 패킷: {self.FRAME_45_PIN_AUTH_PACKET.hex()}")
+        logger.debug(f"실제 패킷: {packet.hex()}")
 
-        if actual_hex.startswith("1600000006000000010000005a9302000000"):
+        if packet == self.FRAME_45_PIN_AUTH_PACKET:
             logger.info("✅ Frame 45와 동일한 0x935a 패킷 구성!")
         else:
             logger.warning("⚠️ Frame 45와 다른 패킷 구성")
@@ -1342,35 +2753,12 @@ class PTPIPClient:
 
         try:
             logger.info("📥 0x935a 응답 수신 대기 중...")
-            self.command_socket.settimeout(10)
-
-            raw_response = self.command_socket.recv(4096)
-            logger.info(f"📥 0x935a 응답 수신: {len(raw_response)} 바이트")
-            logger.debug(f"📥 응답 데이터: {raw_response.hex()}")
-
-            if len(raw_response) < 8:
-                logger.error("0x935a 응답 데이터가 너무 짧음")
-                return 0, b''
+            self.command_socket.settimeout(self.socket_timeout)
+            response_code, response_data, _ = self._receive_response(transaction_id=transaction_id_to_use)
 
-            # PTP/IP 헤더 파싱
-            length, packet_type = struct.unpack('<II', raw_response[:8])
-            logger.debug(f"📥 패킷 길이: {length}, 타입: {packet_type}")
-
-            if packet_type == self.PTPIP_CMD_RESPONSE:
-                # Frame 46과 동일한 응답 패킷
-                if length >= 14:
-                    response_code = struct.unpack('<H', raw_response[8:10])[0]
-                    transaction_id = struct.unpack('<I', raw_response[10:14])[0]
-                    logger.info(f"📥 0x935a 응답: 코드=0x{response_code:04x}, 트랜잭션={transaction_id}")
-
-                    # Frame 46 예상: OK (0x2001), Transaction ID: 2
-                    if response_code == self.PTP_RC_OK and transaction_id == 2:
-                        logger.info("✅ Frame 46과 동일한 성공 응답!")
-
-            elif packet_type == self.PTPIP_START_DATA_PACKET:
-                # 데이터가 있는 응답인 경우
-                logger.debug("📥 0x935a Start Data Packet 수신")
-                response_data, response_code, _ = self._parse_multiple_ptpip_packets(raw_response)
+            # Frame 46 예상: OK (0x2001), Transaction ID: 2
+            if response_code == self.PTP_RC_OK:
+                logger.info("✅ Frame 46과 동일한 성공 응답!")
 
         except socket.timeout:
             logger.error("❌ 0x935a 응답 수신 타임아웃")
@@ -1391,6 +2779,112 @@ class PTPIPClient:
         return response_code, response_data
 
 
+class TimeToReadyHistogram:
+    """
+    0x935a 승인 후 카메라가 인증된 연결을 받아들일 때까지 걸린 시간의 모델별 히스토그램
+
+    여러 번 실행한 결과가 누적되도록 JSON 파일(로그 폴더)에 저장한다.
+    """
+
+    BUCKETS = (0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0)  # 구간 상한 (초), 마지막 칸은 그 이상
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.models: dict = {}  # 모델명 → {'counts': [...], 'count': n, 'total': 초 합계, 'max': 최댓값}
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.models = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"준비 시간 히스토그램 읽기 실패: {e}")
+
+    def record(self, model: str, seconds: float):
+        """모델의 준비 시간 하나를 기록하고 파일에 저장"""
+        with self.lock:
+            stats = self.models.setdefault(model or "Unknown", {
+                'counts': [0] * (len(self.BUCKETS) + 1), 'count': 0, 'total': 0.0, 'max': 0.0})
+            bucket = next((i for i, limit in enumerate(self.BUCKETS) if seconds <= limit), len(self.BUCKETS))
+            stats['counts'][bucket] += 1
+            stats['count'] += 1
+            stats['total'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+            if self.path:
+                try:
+                    with open(self.path, 'w', encoding='utf-8') as f:
+                        json.dump(self.models, f, ensure_ascii=False, indent=2)
+                except OSError as e:
+                    logger.warning(f"준비 시간 히스토그램 저장 실패: {e}")
+
+    def summary(self, model: str) -> Optional[dict]:
+        """모델의 기록 횟수, 평균, 최댓값과 구간별 횟수 ('≤0.5s' 형식 키)"""
+        with self.lock:
+            stats = self.models.get(model)
+            if not stats or not stats['count']:
+                return None
+            labels = [f"≤{limit:g}s" for limit in self.BUCKETS] + [f">{self.BUCKETS[-1]:g}s"]
+            return {
+                'count': stats['count'],
+                'mean': stats['total'] / stats['count'],
+                'max': stats['max'],
+                'histogram': dict(zip(labels, stats['counts']))
+            }
+
+
+time_to_ready_histogram = TimeToReadyHistogram(os.path.join(log_dir, 'time_to_ready.json'))
+
+
+def _remaining_timeout(deadline: float, default_timeout: float, minimum: float = 0.1) -> float:
+    """기한까지 남은 시간으로 줄인 소켓 타임아웃 (0이면 소켓이 논블로킹이 되므로 minimum 이상)"""
+    return max(minimum, min(default_timeout, deadline - time.monotonic()))
+
+
+def wait_for_authenticated_client(camera_ip: str, camera_port: int = 15740, model: str = "",
+                                  timeout: float = 15.0, initial_delay: float = 0.1,
+                                  max_delay: float = 2.0) -> Optional[PTPIPClient]:
+    """
+    0x935a 승인 뒤 카메라가 인증된 연결을 받아들일 준비가 될 때까지 재연결을 시도 (Phase 2)
+
+    고정 대기 대신 initial_delay부터 max_delay까지 두 배씩 늘어나는 간격으로 연결과 GetDeviceInfo를 반복하고,
+    supports_944c가 보이는 즉시 연결된 클라이언트를 반환한다 (세션은 열지 않음). timeout초 안에 준비되지
+    않으면 None. 걸린 시간은 모델별 준비 시간 히스토그램에 기록된다. 응답 없는 시도 하나가 기한을 넘기지
+    않도록 시도마다 소켓 타임아웃을 남은 시간으로 줄이며, 반환한 클라이언트는 기본 타임아웃으로 되돌린다.
+    """
+    start_time = time.monotonic()
+    deadline = start_time + timeout
+    delay = initial_delay
+    attempt = 0
+
+    while True:
+        time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+        attempt += 1
+        client = PTPIPClient(camera_ip, camera_port)
+        default_timeout = client.socket_timeout
+        client.socket_timeout = _remaining_timeout(deadline, default_timeout)
+        try:
+            if client.connect():
+                client.socket_timeout = _remaining_timeout(deadline, default_timeout)
+                device_info = client.get_device_info()
+                if device_info and device_info.get('supports_944c'):
+                    client.socket_timeout = default_timeout
+                    client.command_socket.settimeout(default_timeout)
+                    client.event_socket.settimeout(default_timeout)
+                    elapsed = time.monotonic() - start_time
+                    model = device_info.get('model') or model
+                    time_to_ready_histogram.record(model, elapsed)
+                    logger.info(f"✅ 카메라 준비 완료: {elapsed:.2f}초 ({attempt}번째 시도, 모델 {model})")
+                    return client
+                logger.info(f"카메라 아직 준비 안 됨 ({attempt}번째 시도) - 0x944c 미지원")
+        except Exception as e:
+            logger.debug(f"준비 확인 {attempt}번째 시도 실패: {e}")
+        client.disconnect()
+
+        if time.monotonic() >= deadline:
+            logger.error(f"❌ 카메라 준비 대기 시간 초과 ({timeout:.0f}초, {attempt}번 시도)")
+            return None
+        delay = min(delay * 2, max_delay)
+
+
 def main():
     """PTP 클라이언트를 테스트하는 메인 함수"""
     logger.info("니콘 PTP/IP 클라이언트 시작")
@@ -1465,9 +2959,8 @@ def main():
         logger.info("\n=== Phase 1 완료: 기존 연결 정리 ===")
         client.disconnect()
 
-        # 카메라가 내부적으로 상태를 변경하는 시간 대기
-        logger.info("카메라 내부 처리 대기 중... (5초)")
-        time.sleep(5)
+        # 카메라 모델은 준비 시간 히스토그램 기록용
+        model = device_info.get('model', '') if device_info else ''
 
     except Exception as e:
         logger.error(f"Phase 1 중 오류 발생: {e}")
@@ -1477,15 +2970,12 @@ def main():
     # === Phase 2: 새로운 인증된 연결 (Frame 68~) ===
     logger.info("\n=== Phase 2: 새로운 인증된 연결 (Frame 68~) ===")
 
-    # 새로운 클라이언트 인스턴스로 재연결
-    logger.info("새로운 인증된 연결 시작...")
-    authenticated_client = PTPIPClient(camera_ip)
-
     try:
-        # 6단계: 인증된 연결 설정
-        logger.info("\n6단계: 인증된 연결 설정")
+        # 6단계: 카메라가 준비될 때까지 재연결 시도 (고정 대기 대신 준비 확인)
+        logger.info("\n6단계: 인증된 연결 설정 (준비 확인)")
         logger.info("=" * 60)
-        if not authenticated_client.connect():
+        authenticated_client = wait_for_authenticated_client(camera_ip, model=model)
+        if authenticated_client is None:
             logger.error("인증된 연결 실패")
             return
 
@@ -1494,7 +2984,7 @@ def main():
         # 7단계: 인증된 상태에서 장치 정보 확인
         logger.info("\n7단계: 인증된 상태 장치 정보 확인 (Frame 68+ 상태)")
         logger.info("=" * 60)
-        device_info = authenticated_client.get_device_info()
+        device_info = authenticated_client.device_info
         if device_info:
             logger.info(f"인증 후 사용 가능한 동작: {device_info['operation_count']}개")
             logger.info(f"니콘 전용 동작 지원 여부:")
@@ -1561,7 +3051,7 @@ def main():
     finally:
         # 정리 작업 (사용자가 명시적으로 종료할 때만)
         logger.info("정리 작업 시작...")
-        if 'authenticated_client' in locals():
+        if locals().get('authenticated_client'):
             logger.info("인증된 연결 종료 중...")
             authenticated_client.disconnect()
         logger.info("프로그램 종료")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Local Object Index
+Records objects already offloaded from each camera so sync only fetches new ones
+"""
+
+import sqlite3
+import logging
+from typing import Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# sync가 다운로드 폴더에 두는 인덱스 파일 이름
+INDEX_FILENAME = ".camcon_index.sqlite3"
+
+
+class ObjectIndex:
+    """
+    카메라 시리얼별로 이미 내려받은 객체를 기록하는 SQLite 인덱스
+
+    핸들은 세션/카드마다 다시 매겨지고 포맷이나 카드 교체 뒤에는 다른 사진에 재사용되므로, 객체는
+    ObjectInfo 내용(파일명, 크기, 촬영일)으로 식별한다. 저장소별 핸들 → ObjectInfo 기록은 GetObjectInfo를
+    생략하기 위한 것으로, 저장소 서명(볼륨 레이블, 남은 바이트)이 마지막 동기화 때와 같을 때만 믿는다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS objects ("
+            " serial TEXT NOT NULL,"
+            " handle INTEGER NOT NULL,"
+            " filename TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " capture_date TEXT NOT NULL,"
+            " PRIMARY KEY (serial, filename, size, capture_date))"
+        )
+        # 저장소별로 이미 확인한 핸들 → ObjectInfo (저장소 서명이 그대로인 동안만 믿음)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS handles ("
+            " serial TEXT NOT NULL,"
+            " storage_id INTEGER NOT NULL,"
+            " handle INTEGER NOT NULL,"
+            " filename TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " capture_date TEXT NOT NULL,"
+            " PRIMARY KEY (serial, storage_id, handle))"
+        )
+        # 마지막 동기화 때의 저장소 서명 (볼륨 레이블, 남은 바이트)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS storages ("
+            " serial TEXT NOT NULL,"
+            " storage_id INTEGER NOT NULL,"
+            " volume_label TEXT NOT NULL,"
+            " free_bytes INTEGER NOT NULL,"
+            " PRIMARY KEY (serial, storage_id))"
+        )
+        self.connection.commit()
+        logger.info(f"객체 인덱스 열기: {path}")
+
+    def known_objects(self, serial: str) -> Set[Tuple[str, int, str]]:
+        """해당 카메라에서 이미 받은 객체의 (파일명, 크기, 촬영일) 집합"""
+        rows = self.connection.execute("SELECT filename, size, capture_date FROM objects WHERE serial = ?", (serial,))
+        return {tuple(row) for row in rows}
+
+    def add(self, serial: str, handle: int, filename: str, size: int, capture_date: str):
+        """객체를 인덱스에 기록 (같은 객체가 있으면 마지막으로 본 핸들만 갱신)"""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO objects (serial, handle, filename, size, capture_date) VALUES (?, ?, ?, ?, ?)",
+            (serial, handle, filename, size, capture_date)
+        )
+
+    def storage_signature(self, serial: str, storage_id: int) -> Optional[Tuple[str, int]]:
+        """마지막 동기화 때 기록한 저장소의 (볼륨 레이블, 남은 바이트) (없으면 None)"""
+        row = self.connection.execute(
+            "SELECT volume_label, free_bytes FROM storages WHERE serial = ? AND storage_id = ?", (serial, storage_id)
+        ).fetchone()
+        return tuple(row) if row else None
+
+    def set_storage_signature(self, serial: str, storage_id: int, volume_label: str, free_bytes: int):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO storages (serial, storage_id, volume_label, free_bytes) VALUES (?, ?, ?, ?)",
+            (serial, storage_id, volume_label, free_bytes)
+        )
+
+    def known_handles(self, serial: str, storage_id: int) -> Set[int]:
+        """해당 저장소에서 이미 확인한 핸들 집합"""
+        rows = self.connection.execute("SELECT handle FROM handles WHERE serial = ? AND storage_id = ?",
+                                       (serial, storage_id))
+        return {row[0] for row in rows}
+
+    def add_handle(self, serial: str, storage_id: int, handle: int, filename: str, size: int, capture_date: str):
+        """확인한 핸들과 그 ObjectInfo 기록"""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO handles (serial, storage_id, handle, filename, size, capture_date) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (serial, storage_id, handle, filename, size, capture_date)
+        )
+
+    def forget_handles(self, serial: str, storage_id: int):
+        """저장소가 바뀌었을 때(포맷, 카드 교체) 그 저장소의 핸들 기록을 버림"""
+        self.connection.execute("DELETE FROM handles WHERE serial = ? AND storage_id = ?", (serial, storage_id))
+        self.connection.execute("DELETE FROM storages WHERE serial = ? AND storage_id = ?", (serial, storage_id))
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+PTP Dataset Codec
+Precompiled struct codecs shared by the DeviceInfo, ObjectInfo, StorageInfo and DevicePropDesc parsers
+"""
+
+import sys
+import codecs
+import struct
+from array import array
+from typing import Tuple, List, Set, Union
+
+try:
+    import numpy
+except ImportError:  # numpy는 선택 사항 - 없으면 표준 array 모듈로 대체
+    numpy = None
+
+# 데이터셋은 memoryview로 감싸 읽으므로 필드마다 bytes 조각을 만들지 않는다
+Buffer = Union[bytes, bytearray, memoryview]
+
+# 미리 컴파일한 기본 형식 (모두 little-endian)
+INT8 = struct.Struct('<b')
+UINT8 = struct.Struct('<B')
+INT16 = struct.Struct('<h')
+UINT16 = struct.Struct('<H')
+INT32 = struct.Struct('<i')
+UINT32 = struct.Struct('<I')
+INT64 = struct.Struct('<q')
+UINT64 = struct.Struct('<Q')
+
+# 데이터셋 고정 길이 부분
+DEVICE_INFO_HEADER = struct.Struct('<HIH')  # StandardVersion, VendorExtensionID, VendorExtensionVersion
+OBJECT_INFO_FIXED = struct.Struct('<IHHIHIIIIIIIHII')  # StorageID ~ SequenceNumber (52바이트)
+STORAGE_INFO_FIXED = struct.Struct('<HHHQQI')  # StorageType ~ FreeSpaceInImages (26바이트)
+PROP_DESC_HEADER = struct.Struct('<HHB')  # PropertyCode, DataType, GetSet
+
+# PTP 데이터 형식 코드
+DTC_INT8, DTC_UINT8, DTC_INT16, DTC_UINT16 = 0x0001, 0x0002, 0x0003, 0x0004
+DTC_INT32, DTC_UINT32, DTC_INT64, DTC_UINT64 = 0x0005, 0x0006, 0x0007, 0x0008
+DTC_INT128, DTC_UINT128 = 0x0009, 0x000A
+DTC_ARRAY_MASK = 0x4000  # 0x4001~0x400A: 위 형식의 배열 ([개수(4)] [요소...])
+DTC_STR = 0xFFFF
+
+# DevicePropDesc FormFlag
+FORM_NONE, FORM_RANGE, FORM_ENUM = 0x00, 0x01, 0x02
+
+# 4바이트 부호 없는 정수 array 형식 코드 (플랫폼마다 'I' 또는 'L')
+_UINT32_TYPECODE = 'I' if array('I').itemsize == 4 else 'L'
+
+# 코덱 이름 조회 없이 버퍼를 바로 받는 UTF-16LE 디코더 (memoryview 조각을 bytes로 복사하지 않음)
+_utf16_decode = codecs.utf_16_le_decode
+
+SCALARS = {
+    DTC_INT8: INT8, DTC_UINT8: UINT8, DTC_INT16: INT16, DTC_UINT16: UINT16,
+    DTC_INT32: INT32, DTC_UINT32: UINT32, DTC_INT64: INT64, DTC_UINT64: UINT64,
+}
+
+
+def read_string(buf: Buffer, offset: int) -> Tuple[str, int]:
+    """PTP String 읽기: [문자 수(1바이트)] [UTF-16LE 문자열...] -> (문자열, 다음 오프셋)"""
+    if offset >= len(buf):
+        return "", offset
+    end = offset + 1 + buf[offset] * 2
+    return _utf16_decode(buf[offset + 1:end], 'ignore', True)[0].rstrip('\x00'), end
+
+
+def read_strings(buf: Buffer, offset: int, count: int) -> Tuple[List[str], int]:
+    """PTP String count개를 연속으로 읽음"""
+    strings = []
+    size = len(buf)
+    for _ in range(count):
+        if offset >= size:
+            strings.append("")
+            continue
+        end = offset + 1 + buf[offset] * 2
+        strings.append(_utf16_decode(buf[offset + 1:end], 'ignore', True)[0].rstrip('\x00'))
+        offset = end
+    return strings, offset
+
+
+def read_array(buf: Buffer, offset: int, element: struct.Struct) -> Tuple[List[int], int]:
+    """
+    PTP 배열 읽기: [개수(4바이트)] [요소...] -> (정수 목록, 다음 오프셋)
+
+    요소를 하나씩 읽지 않고 unpack_from 한 번으로 변환한다. 데이터가 모자라면 있는 만큼만 읽는다.
+    """
+    if offset + 4 > len(buf):
+        return [], offset
+    count = UINT32.unpack_from(buf, offset)[0]
+    offset += 4
+    count = min(count, (len(buf) - offset) // element.size)
+    values = list(struct.unpack_from(f'<{count}{element.format[-1]}', buf, offset))
+    return values, offset + count * element.size
+
+
+def read_uint16_array(buf: Buffer, offset: int) -> Tuple[List[int], int]:
+    """UINT16 배열 (DeviceInfo의 동작/이벤트/속성/형식 코드 목록)"""
+    return read_array(buf, offset, UINT16)
+
+
+def read_uint32_array(buf: Buffer, offset: int) -> Tuple[List[int], int]:
+    """UINT32 배열 (저장소 ID, 객체 핸들 목록)"""
+    return read_array(buf, offset, UINT32)
+
+
+def read_uint32_vector(buf: Buffer, offset: int):
+    """
+    대용량 UINT32 배열 (수만 개의 객체 핸들) -> (numpy 배열 또는 array, 다음 오프셋)
+
+    numpy가 있으면 frombuffer로 buf를 더 복사하지 않고 그대로 바라보고, 없으면 array.frombytes로
+    한 번에 복사한다. 어느 쪽이든 요소마다 파이썬 정수를 만들지 않으며 tolist()로 목록을 얻을 수 있다.
+    (buf 자체는 _receive_response가 수신 버퍼를 bytes로 한 번 복사해 돌려준 것이다.)
+    """
+    if offset + 4 > len(buf):
+        count = 0
+    else:
+        count = min(UINT32.unpack_from(buf, offset)[0], (len(buf) - offset - 4) // 4)
+        offset += 4
+    end = offset + count * 4
+    if numpy is not None:
+        return numpy.frombuffer(buf, dtype='<u4', count=count, offset=offset), end
+    values = array(_UINT32_TYPECODE)
+    values.frombytes(memoryview(buf)[offset:end])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values, end
+
+
+def uint32_difference(values, known: Set[int]) -> List[int]:
+    """
+    values(read_uint32_vector 결과) 중 known 집합에 없는 값 목록 (values의 순서 유지)
+
+    numpy 배열이면 isin으로 한 번에 걸러내고, 아니면 목록으로 한 번에 바꾼 뒤 집합을 조회한다.
+    """
+    if not known:
+        return values.tolist()
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        known_values = numpy.fromiter(known, dtype='<u4', count=len(known))
+        return values[numpy.isin(values, known_values, invert=True)].tolist()
+    return [value for value in values.tolist() if value not in known]
+
+
+def decode_value(buf: Buffer, offset: int, datatype: int) -> Tuple[object, int]:
+    """datatype 형식의 값 하나를 offset에서 읽음 -> (값, 다음 오프셋)"""
+    scalar = SCALARS.get(datatype)
+    if scalar is not None:
+        return scalar.unpack_from(buf, offset)[0], offset + scalar.size
+    if datatype in (DTC_INT128, DTC_UINT128):
+        value = int.from_bytes(buf[offset:offset + 16], 'little', signed=datatype == DTC_INT128)
+        return value, offset + 16
+    if datatype == DTC_STR:
+        return read_string(buf, offset)
+    if datatype & DTC_ARRAY_MASK:
+        element_type = datatype & ~DTC_ARRAY_MASK
+        scalar = SCALARS.get(element_type)
+        if scalar is not None:
+            return read_array(buf, offset, scalar)
+        count = UINT32.unpack_from(buf, offset)[0]
+        offset += 4
+        values = []
+        for _ in range(count):
+            value, offset = decode_value(buf, offset, element_type)
+            values.append(value)
+        return values, offset
+    raise ValueError(f"지원하지 않는 데이터 형식: 0x{datatype:04x}")
+
+
+def encode_value(value, datatype: int) -> bytes:
+    """값을 datatype 형식의 바이트로 변환 (SetDevicePropValue 데이터 단계용)"""
+    scalar = SCALARS.get(datatype)
+    if scalar is not None:
+        return scalar.pack(value)
+    if datatype in (DTC_INT128, DTC_UINT128):
+        return int(value).to_bytes(16, 'little', signed=datatype == DTC_INT128)
+    if datatype == DTC_STR:
+        if not value:
+            return b'\x00'
+        encoded = (str(value) + '\x00').encode('utf-16le')
+        return bytes([len(encoded) // 2]) + encoded
+    if datatype & DTC_ARRAY_MASK:
+        element_type = datatype & ~DTC_ARRAY_MASK
+        scalar = SCALARS.get(element_type)
+        if scalar is not None:
+            return UINT32.pack(len(value)) + struct.pack(f'<{len(value)}{scalar.format[-1]}', *value)
+        return UINT32.pack(len(value)) + b''.join(encode_value(item, element_type) for item in value)
+    raise ValueError(f"지원하지 않는 데이터 형식: 0x{datatype:04x}")
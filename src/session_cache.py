@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Authenticated Session Cache
+Remembers which cameras have already approved our client GUID so Phase 1 can be skipped
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 명령마다 새 프로세스가 뜨는 CLI에서도 공유되도록 홈 디렉터리에 저장
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".camcon", "session_cache.json")
+
+
+class SessionCache:
+    """
+    카메라 시리얼 번호와 클라이언트 GUID를 키로 하는 인증 캐시
+
+    0x935a 승인을 받은 (시리얼, GUID) 조합과 마지막으로 본 IP를 기록한다. 유효 기간(ttl초)이 지난 항목과
+    max_entries를 넘는 오래된 항목은 저장할 때 제거된다. 캐시는 힌트일 뿐이므로 적중해도 실제 연결에서
+    0x944c 지원을 확인한 뒤에만 사용한다.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = 30 * 60, max_entries: int = 64):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries: dict = {}  # "시리얼:GUID" → {serial_number, client_guid, camera_ip, model, authorized_at, last_used}
+        self.by_ip: dict = {}  # (IP, GUID) → 키
+        self._load()
+
+    @staticmethod
+    def _key(serial_number: str, client_guid: bytes) -> str:
+        return f"{serial_number}:{client_guid.hex()}"
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"인증 캐시 읽기 실패 (무시): {e}")
+            self.entries = {}
+        self._reindex()
+
+    def _reindex(self):
+        self.by_ip = {(entry['camera_ip'], entry['client_guid']): key for key, entry in self.entries.items()}
+
+    def _save(self):
+        """만료/초과 항목을 정리하고 파일에 저장 (다른 프로세스가 반쯤 쓴 파일을 읽지 않도록 교체 방식)"""
+        now = time.time()
+        self.entries = {key: entry for key, entry in self.entries.items() if now - entry['authorized_at'] < self.ttl}
+        if len(self.entries) > self.max_entries:
+            newest = sorted(self.entries.items(), key=lambda item: item[1]['last_used'], reverse=True)
+            self.entries = dict(newest[:self.max_entries])
+        self._reindex()
+
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning(f"인증 캐시 저장 실패: {e}")
+
+    def lookup(self, camera_ip: str, client_guid: bytes) -> Optional[dict]:
+        """이 IP에서 해당 GUID가 유효 기간 안에 승인받은 기록 (없거나 만료되면 None)"""
+        with self.lock:
+            key = self.by_ip.get((camera_ip, client_guid.hex()))
+            entry = self.entries.get(key) if key else None
+            if entry is None:
+                return None
+            if time.time() - entry['authorized_at'] >= self.ttl:
+                logger.info(f"인증 캐시 만료: {camera_ip} (S/N {entry['serial_number']})")
+                del self.entries[key]
+                self._save()
+                return None
+            return dict(entry)
+
+    def store(self, camera_ip: str, serial_number: str, client_guid: bytes, model: str = "",
+              authorized_at: Optional[float] = None):
+        """승인 기록 추가 또는 갱신 (authorized_at을 생략하면 지금 승인받은 것으로 기록)"""
+        if not serial_number:
+            return
+        with self.lock:
+            now = time.time()
+            key = self._key(serial_number, client_guid)
+            # 같은 IP에 이전에 있던 다른 카메라 기록은 제거
+            for other_key, entry in list(self.entries.items()):
+                if entry['camera_ip'] == camera_ip and entry['client_guid'] == client_guid.hex() and other_key != key:
+                    del self.entries[other_key]
+            self.entries[key] = {
+                'serial_number': serial_number,
+                'client_guid': client_guid.hex(),
+                'camera_ip': camera_ip,
+                'model': model,
+                'authorized_at': now if authorized_at is None else authorized_at,
+                'last_used': now
+            }
+            self._save()
+
+    def invalidate(self, camera_ip: str, client_guid: bytes):
+        """캐시된 승인이 더 이상 유효하지 않을 때 (카메라 재부팅 등) 항목 제거"""
+        with self.lock:
+            key = self.by_ip.get((camera_ip, client_guid.hex()))
+            if key in self.entries:
+                logger.info(f"인증 캐시 무효화: {camera_ip} (S/N {self.entries[key]['serial_number']})")
+                del self.entries[key]
+                self._save()
+
+
+# 프로세스 공용 캐시
+session_cache = SessionCache()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Thumbnail Cache
+On-disk LRU cache of camera thumbnails (GetThumb) keyed by serial number, handle and capture date
+"""
+
+import os
+import time
+import queue
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Callable
+
+from nikon_ptp_client import PTPObjectInfo
+
+logger = logging.getLogger(__name__)
+
+# 프로세스가 바뀌어도 다시 받지 않도록 홈 디렉터리에 저장
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".camcon", "thumbnails")
+
+# 이 시간보다 오래된 .tmp만 이전 실행이 쓰다 만 파일로 보고 지움 (더 최근 것은 다른 프로세스가 쓰는 중일 수 있음)
+TEMP_FILE_GRACE_SECONDS = 15 * 60
+
+
+class ThumbnailCache:
+    """
+    썸네일 JPEG을 파일로 저장하는 LRU 캐시
+
+    키는 (카메라 시리얼, 핸들, 촬영일)이므로 카드를 바꿔 같은 핸들이 다른 사진을 가리키면 다른 항목이 된다.
+    전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 썸네일부터 지운다 (사용 순서는 파일 mtime으로 유지).
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries: OrderedDict = OrderedDict()  # 파일 경로 → 크기 (오래된 것부터)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        """디스크에 있는 썸네일을 사용 시각 순으로 읽어 LRU 순서 복원"""
+        if not os.path.isdir(self.directory):
+            return
+        found = []
+        now = time.time()
+        for root, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                    if filename.endswith('.tmp'):
+                        if now - stat.st_mtime > TEMP_FILE_GRACE_SECONDS:
+                            os.remove(path)  # 이전 실행에서 쓰다 만 파일
+                        continue
+                except OSError:
+                    continue  # 다른 프로세스가 그 사이에 지우거나 이름을 바꾼 파일
+                found.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(found):
+            self.entries[path] = size
+            self.total_bytes += size
+
+    def _path(self, serial_number: str, handle: int, capture_date: str) -> str:
+        digest = hashlib.sha1(f"{serial_number}:{handle:08x}:{capture_date}".encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest[2:] + '.jpg')
+
+    def get(self, serial_number: str, handle: int, capture_date: str) -> Optional[bytes]:
+        """캐시된 썸네일 (없으면 None)"""
+        path = self._path(serial_number, handle, capture_date)
+        with self.lock:
+            if path not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(path)
+            self.hits += 1
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # 다음 실행에서도 최근 사용으로 보이도록
+            return data
+        except OSError:
+            with self.lock:
+                self.total_bytes -= self.entries.pop(path, 0)
+            return None
+
+    def put(self, serial_number: str, handle: int, capture_date: str, data: bytes):
+        """썸네일 저장 후 한도를 넘으면 오래된 항목 제거"""
+        path = self._path(serial_number, handle, capture_date)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"썸네일 캐시 저장 실패: {e}")
+            return
+
+        with self.lock:
+            self.total_bytes += len(data) - self.entries.pop(path, 0)
+            self.entries[path] = len(data)
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                old_path, size = self.entries.popitem(last=False)
+                self.total_bytes -= size
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {'entries': len(self.entries), 'bytes': self.total_bytes, 'hits': self.hits, 'misses': self.misses}
+
+
+# 프로세스 공용 캐시 (get_thumbnail_cache()로 처음 사용할 때 만듦)
+_shared_cache: Optional[ThumbnailCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """프로세스 공용 캐시 - import만으로는 캐시 디렉터리를 읽거나 지우지 않도록 처음 호출할 때 만든다"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ThumbnailCache()
+        return _shared_cache
+
+
+def prefetch_thumbnails(client, cache: Optional[ThumbnailCache] = None, storage_id: int = 0xFFFFFFFF,
+                        on_thumbnail: Optional[Callable[[int, PTPObjectInfo, bytes], None]] = None) -> dict:
+    """
+    저장소의 객체 목록을 읽으면서 동시에 썸네일을 캐시로 가져오는 일괄 프리페치
+
+    목록 스레드가 list_objects()로 받은 PTPObjectInfo를 하나씩 큐에 넣으면 이 스레드가 바로 썸네일을 처리하므로
+    전체 목록이 끝나기 전에 앞쪽 사진부터 on_thumbnail(handle, info, jpeg)이 호출된다.
+    캐시에 있는 썸네일은 카메라에 요청하지 않는다. cache를 생략하면 프로세스 공용 캐시를 쓴다.
+    Returns: {'objects', 'cached', 'fetched', 'failed', 'elapsed'}
+    """
+    if cache is None:
+        cache = get_thumbnail_cache()
+    serial_number = client.device_info.get('serial_number', '') if client.device_info else ''
+    listing: queue.Queue = queue.Queue()
+    start_time = time.monotonic()
+
+    def list_objects():
+        try:
+            for info in client.list_objects(storage_id):
+                if not info.is_folder:
+                    listing.put(info)
+        finally:
+            listing.put(None)  # 목록 끝
+
+    lister = threading.Thread(target=list_objects, name='thumbnail-list', daemon=True)
+    lister.start()
+
+    summary = {'objects': 0, 'cached': 0, 'fetched': 0, 'failed': 0}
+    while True:
+        info = listing.get()
+        if info is None:
+            break
+        summary['objects'] += 1
+
+        thumbnail = cache.get(serial_number, info.handle, info.capture_date)
+        if thumbnail is not None:
+            summary['cached'] += 1
+        else:
+            thumbnail = client.get_thumbnail(info.handle)
+            if thumbnail is None:
+                summary['failed'] += 1
+                continue
+            cache.put(serial_number, info.handle, info.capture_date, thumbnail)
+            summary['fetched'] += 1
+
+        if on_thumbnail is not None:
+            on_thumbnail(info.handle, info, thumbnail)
+
+    lister.join()
+    summary['elapsed'] = time.monotonic() - start_time
+    logger.info(f"🖼️ 썸네일 프리페치 완료: {summary['objects']}개 (캐시 {summary['cached']}, "
+                f"새로 받음 {summary['fetched']}, 실패 {summary['failed']}) {summary['elapsed']:.1f}초")
+    return summary